@@ -1,20 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routes.simulation import simulation
 from routes.container import container
 from routes.auth import auth
 from routes.user import user
-from config.db import engine, Base
+from routes.metrics import metrics
 from fastapi.middleware.cors import CORSMiddleware
+from utils.readings import readings
+from utils.fleet import shutdown_pool
+from utils.simulation_jobs import simulation_jobs
+from utils.metrics import MetricsMiddleware, instrument_engine, watch_cache
+from utils.cache import container_cache
+from dependencies.auth import token_cache, user_cache
+from utils import geolocation, simulation_cache
+from config.settings import METRICS_ENABLED, STARTUP_PREWARM
+from utils.warmup import prewarm
+from sqlalchemy.engine import Engine
 
 import models.simulation
 import models.container
 import models.user
-import uvicorn
-import os
+import models.geocode
+import models.reading
+import models.road
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El esquema no se toca aquí: se crea y migra con python -m migrations antes de desplegar
+    warmup = None
+    await simulation_jobs.start()
+    if STARTUP_PREWARM == "blocking":
+        await prewarm()
+    elif STARTUP_PREWARM == "background":
+        warmup = asyncio.create_task(prewarm())
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await simulation_jobs.stop()
+    # Vuelca las lecturas de capacidad pendientes antes de salir
+    await readings.stop()
+    shutdown_pool()
 
 app = FastAPI(
     title="Waste Track",
     version="0.0.1",
+    lifespan=lifespan,
 )
 origins = [
     "http://localhost:3000",
@@ -28,7 +59,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-Base.metadata.create_all(bind=engine)
+if METRICS_ENABLED:
+    # Eventos en la clase Engine: cubren también el sync_engine del motor async, que se crea al primer uso
+    instrument_engine(Engine)
+    for name, cache in (
+        ("container", container_cache), ("auth_token", token_cache), ("auth_user", user_cache),
+        ("geocode", geolocation.memory_cache), ("simulation", simulation_cache.memory_cache),
+    ):
+        watch_cache(name, cache)
+    # El último middleware añadido es el más externo: mide también CORS
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics)
 
 app.include_router(auth, prefix="/api/v1")
 app.include_router(user, prefix="/api/v1")
@@ -36,4 +77,6 @@ app.include_router(container, prefix="/api/v1")
 app.include_router(simulation, prefix="/api/v1")
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
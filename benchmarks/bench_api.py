@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, UTC
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx
+from sqlalchemy import create_engine, insert
+from passlib.context import CryptContext
+from models.container import Container
+from models.user import User
+from utils.geohash import geohash_for
+
+# Carga de la API completa (uvicorn en otro proceso) contra SQLite con datos sintéticos a varias escalas.
+# Uso: python -m benchmarks.bench_api --scales 1000,10000 --output results.json [--compare previous.json]
+
+PASSWORD = "bench-password"
+CENTER = (-12.05, -77.04)
+SPAN_DEG = 0.2
+SEED_BATCH = 5000
+LLM_PORT = 8767
+WARMUP_SECONDS = 3
+
+parser = argparse.ArgumentParser(description="API hot paths at several data scales: latency percentiles and throughput")
+parser.add_argument("--scales", default="1000,10000,100000", help="Comma-separated container counts")
+parser.add_argument("--users", type=int, default=1000, help="Seeded users (signin picks among them)")
+parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint (simulations: a tenth)")
+parser.add_argument("--concurrency", type=int, default=20)
+parser.add_argument("--page-size", type=int, default=100, help="limit for GET /containers/")
+parser.add_argument("--simulation-size", type=int, default=50, help="Containers per simulation")
+parser.add_argument("--engine", choices=("local", "openai"), default="local",
+                    help="Simulation engine; openai runs against benchmarks.fake_llm")
+parser.add_argument("--rounds", type=int, default=10, help="BCRYPT_ROUNDS for the server and the seeded hashes")
+parser.add_argument("--port", type=int, default=8790)
+parser.add_argument("--output", default="bench_api.json", help="Where to write the JSON results")
+parser.add_argument("--compare", help="Previous JSON results to compare against")
+
+def percentile(sorted_ms: list, q: float) -> float:
+    # Rango más cercano: con pocas muestras no se interpola
+    if not sorted_ms:
+        return float("nan")
+    return sorted_ms[max(math.ceil(q * len(sorted_ms)) - 1, 0)]
+
+def guid_for(i: int) -> str:
+    # guid es String(6): hexadecimal cubre hasta 16M contenedores
+    return f"{i:06X}"
+
+def seed(url: str, containers: int, users: int, rounds: int) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "migrations"], env={**os.environ, "DATABASE_URL": url},
+                   check=True, stdout=subprocess.DEVNULL)
+    engine = create_engine(url)
+    rng = random.Random(7)
+    # Un solo hash para todos: bcrypt de 100k usuarios tardaría más que el propio benchmark
+    password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(PASSWORD)
+    with engine.begin() as conn:
+        for offset in range(0, containers, SEED_BATCH):
+            rows = []
+            for i in range(offset, min(offset + SEED_BATCH, containers)):
+                lat = CENTER[0] + rng.uniform(-SPAN_DEG / 2, SPAN_DEG / 2)
+                lon = CENTER[1] + rng.uniform(-SPAN_DEG / 2, SPAN_DEG / 2)
+                rows.append({
+                    "guid": guid_for(i), "name": f"bench-{i}", "latitude": f"{lat:.6f}", "longitude": f"{lon:.6f}",
+                    "latitude_deg": lat, "longitude_deg": lon, "geohash": geohash_for(lat, lon),
+                    "capacity": rng.randint(0, 100), "limit": rng.randint(60, 100), "status": "active",
+                    "isFavorite": False, "alert_active": False,
+                })
+            conn.execute(insert(Container.__table__), rows)
+        conn.execute(insert(User.__table__), [
+            {"guid": f"user-{i}", "name": f"bench-{i}", "email": f"bench{i}@example.com", "password": password,
+             "role": "worker", "address": "-", "phone": "-"} for i in range(users)
+        ])
+    engine.dispose()
+    return time.perf_counter() - start
+
+def start_server(url: str, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "BCRYPT_ROUNDS": str(args.rounds),
+        "OPEN_API_KEY": os.environ.get("OPEN_API_KEY", "fake"),
+        "OPENAI_API_BASE": f"http://127.0.0.1:{LLM_PORT}/v1",
+    }
+    env.pop("ASYNC_DATABASE_URL", None)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port), "--log-level", "warning"], env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", args.port), timeout=0.2):
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 60 s")
+
+def scenarios(containers: int, args):
+    rng = random.Random(11)
+    guid = lambda: guid_for(rng.randrange(containers))
+    api = "/api/v1"
+    return [
+        ("get_containers", args.requests,
+         lambda c: c.get(f"{api}/containers/", params={"limit": args.page_size, "cursor": guid()})),
+        ("get_nearby_containers", args.requests,
+         lambda c: c.get(f"{api}/containers/get-nearby-containers/{guid()}", params={"radius_km": 1, "k": 10})),
+        ("update_capacity", args.requests,
+         lambda c: c.put(f"{api}/containers/{guid()}/capacity", json={"capacity": rng.randint(0, 100)})),
+        ("signin", args.requests,
+         lambda c: c.post(f"{api}/auth/signin",
+                          json={"email": f"bench{rng.randrange(args.users)}@example.com", "password": PASSWORD})),
+        ("generate_simulation", max(args.requests // 10, 1),
+         lambda c: c.post(f"{api}/simulation/generate-simulation", json={
+             "container_guids": [guid() for _ in range(args.simulation_size)], "engine": args.engine, "force": True,
+         })),
+    ]
+
+async def measure(client: httpx.AsyncClient, request, count: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(client)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    # Calentamiento: índices en memoria (se cargan en segundo plano tras la primera petición), pool de conexiones
+    # y cachés de consultas
+    warm_until = time.monotonic() + WARMUP_SECONDS
+    for n in itertools.count():
+        await request(client)
+        if n >= 10 and time.monotonic() >= warm_until:
+            break
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "rps": round(count / elapsed, 1),
+    }
+
+async def run_scale(containers: int, args) -> dict:
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=120, limits=limits) as client:
+        for name, count, request in scenarios(containers, args):
+            results[name] = await measure(client, request, count, args.concurrency)
+            r = results[name]
+            print(f"  {name:<22} p50={r['p50_ms']:8.1f}ms p95={r['p95_ms']:8.1f}ms p99={r['p99_ms']:8.1f}ms "
+                  f"{r['rps']:8.1f} req/s errors={r['errors']}")
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(current: dict, previous: dict):
+    print(f"\nvs {previous.get('commit', '?')} (p95 and req/s; >1.00 in p95 is slower)")
+    for scale, endpoints in current["results"].items():
+        before = previous.get("results", {}).get(scale, {})
+        for name, r in endpoints["endpoints"].items():
+            old = before.get("endpoints", {}).get(name)
+            if not old:
+                continue
+            print(f"  {scale:>7} {name:<22} p95 x{r['p95_ms'] / max(old['p95_ms'], 1e-9):.2f} "
+                  f"req/s x{r['rps'] / max(old['rps'], 1e-9):.2f}")
+
+def main():
+    args = parser.parse_args()
+    llm = None
+    if args.engine == "openai":
+        from benchmarks.fake_llm import serve
+
+        llm = serve(LLM_PORT)
+        threading.Thread(target=llm.serve_forever, daemon=True).start()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": {},
+    }
+    workdir = tempfile.mkdtemp(prefix="bench_api_")
+    for containers in (int(s) for s in args.scales.split(",")):
+        url = f"sqlite:///{workdir}/bench_{containers}.db"
+        seed_s = seed(url, containers, args.users, args.rounds)
+        print(f"containers={containers} users={args.users} seeded in {seed_s:.1f}s")
+        server = start_server(url, args)
+        try:
+            endpoints = asyncio.run(run_scale(containers, args))
+        finally:
+            server.terminate()
+            server.wait()
+        report["results"][str(containers)] = {"seed_seconds": round(seed_s, 2), "endpoints": endpoints}
+
+    if llm:
+        llm.shutdown()
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db")
+
+from fastapi.security import HTTPAuthorizationCredentials
+from config.db import Base, SessionLocal, engine, get_async_engine
+from models.user import User
+from utils.jwt import create_access_token, verify_token
+import dependencies.auth as auth
+
+import models.container
+import models.simulation
+
+CALLS = 5000
+
+def uncached(credentials, db):
+    # Ruta original: decodificar el JWT y consultar el usuario en cada petición
+    payload = verify_token(credentials.credentials)
+    return db.query(User).filter(User.guid == payload.get("sub")).first()
+
+def per_call_us(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        fn()
+    return (time.perf_counter() - start) / CALLS * 1e6
+
+async def per_call_us_async(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        await fn()
+    return (time.perf_counter() - start) / CALLS * 1e6
+
+async def cached_paths(credentials) -> dict:
+    # get_current_user es async y solo abre sesión en el primer fallo de caché
+    results = {"token + user cache": await per_call_us_async(lambda: auth.get_current_user(credentials))}
+    auth.AUTH_CLAIMS_ONLY = True
+    results["claims only"] = await per_call_us_async(lambda: auth.get_current_user(credentials))
+    await get_async_engine().dispose()
+    return results
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(name="bench", email=f"bench{time.time_ns()}@example.com", password="x",
+                role="worker", address="-", phone="-")
+    db.add(user)
+    db.commit()
+
+    token = create_access_token(data={"sub": user.guid, "role": user.role})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    results = {"jwt decode + DB lookup": per_call_us(lambda: uncached(credentials, db))}
+    results.update(asyncio.run(cached_paths(credentials)))
+    db.close()
+
+    print(f"calls={CALLS}")
+    for name, us in results.items():
+        print(f"{name:24s} {us:8.1f} us/request")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description="Sync vs async container reads under concurrent load")
+parser.add_argument("--url", help="DATABASE_URL to benchmark (default: temporary SQLite file)")
+parser.add_argument("--containers", type=int, default=1000)
+parser.add_argument("--requests", type=int, default=2000)
+parser.add_argument("--concurrency", type=int, default=100)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from sqlalchemy.orm import Session
+from config.db import Base, SessionLocal, engine, get_db, get_async_engine
+from models.container import Container
+from routes.container import container as async_container
+
+import models.simulation
+import models.user
+
+# Versión sync equivalente a la original de GET /containers/{guid}
+sync_container = APIRouter(prefix="/sync/containers")
+
+@sync_container.get("/{guid}")
+def get_container_sync(guid: str, db: Session = Depends(get_db)):
+    container = db.query(Container).filter(Container.guid == guid).first()
+    if not container:
+        raise HTTPException(status_code=404, detail="Container not found")
+    return {"guid": container.guid, "capacity": container.capacity}
+
+def seed(n: int):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        db.query(Container).delete()
+        db.add_all([
+            Container(
+                guid=f"B{i:05d}",
+                name=f"bench-{i}",
+                latitude=str(-12.05 + rng.uniform(-0.1, 0.1)),
+                longitude=str(-77.04 + rng.uniform(-0.1, 0.1)),
+                capacity=rng.randint(0, 100),
+                limit=80,
+            ) for i in range(n)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def run(client: httpx.AsyncClient, prefix: str, guids):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(guid):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"{prefix}/{guid}")
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(g) for g in guids))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": len(guids) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+async def main():
+    seed(args.containers)
+    app = FastAPI()
+    app.include_router(sync_container)
+    app.include_router(async_container)
+
+    rng = random.Random(11)
+    guids = [f"B{rng.randrange(args.containers):05d}" for _ in range(args.requests)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await run(client, "/sync/containers", guids[:50])
+        await run(client, "/containers", guids[:50])
+        results = {
+            "sync": await run(client, "/sync/containers", guids),
+            "async": await run(client, "/containers", guids),
+        }
+
+    print(f"url={engine.url.render_as_string()} requests={args.requests} concurrency={args.concurrency}")
+    for name, r in results.items():
+        print(f"{name:5s} {r['rps']:8.0f} req/s  p50={r['p50_ms']:.1f}ms  p95={r['p95_ms']:.1f}ms")
+    await get_async_engine().dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+from benchmarks.bench_route_optimizer import make_containers
+from utils.distance import haversine, haversine_matrix, haversine_one_to_many, coordinates
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def scalar_matrix(containers):
+    return [[haversine(a.latitude, a.longitude, b.latitude, b.longitude) for b in containers] for a in containers]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    containers = make_containers(n)
+    ref = containers[0]
+
+    scalar, scalar_ms = timed(lambda: scalar_matrix(containers))
+    matrix, matrix_ms = timed(lambda: haversine_matrix(*coordinates(containers)))
+    matrix32, matrix32_ms = timed(lambda: haversine_matrix(*coordinates(containers), dtype=np.float32))
+    _, one_ms = timed(lambda: haversine_one_to_many(ref.latitude, ref.longitude, *coordinates(containers)))
+
+    error = float(np.max(np.abs(np.asarray(scalar) - matrix)))
+    error32 = float(np.max(np.abs(matrix - matrix32)))
+    print(f"containers={n}")
+    print(f"scalar n x n     {scalar_ms:9.1f} ms")
+    print(f"numpy  n x n f64 {matrix_ms:9.1f} ms  max_err={error:.2e} km")
+    print(f"numpy  n x n f32 {matrix32_ms:9.1f} ms  max_err={error32:.2e} km  bytes={matrix32.nbytes}")
+    print(f"numpy  1 x n     {one_ms:9.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from benchmarks.bench_route_optimizer import make_containers
+from utils.fleet import plan_fleet, get_pool, shutdown_pool, optimize_chunk, to_stops
+from utils.route import optimize_route
+
+SIZES = (100, 1000, 10000)
+# Una sola ruta sobre todos los contenedores solo se mide hasta este tamaño (crece de forma cúbica)
+SINGLE_ROUTE_MAX = 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Clustered multi-vehicle planning vs a single route")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--vehicles", type=int, default=5)
+    parser.add_argument("--method", choices=("kmeans", "sweep"), default="kmeans")
+    args = parser.parse_args()
+
+    # Arranca los procesos del pool antes de medir
+    warm = to_stops(make_containers(10))
+    list(get_pool().map(optimize_chunk, [warm] * os.cpu_count()))
+
+    for n in args.sizes:
+        containers = make_containers(n)
+        start = time.perf_counter()
+        routes, unassigned = plan_fleet(containers, args.vehicles, method=args.method)
+        fleet_s = time.perf_counter() - start
+        total_km = sum(r["total_distance_km"] for r in routes)
+        makespan = max(r["duration_min"] for r in routes)
+        line = (
+            f"containers={n} vehicles={args.vehicles} method={args.method} plan={fleet_s * 1000:.0f}ms "
+            f"total_km={total_km:.1f} makespan_min={makespan:.0f} unassigned={len(unassigned)}"
+        )
+        if n <= SINGLE_ROUTE_MAX:
+            start = time.perf_counter()
+            _, _, single_km, _ = optimize_route(containers)
+            line += f" | single_route={(time.perf_counter() - start) * 1000:.0f}ms single_km={single_km:.1f}"
+        print(line)
+    shutdown_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+
+PORT = 8766
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OPEN_API_KEY", "fake")
+os.environ.setdefault("OPENAI_API_BASE", f"http://127.0.0.1:{PORT}/v1")
+os.environ.setdefault("LLM_IDLE_TIMEOUT_SECONDS", "1")
+os.environ.setdefault("LLM_RETRY_BASE_SECONDS", "0.05")
+
+from benchmarks.bench_route_optimizer import make_containers
+from benchmarks.fake_llm import FakeLLMHandler, serve
+from utils.routes_openai import build_simulation_prompt, call_openai_for_simulation
+from utils.route import optimize_route, is_urgent
+
+# (nombre, fallos 503, rutas con errores, respuestas no JSON, streams colgados)
+SCENARIOS = [
+    ("clean", 0.0, 0.0, 0.0, 0.0),
+    ("503 x30%", 0.3, 0.0, 0.0, 0.0),
+    ("mangled x50%", 0.0, 0.5, 0.0, 0.0),
+    ("garbage x20%", 0.0, 0.0, 0.2, 0.0),
+    ("hang x10%", 0.0, 0.0, 0.0, 0.1),
+]
+
+def legacy_prompt_chars(containers) -> int:
+    # Volcado que hacía el prompt anterior (solo los datos, sin las instrucciones)
+    data = [
+        {"guid": c.guid, "capacity": int(c.capacity), "limit": int(c.limit),
+         "latitude": float(c.latitude), "longitude": float(c.longitude)} for c in containers
+    ]
+    return len(json.dumps(data, indent=2))
+
+def valid(route, containers) -> bool:
+    by_guid = {c.guid: c for c in containers}
+    flags = [is_urgent(by_guid[g]) for g in route]
+    return sorted(route) == sorted(by_guid) and flags == sorted(flags, reverse=True)
+
+async def run(containers, runs: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                route, _, total_km, _ = await call_openai_for_simulation(containers)
+                return time.perf_counter() - start, valid(route, containers), total_km
+            except RuntimeError:
+                return time.perf_counter() - start, False, None
+
+    return await asyncio.gather(*(one() for _ in range(runs)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Async LLM simulation client against a local fake server")
+    parser.add_argument("--containers", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.2, help="Fake model latency (seconds)")
+    args = parser.parse_args()
+
+    server = serve(PORT, args.delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    containers = make_containers(args.containers)
+    compact = len(build_simulation_prompt(containers))
+    legacy = legacy_prompt_chars(containers)
+    print(f"prompt chars: legacy data={legacy} compact={compact} (~{legacy // 4} vs ~{compact // 4} tokens)")
+    _, _, local_km, _ = optimize_route(containers)
+    print(f"local optimizer total_km={local_km}")
+
+    for name, fail, mangle, garbage, hang in SCENARIOS:
+        FakeLLMHandler.fail_rate, FakeLLMHandler.mangle_rate = fail, mangle
+        FakeLLMHandler.garbage_rate, FakeLLMHandler.hang_rate = garbage, hang
+        FakeLLMHandler.calls = 0
+        results = asyncio.run(run(containers, args.runs, args.concurrency))
+        timings = sorted(r[0] * 1000 for r in results)
+        ok = sum(r[1] for r in results)
+        kms = [r[2] for r in results if r[2] is not None]
+        print(
+            f"{name:<14} ok={ok}/{args.runs} calls={FakeLLMHandler.calls} "
+            f"p50={statistics.median(timings):.0f}ms max={timings[-1]:.0f}ms "
+            f"total_km={statistics.median(kms) if kms else float('nan'):.1f}"
+        )
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+PORT = 8767
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OPEN_API_KEY", "fake")
+os.environ.setdefault("OPENAI_API_BASE", f"http://127.0.0.1:{PORT}/v1")
+
+from benchmarks.bench_route_optimizer import make_containers
+from benchmarks.fake_llm import FakeLLMHandler, serve
+from utils import routes_openai
+from utils.routes_openai import call_openai_for_simulation
+from utils.route import is_urgent
+
+SIZES = (100, 500, 1000, 2000)
+# Sin trozos: un único prompt con todos los contenedores
+UNCHUNKED = 10 ** 9
+
+def check(route, containers):
+    by_guid = {c.guid: c for c in containers}
+    flags = [is_urgent(by_guid[g]) for g in route]
+    assert sorted(route) == sorted(by_guid), "route must visit every container once"
+    assert flags == sorted(flags, reverse=True), "urgent stops must come first"
+
+def measure(containers, chunk_size: int):
+    routes_openai.LLM_CHUNK_SIZE = chunk_size
+    FakeLLMHandler.calls = 0
+    start = time.perf_counter()
+    route, _, total_km, _ = asyncio.run(call_openai_for_simulation(containers))
+    elapsed = time.perf_counter() - start
+    check(route, containers)
+    return elapsed, total_km, FakeLLMHandler.calls
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM engine latency vs container count, single prompt vs chunks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--chunk-size", type=int, default=routes_openai.LLM_CHUNK_SIZE)
+    parser.add_argument("--concurrency", type=int, default=routes_openai.LLM_CHUNK_CONCURRENCY)
+    parser.add_argument("--delay", type=float, default=0.3, help="Fake model base latency (seconds)")
+    parser.add_argument("--ms-per-stop", type=float, default=5.0, help="Fake model latency per container")
+    args = parser.parse_args()
+
+    routes_openai.LLM_CHUNK_CONCURRENCY = args.concurrency
+    server = serve(PORT, args.delay, args.ms_per_stop)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    for n in args.sizes:
+        containers = make_containers(n)
+        single_s, single_km, _ = measure(containers, UNCHUNKED)
+        chunked_s, chunked_km, calls = measure(containers, args.chunk_size)
+        print(
+            f"containers={n} single={single_s * 1000:.0f}ms ({single_km}km) "
+            f"chunked={chunked_s * 1000:.0f}ms ({chunked_km}km, {calls} prompts, "
+            f"chunk_size={args.chunk_size}, concurrency={args.concurrency})"
+        )
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_road_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{WORKDIR}/bench.db")
+
+import numpy as np
+from config.db import engine
+from models.road import RoadDistance
+from benchmarks.bench_route_optimizer import make_containers
+from utils import distance
+from utils.distance import HaversineProvider
+from utils.road_network import RoadNetworkProvider, load_graph
+from utils.route import optimize_route
+
+CENTER = (-12.05, -77.04)
+SPAN_DEG = 0.2
+
+def write_grid(path: str, size: int, seed: int = 7):
+    # Cuadrícula de calles tipo ciudad: avenidas de doble sentido cada 5 calles, el resto de sentido único
+    # alterno, y algunas manzanas cortadas para forzar rodeos
+    rng = random.Random(seed)
+    step = SPAN_DEG / (size - 1)
+    node = lambda r, c: r * size + c + 1
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+        for r in range(size):
+            for c in range(size):
+                lat = CENTER[0] - SPAN_DEG / 2 + r * step
+                lon = CENTER[1] - SPAN_DEG / 2 + c * step
+                f.write(f'<node id="{node(r, c)}" lat="{lat:.7f}" lon="{lon:.7f}"/>\n')
+        way_id = 1
+        for horizontal in (True, False):
+            for line in range(size):
+                cells = [(line, i) if horizontal else (i, line) for i in range(size)]
+                segments = [[cells[0]]]
+                for cell in cells[1:]:
+                    if line % 5 and rng.random() < 0.03:
+                        segments.append([])
+                    segments[-1].append(cell)
+                for segment in segments:
+                    if len(segment) < 2:
+                        continue
+                    f.write(f'<way id="{way_id}">')
+                    f.write("".join(f'<nd ref="{node(r, c)}"/>' for r, c in segment))
+                    if line % 5 == 0:
+                        f.write('<tag k="highway" v="primary"/>')
+                    else:
+                        f.write('<tag k="highway" v="residential"/>')
+                        f.write(f'<tag k="oneway" v="{"yes" if line % 2 else "-1"}"/>')
+                    f.write("</way>\n")
+                    way_id += 1
+        f.write("</osm>\n")
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def route_cost(route, matrix, containers):
+    index = {c.guid: i for i, c in enumerate(containers)}
+    km, minutes = matrix
+    pairs = [(index[a], index[b]) for a, b in zip(route, route[1:])]
+    return sum(km[a, b] for a, b in pairs), sum(minutes[a, b] for a, b in pairs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Road-network distance matrix vs haversine")
+    parser.add_argument("--grid", type=int, default=150, help="Streets per side of the synthetic city")
+    parser.add_argument("--containers", type=int, default=200)
+    parser.add_argument("--osm", help="Use this OSM extract instead of a synthetic grid")
+    args = parser.parse_args()
+
+    path = args.osm or os.path.join(WORKDIR, "grid.osm")
+    if not args.osm:
+        write_grid(path, args.grid)
+    RoadDistance.__table__.create(bind=engine, checkfirst=True)
+
+    graph, parse_ms = timed(load_graph, path)
+    _, cached_ms = timed(load_graph, path)
+    print(f"graph nodes={len(graph)} edges={len(graph.edges[0])} parse={parse_ms:.0f}ms cached_load={cached_ms:.0f}ms")
+
+    containers = sorted(make_containers(args.containers + 1), key=lambda c: c.guid)
+    extra, containers = containers[-1], containers[:-1]
+    provider = RoadNetworkProvider(graph)
+    road, cold_ms = timed(provider.matrix, containers)
+    _, warm_ms = timed(provider.matrix, containers)
+    _, db_ms = timed(RoadNetworkProvider(graph).matrix, containers)
+    print(f"matrix {len(containers)}x{len(containers)} cold={cold_ms:.0f}ms memory={warm_ms:.1f}ms from_db={db_ms:.0f}ms")
+
+    # Contenedor nuevo: solo se calculan los pares de su nodo
+    future, _ = timed(provider.schedule, extra.latitude, extra.longitude)
+    _, add_ms = timed(future.result) if future else (None, 0.0)
+    _, after_ms = timed(provider.matrix, containers + [extra])
+    print(f"incremental add: update={add_ms:.0f}ms matrix_after={after_ms:.1f}ms")
+    provider.close()
+
+    straight = HaversineProvider().matrix(containers)
+    distance._provider = HaversineProvider()
+    haversine_route, _, haversine_km, haversine_min = optimize_route(containers)
+    distance._provider = provider
+    road_route, _, road_km, road_min = optimize_route(containers)
+    driven_km, driven_min = route_cost(haversine_route, road, containers)
+    print(f"haversine route: planned {haversine_km:.1f}km/{haversine_min:.0f}min, driven {driven_km:.1f}km/{driven_min:.0f}min")
+    print(f"road route:      planned {road_km:.1f}km/{road_min:.0f}min")
+    ratio = road[0][~np.eye(len(containers), dtype=bool)] / np.maximum(straight[0][~np.eye(len(containers), dtype=bool)], 1e-9)
+    print(f"road/straight distance ratio p50={np.median(ratio):.2f} p95={np.percentile(ratio, 95):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from utils.route import optimize_route
+
+TARGET_MS = 50
+N_CONTAINERS = 200
+RUNS = 20
+
+def make_containers(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            guid=f"C{i:05d}",
+            latitude=str(-12.05 + rng.uniform(-0.1, 0.1)),
+            longitude=str(-77.04 + rng.uniform(-0.1, 0.1)),
+            capacity=rng.randint(0, 100),
+            limit=rng.randint(60, 100),
+        ) for i in range(n)
+    ]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_CONTAINERS
+    containers = make_containers(n)
+    optimize_route(containers)  # warm-up
+
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        route, _, total_km, _ = optimize_route(containers)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    p50 = statistics.median(timings)
+    print(f"containers={n} runs={RUNS} p50={p50:.1f}ms max={max(timings):.1f}ms total_km={total_km}")
+    if n == N_CONTAINERS and p50 > TARGET_MS:
+        print(f"FAIL: p50 above {TARGET_MS}ms target")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description="Signin throughput and collateral latency under concurrent logins")
+parser.add_argument("--url", help="DATABASE_URL to benchmark (default: temporary SQLite file)")
+parser.add_argument("--requests", type=int, default=200)
+parser.add_argument("--concurrency", type=int, default=50)
+parser.add_argument("--rounds", type=int, default=10, help="BCRYPT_ROUNDS for the run")
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tempfile.mkdtemp()}/bench_signin.db"
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from sqlalchemy.orm import Session
+from config.db import Base, SessionLocal, engine, get_db, get_async_engine
+from config.settings import PASSWORD_HASH_WORKERS
+from models.user import User
+from routes.auth import auth
+from routes.user import user as user_router
+from schemas.user import UserLogin
+from utils.auth import hash_password, verify_password
+
+import models.container
+import models.simulation
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+# Versión original de /auth/signin: sync, bcrypt en el threadpool compartido de FastAPI
+sync_auth = APIRouter(prefix="/sync/auth")
+
+@sync_auth.post("/signin")
+def signin_sync(credentials: UserLogin, db: Session = Depends(get_db)):
+    user = db.query(User).filter(User.email == credentials.email).first()
+    if not user or not verify_password(credentials.password, user.password):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    return {"guid": user.guid}
+
+def seed() -> str:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.email == EMAIL).delete()
+        user = User(name="bench", email=EMAIL, password=hash_password(PASSWORD),
+                    role="worker", address="-", phone="-")
+        db.add(user)
+        db.commit()
+        return user.guid
+    finally:
+        db.close()
+
+def percentile(values, q: float) -> float:
+    return values[max(int(len(values) * q) - 1, 0)] * 1000
+
+async def run(client: httpx.AsyncClient, path: str, guid: str):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            response = await client.post(path, json={"email": EMAIL, "password": PASSWORD})
+            response.raise_for_status()
+
+    async def probe():
+        # Lecturas sync (GET /user/{guid}) en paralelo: miden cuánto esperan detrás de bcrypt
+        while not done.is_set():
+            start = time.perf_counter()
+            (await client.get(f"/user/{guid}")).raise_for_status()
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    probe_latencies.sort()
+    return {
+        "rps": args.requests / elapsed,
+        "probe_p50_ms": statistics.median(probe_latencies) * 1000,
+        "probe_p95_ms": percentile(probe_latencies, 0.95),
+    }
+
+async def main():
+    guid = seed()
+    app = FastAPI()
+    app.include_router(sync_auth)
+    app.include_router(auth)
+    app.include_router(user_router)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        results = {
+            "sync (shared threadpool)": await run(client, "/sync/auth/signin", guid),
+            "async (bcrypt pool)": await run(client, "/auth/signin", guid),
+        }
+
+    print(f"requests={args.requests} concurrency={args.concurrency} "
+          f"rounds={args.rounds} bcrypt_workers={PASSWORD_HASH_WORKERS} cpus={os.cpu_count()}")
+    for name, r in results.items():
+        print(f"{name:26s} {r['rps']:7.1f} logins/s  "
+              f"probe p50={r['probe_p50_ms']:.1f}ms p95={r['probe_p95_ms']:.1f}ms")
+    await get_async_engine().dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx
+from benchmarks.bench_api import guid_for, seed
+
+# Arranque de un worker: importación de app, tiempo hasta aceptar peticiones y latencia de las primeras peticiones
+# según STARTUP_PREWARM. Uso: python -m benchmarks.bench_startup --containers 100000
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+CREATE_ALL_SNIPPET = (
+    "import time, app; from config.db import Base, engine; t = time.perf_counter(); "
+    "Base.metadata.create_all(bind=engine); print(time.perf_counter() - t)"
+)
+
+parser = argparse.ArgumentParser(description="Worker cold start: import time, time to first response, first requests")
+parser.add_argument("--url", help="DATABASE_URL to use (default: temporary SQLite file seeded with --containers)")
+parser.add_argument("--containers", type=int, default=100000)
+parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+parser.add_argument("--port", type=int, default=8791)
+
+def run_snippet(snippet: str, env: dict) -> float:
+    result = subprocess.run([sys.executable, "-c", snippet], env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def cold_start(env: dict, port: int) -> dict:
+    # Listo = uvicorn responde (en modo blocking no abre el puerto hasta terminar el pre-calentamiento)
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=base, timeout=60) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                try:
+                    client.get("/docs")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.02)
+            ready = time.perf_counter() - start
+
+            def timed(path: str) -> float:
+                request_start = time.perf_counter()
+                client.get(path).raise_for_status()
+                return (time.perf_counter() - request_start) * 1000
+
+            nearby = f"/api/v1/containers/get-nearby-containers/{guid_for(0)}?radius_km=1&k=10"
+            first_nearby = timed(nearby)
+            first_get = timed(f"/api/v1/containers/{guid_for(1)}")
+            # Tras un momento, en background ya ha terminado el pre-calentamiento
+            time.sleep(2)
+            return {
+                "ready_s": ready,
+                "first_nearby_ms": first_nearby,
+                "first_get_ms": first_get,
+                "later_nearby_ms": timed(nearby),
+            }
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    args = parser.parse_args()
+    url = args.url
+    if url is None:
+        url = f"sqlite:///{tempfile.mkdtemp(prefix='bench_startup_')}/bench.db"
+        seed(url, args.containers, 10, 4)
+    env = {**os.environ, "DATABASE_URL": url}
+
+    imports = [run_snippet(IMPORT_SNIPPET, env) for _ in range(args.runs)]
+    create_all = [run_snippet(CREATE_ALL_SNIPPET, env) for _ in range(args.runs)]
+    print(f"import app: p50={statistics.median(imports) * 1000:.0f}ms (no DDL)")
+    print(f"create_all on the existing schema, as previously run on import: p50={statistics.median(create_all) * 1000:.0f}ms")
+
+    for mode in ("off", "background", "blocking"):
+        runs = [cold_start({**env, "STARTUP_PREWARM": mode}, args.port) for _ in range(args.runs)]
+        summary = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(
+            f"STARTUP_PREWARM={mode:<10} ready={summary['ready_s'] * 1000:6.0f}ms "
+            f"first nearby={summary['first_nearby_ms']:6.1f}ms first get={summary['first_get_ms']:6.1f}ms "
+            f"nearby after 2s={summary['later_nearby_ms']:6.1f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
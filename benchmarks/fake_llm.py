@@ -0,0 +1,178 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Servidor local compatible con /v1/chat/completions (con y sin stream) que responde al prompt compacto del motor
+# "openai" con una ruta válida por vecino más cercano, o estropeada a propósito para probar reintentos y reparación.
+# Uso: python -m benchmarks.fake_llm --port 8766 y OPENAI_API_BASE=http://127.0.0.1:8766/v1 OPEN_API_KEY=fake
+
+parser = argparse.ArgumentParser(description="Local fake OpenAI chat server for LLM simulation tests and benchmarks")
+parser.add_argument("--port", type=int, default=8766)
+parser.add_argument("--delay", type=float, default=0.0, help="Seconds before the first token")
+parser.add_argument("--ms-per-stop", type=float, default=0.0, help="Extra latency per container in the prompt")
+parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503")
+parser.add_argument("--mangle-rate", type=float, default=0.0, help="Fraction of routes returned with mistakes")
+parser.add_argument("--garbage-rate", type=float, default=0.0, help="Fraction of responses that are not JSON")
+parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of streams that stop sending data")
+parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with HTTP 503")
+parser.add_argument("--hang-first", type=int, default=0, help="Stall the first N streams halfway")
+parser.add_argument("--seed", type=int, default=0)
+
+def parse_prompt(prompt: str):
+    # Líneas "id,lat,lon,capacity,limit" tras la cabecera
+    lines = prompt.split("id,lat,lon,capacity,limit\n", 1)[-1].splitlines()
+    return [
+        (int(i), float(lat), float(lon), int(capacity), int(limit))
+        for i, lat, lon, capacity, limit in (line.split(",") for line in lines if line)
+    ]
+
+def nearest_neighbour_route(stops) -> list:
+    def walk(group, start):
+        route, remaining = [], list(group)
+        current = start
+        while remaining:
+            if current is None:
+                nxt = max(remaining, key=lambda s: s[3])
+            else:
+                nxt = min(remaining, key=lambda s: math.hypot(s[1] - current[1], s[2] - current[2]))
+            remaining.remove(nxt)
+            route.append(nxt)
+            current = nxt
+        return route
+
+    urgent = walk([s for s in stops if s[3] >= s[4]], None)
+    regular = walk([s for s in stops if s[3] < s[4]], urgent[-1] if urgent else None)
+    return [s[0] for s in urgent + regular]
+
+def mangle(route: list, rng: random.Random) -> list:
+    # Errores típicos: se salta paradas, repite otras, inventa ids y cambia el orden de urgentes/no urgentes
+    route = list(route)
+    for _ in range(max(1, len(route) // 20)):
+        route.pop(rng.randrange(len(route)))
+    route += rng.sample(route, min(2, len(route)))
+    route.append(len(route) + 1000)
+    rng.shuffle(route[: max(2, len(route) // 4)])
+    return route
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    # Latencia que crece con el tamaño del prompt, como la de un modelo real
+    ms_per_stop = 0.0
+    fail_rate = 0.0
+    mangle_rate = 0.0
+    garbage_rate = 0.0
+    hang_rate = 0.0
+    # Fallos deterministas para las pruebas: las N primeras peticiones, o las que cumplan fail_if(paradas)
+    fail_first = 0
+    hang_first = 0
+    fail_if = None
+    rng = random.Random(0)
+    lock = threading.Lock()
+    calls = 0
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        stops = parse_prompt(body["messages"][-1]["content"])
+        with self.lock:
+            FakeLLMHandler.calls += 1
+            fail, bad, garbage, hang = (self.rng.random() < rate for rate in (
+                self.fail_rate, self.mangle_rate, self.garbage_rate, self.hang_rate,
+            ))
+            seed = self.rng.random()
+            # Desde la clase: como atributo de la instancia sería un método ligado
+            fail_if = FakeLLMHandler.fail_if
+            fail = fail or self.calls <= self.fail_first or (fail_if is not None and fail_if(stops))
+            hang = hang or self.calls <= self.hang_first
+        if fail:
+            self._send(503, "application/json", json.dumps({"error": {"message": "overloaded", "type": "server_error"}}))
+            return
+
+        time.sleep(self.delay + self.ms_per_stop * len(stops) / 1000)
+        route = nearest_neighbour_route(stops)
+        if bad:
+            route = mangle(route, random.Random(seed))
+        content = "Sorry, I cannot help with that." if garbage else json.dumps({"route": route})
+        try:
+            if body.get("stream"):
+                self._stream(content, hang)
+            else:
+                self._send(200, "application/json", json.dumps(completion(content)))
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente abandonó la petición por timeout
+            pass
+
+    def _send(self, status: int, content_type: str, text: str):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, content: str, hang: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)]
+        for n, piece in enumerate(pieces):
+            if hang and n == len(pieces) // 2:
+                # Deja la conexión abierta sin enviar nada más
+                time.sleep(3600)
+            self._chunk(f"data: {json.dumps(delta(piece))}\n\n")
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text: str):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+def completion(content: str) -> dict:
+    return {
+        "id": "fake", "object": "chat.completion", "model": "fake",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    }
+
+def delta(content: str) -> dict:
+    return {
+        "id": "fake", "object": "chat.completion.chunk", "model": "fake",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+
+def serve(port: int, delay: float = 0.0, ms_per_stop: float = 0.0, fail_rate: float = 0.0,
+          mangle_rate: float = 0.0, garbage_rate: float = 0.0, hang_rate: float = 0.0,
+          seed: int = 0, fail_first: int = 0, hang_first: int = 0) -> ThreadingHTTPServer:
+    FakeLLMHandler.delay = delay
+    FakeLLMHandler.ms_per_stop = ms_per_stop
+    FakeLLMHandler.fail_rate = fail_rate
+    FakeLLMHandler.mangle_rate = mangle_rate
+    FakeLLMHandler.garbage_rate = garbage_rate
+    FakeLLMHandler.hang_rate = hang_rate
+    FakeLLMHandler.fail_first = fail_first
+    FakeLLMHandler.hang_first = hang_first
+    FakeLLMHandler.fail_if = None
+    FakeLLMHandler.calls = 0
+    FakeLLMHandler.rng = random.Random(seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    print(f"Fake LLM on http://127.0.0.1:{args.port}/v1/chat/completions")
+    serve(
+        args.port, args.delay, args.ms_per_stop, args.fail_rate,
+        args.mangle_rate, args.garbage_rate, args.hang_rate, args.seed, args.fail_first, args.hang_first,
+    ).serve_forever()
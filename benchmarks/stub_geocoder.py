@@ -0,0 +1,59 @@
+import argparse
+import hashlib
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Stub local de Nominatim (/search, format=json): coordenadas deterministas por dirección.
+# Uso: python -m benchmarks.stub_geocoder --port 8765 y GEOCODER_DOMAIN=localhost:8765 GEOCODER_SCHEME=http
+
+parser = argparse.ArgumentParser(description="Local Nominatim stub for geocoding tests and benchmarks")
+parser.add_argument("--port", type=int, default=8765)
+parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+
+def coordinates_for(address: str):
+    digest = hashlib.sha256(address.encode()).digest()
+    lat = -12.05 + (digest[0] - 128) / 1280
+    lon = -77.04 + (digest[1] - 128) / 1280
+    return round(lat, 6), round(lon, 6)
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    calls = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/search":
+            self.send_error(404)
+            return
+        StubHandler.calls += 1
+        time.sleep(self.delay)
+        address = parse_qs(url.query).get("q", [""])[0]
+        # Las direcciones que contienen "nowhere" no tienen resultado
+        places = []
+        if address and "nowhere" not in address.lower():
+            lat, lon = coordinates_for(address)
+            places.append({"lat": str(lat), "lon": str(lon), "display_name": address})
+        body = json.dumps(places).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except BrokenPipeError:
+            # El cliente abandonó la petición por timeout
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port: int, delay: float = 0.0) -> ThreadingHTTPServer:
+    StubHandler.delay = delay
+    return ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    print(f"Nominatim stub on http://127.0.0.1:{args.port}/search")
+    serve(args.port, args.delay).serve_forever()
@@ -0,0 +1,111 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Motor de simulación por defecto: "local" (optimizador en proceso) u "openai"
+SIMULATION_ENGINE = os.getenv("SIMULATION_ENGINE", "local")
+# Si la llamada a OpenAI falla, recalcular la ruta con el optimizador local
+SIMULATION_LLM_FALLBACK = os.getenv("SIMULATION_LLM_FALLBACK", "true").lower() == "true"
+
+# Tamaño de lote (filas por transacción) para los endpoints masivos de contenedores
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+# Filas por lote al servir GET /containers/ en modo NDJSON
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+
+# Caché de lecturas de contenedores: "memory" (LRU+TTL en proceso), "redis" o "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Jobs de simulación en segundo plano: ejecuciones simultáneas y máximo de jobs en espera por proceso
+SIMULATION_JOB_WORKERS = int(os.getenv("SIMULATION_JOB_WORKERS", "2"))
+SIMULATION_JOB_QUEUE_SIZE = int(os.getenv("SIMULATION_JOB_QUEUE_SIZE", "100"))
+# Cada worker renueva el latido de sus jobs; sin latido durante STALE segundos, cualquier worker los marca como fallidos
+SIMULATION_JOB_HEARTBEAT_SECONDS = float(os.getenv("SIMULATION_JOB_HEARTBEAT_SECONDS", "10"))
+SIMULATION_JOB_STALE_SECONDS = float(os.getenv("SIMULATION_JOB_STALE_SECONDS", "60"))
+
+# Memoización de simulaciones por huella (GUIDs + coordenadas + capacidad + límite)
+# MAX_ENTRIES acota solo la copia en memoria; la tabla simulation_cache crece hasta que caducan las entradas
+SIMULATION_CACHE_TTL_SECONDS = int(os.getenv("SIMULATION_CACHE_TTL_SECONDS", "3600"))
+SIMULATION_CACHE_MAX_ENTRIES = int(os.getenv("SIMULATION_CACHE_MAX_ENTRIES", "1000"))
+
+# Autenticación: caché de tokens verificados / usuarios y modo solo-claims (sin consulta a BD)
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_CLAIMS_ONLY = os.getenv("AUTH_CLAIMS_ONLY", "false").lower() == "true"
+
+# Contraseñas: coste de bcrypt (log2 de iteraciones) e hilos dedicados a hash/verificación (por defecto, uno por CPU)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# Geocoding (Nominatim): timeout por llamada e intervalo mínimo entre llamadas (política de uso: 1 req/s)
+GEOCODER_TIMEOUT_SECONDS = float(os.getenv("GEOCODER_TIMEOUT_SECONDS", "5"))
+GEOCODER_MIN_INTERVAL_SECONDS = float(os.getenv("GEOCODER_MIN_INTERVAL_SECONDS", "1"))
+# Servidor Nominatim alternativo (p. ej. un stub local para pruebas)
+GEOCODER_DOMAIN = os.getenv("GEOCODER_DOMAIN", "nominatim.openstreetmap.org")
+GEOCODER_SCHEME = os.getenv("GEOCODER_SCHEME", "https")
+# Caché de geocoding: LRU en memoria delante de la tabla geocode_cache; las direcciones sin resultado se reintentan tras GEOCODE_MISS_TTL_SECONDS
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "10000"))
+GEOCODE_MISS_TTL_SECONDS = int(os.getenv("GEOCODE_MISS_TTL_SECONDS", "3600"))
+# Geocoding en el alta de usuarios: "inline" (espera las coordenadas) o "deferred" (tarea en segundo plano)
+SIGNUP_GEOCODING = os.getenv("SIGNUP_GEOCODING", "inline")
+
+# Índice de urgentes en memoria: cada worker solo ve sus propias escrituras, así que pasado este tiempo se consulta
+# la BD y se recarga (0: sin caducidad, solo con un worker)
+URGENT_INDEX_TTL_SECONDS = float(os.getenv("URGENT_INDEX_TTL_SECONDS", "30"))
+# Igual para el índice espacial de contenedores cercanos; mientras recarga se usa el prefiltro por bounding box en SQL
+CONTAINER_INDEX_TTL_SECONDS = float(os.getenv("CONTAINER_INDEX_TTL_SECONDS", "60"))
+
+# Eventos de contenedores (SSE/WebSocket): ventana de agrupación, máximo de contenedores pendientes por cliente y heartbeat
+CONTAINER_EVENTS_COALESCE_MS = int(os.getenv("CONTAINER_EVENTS_COALESCE_MS", "200"))
+CONTAINER_EVENTS_MAX_PENDING = int(os.getenv("CONTAINER_EVENTS_MAX_PENDING", "1000"))
+CONTAINER_EVENTS_HEARTBEAT_SECONDS = int(os.getenv("CONTAINER_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# Alertas de capacidad: se disparan al alcanzar el umbral (por contenedor, por defecto su limit) y se rearman al bajar de umbral - histéresis
+ALERT_HYSTERESIS = int(os.getenv("ALERT_HYSTERESIS", "5"))
+
+# Lecturas de capacidad: filas por inserción, cada cuánto se vuelcan y se compactan en agregados por hora/día, y retención del detalle
+READINGS_BATCH_SIZE = int(os.getenv("READINGS_BATCH_SIZE", "500"))
+READINGS_FLUSH_SECONDS = float(os.getenv("READINGS_FLUSH_SECONDS", "5"))
+READINGS_COMPACT_SECONDS = float(os.getenv("READINGS_COMPACT_SECONDS", "60"))
+READINGS_RETENTION_DAYS = int(os.getenv("READINGS_RETENTION_DAYS", "30"))
+# Previsión de llenado: horas de agregados horarios usadas para estimar la velocidad de llenado
+FORECAST_WINDOW_HOURS = int(os.getenv("FORECAST_WINDOW_HOURS", "24"))
+
+# Planificación multi-vehículo: procesos del pool de optimización (por defecto, uno por CPU), paradas máximas por
+# trozo optimizado y tamaño mínimo del plan para usar el pool en vez de optimizar en el propio proceso
+FLEET_PROCESS_WORKERS = int(os.getenv("FLEET_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+FLEET_MAX_CLUSTER_SIZE = int(os.getenv("FLEET_MAX_CLUSTER_SIZE", "200"))
+FLEET_PARALLEL_MIN_CONTAINERS = int(os.getenv("FLEET_PARALLEL_MIN_CONTAINERS", "400"))
+
+# Distancias de las rutas: "haversine" (línea recta) o "road" (grafo viario cargado de un extracto OSM en ROAD_GRAPH_PATH);
+# si el grafo no se puede cargar se sigue usando haversine
+DISTANCE_PROVIDER = os.getenv("DISTANCE_PROVIDER", "haversine")
+ROAD_GRAPH_PATH = os.getenv("ROAD_GRAPH_PATH", "")
+# Filas de la matriz por carretera (una por nodo origen) que cada proceso guarda en memoria (LRU); el resto se lee de road_distances
+ROAD_MATRIX_CACHE_ROWS = int(os.getenv("ROAD_MATRIX_CACHE_ROWS", "2000"))
+
+# Motor "openai": clave, modelo, servidor alternativo compatible (p. ej. el fake local de benchmarks), timeout total por intento,
+# tiempo máximo sin recibir datos del stream y reintentos (espera exponencial con jitter desde LLM_RETRY_BASE_SECONDS)
+OPEN_API_KEY = os.getenv("OPEN_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_IDLE_TIMEOUT_SECONDS = float(os.getenv("LLM_IDLE_TIMEOUT_SECONDS", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+
+# Motor "openai" con muchos contenedores: paradas máximas por prompt (trozos geográficos) y prompts simultáneos
+LLM_CHUNK_SIZE = int(os.getenv("LLM_CHUNK_SIZE", "150"))
+LLM_CHUNK_CONCURRENCY = int(os.getenv("LLM_CHUNK_CONCURRENCY", "4"))
+
+# Métricas: middleware de latencia por ruta, consultas a la BD y spans (optimizador, LLM, geocoding, bcrypt) expuestos en /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Pre-calentamiento al arrancar: "background" (el worker acepta peticiones mientras se calienta), "blocking" (no acepta
+# hasta terminar) u "off". Abre DB_PREWARM_CONNECTIONS conexiones por motor, carga los índices en memoria y los clientes
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "background")
+DB_PREWARM_CONNECTIONS = int(os.getenv("DB_PREWARM_CONNECTIONS", "2"))
@@ -1,19 +1,60 @@
+import hashlib
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError
-from sqlalchemy.orm import Session
-from config.db import get_db
-from utils.jwt import verify_token
+from sqlalchemy import select
+from config.db import AsyncSessionLocal
+from config.settings import AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES, AUTH_CLAIMS_ONLY
+from schemas.user import CurrentUser
+from utils.cache import Cache, MemoryBackend, build_cache_backend
+from utils.jwt import verify_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from models.user import User
 
 bearer_scheme = HTTPBearer()
 
-def get_current_user(
+# token -> claims ya verificados (por proceso); guid -> snapshot del usuario (backend configurable)
+token_cache = Cache(MemoryBackend(AUTH_CACHE_MAX_ENTRIES), ttl=AUTH_CACHE_TTL_SECONDS)
+user_cache = Cache(build_cache_backend(), ttl=AUTH_CACHE_TTL_SECONDS)
+# guid -> marca de claims revocados (rol cambiado o usuario borrado); dura lo que el token más largo posible
+revoked_claims = Cache(build_cache_backend(), ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def user_key(guid: str) -> str:
+    return f"auth:user:{guid}"
+
+def revoked_key(guid: str) -> str:
+    return f"auth:revoked:{guid}"
+
+def invalidate_user(guid: str, claims_changed: bool = False):
+    # claims_changed: los tokens ya emitidos llevan un rol que ya no vale; en modo solo-claims
+    # ese usuario vuelve a resolverse contra la BD mientras alguno de esos tokens pueda seguir vigente
+    user_cache.invalidate(user_key(guid))
+    if claims_changed:
+        revoked_claims.set(revoked_key(guid), True)
+
+def _verified_claims(token: str):
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        # exp es el timestamp POSIX del token; la caché nunca lo alarga
+        if claims.get("exp", 0) > time.time():
+            return claims
+        token_cache.invalidate(key)
+        return None
+
+    payload = verify_token(token)
+    if not payload:
+        return None
+    claims = {"sub": payload.get("sub"), "role": payload.get("role"), "exp": payload.get("exp", 0)}
+    ttl = min(AUTH_CACHE_TTL_SECONDS, int(claims["exp"] - time.time()))
+    if ttl > 0:
+        token_cache.set(key, claims, ttl=ttl)
+    return claims
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+) -> CurrentUser:
     token = credentials.credentials
-    payload = verify_token(token)
+    payload = _verified_claims(token)
 
     if not payload:
         raise HTTPException(
@@ -21,11 +62,23 @@ def get_current_user(
             detail="Invalid or expired token",
         )
 
-    user = db.query(User).filter(User.guid == payload.get("sub")).first()
+    if AUTH_CLAIMS_ONLY and revoked_claims.get(revoked_key(payload["sub"])) is None:
+        return CurrentUser(guid=payload["sub"], role=payload["role"])
+
+    cached = user_cache.get(user_key(payload["sub"]))
+    if cached is not None:
+        return CurrentUser(**cached)
+
+    # Solo en un fallo de caché se abre sesión: los aciertos y el modo solo-claims no tocan la BD
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.guid == payload.get("sub")))
+        user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
 
-    return user
+    snapshot = CurrentUser(guid=user.guid, role=user.role, name=user.name, email=user.email)
+    user_cache.set(user_key(user.guid), snapshot.model_dump())
+    return snapshot
@@ -0,0 +1,67 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, MetaData, Table, inspect, text
+from migrations import (
+    m0001_numeric_coordinates,
+    m0002_simulation_jobs,
+    m0003_simulation_stops_legs,
+    m0004_simulation_history_index,
+    m0005_container_alerts,
+    m0006_simulation_plans,
+    m0007_readings_compacted,
+    m0008_simulation_job_heartbeat,
+    m0009_rollup_last_recorded_at,
+)
+
+# Orden de aplicación; cada módulo expone ID y upgrade(engine)
+MIGRATIONS = [
+    m0001_numeric_coordinates,
+    m0002_simulation_jobs,
+    m0003_simulation_stops_legs,
+    m0004_simulation_history_index,
+    m0005_container_alerts,
+    m0006_simulation_plans,
+    m0007_readings_compacted,
+    m0008_simulation_job_heartbeat,
+    m0009_rollup_last_recorded_at,
+]
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("id", String(100), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def add_column_if_missing(conn, table: str, column: Column):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}"
+    if column.server_default is not None:
+        # Con valor por defecto en la BD se rellenan las filas existentes y las que inserte código anterior
+        ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+def create_index_if_missing(conn, index):
+    existing = {i["name"] for i in inspect(conn).get_indexes(index.table.name)}
+    if index.name not in existing:
+        index.create(bind=conn)
+
+def run_migrations(engine):
+    _meta.create_all(bind=engine)
+    with engine.connect() as conn:
+        applied = {row.id for row in conn.execute(schema_migrations.select())}
+
+    done = []
+    for migration in MIGRATIONS:
+        if migration.ID in applied:
+            continue
+        migration.upgrade(engine)
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(id=migration.ID, applied_at=datetime.utcnow()))
+        done.append(migration.ID)
+    return done
@@ -0,0 +1,15 @@
+from config.db import engine, Base
+from migrations import run_migrations
+
+import models.simulation
+import models.container
+import models.user
+import models.geocode
+import models.reading
+import models.road
+
+if __name__ == "__main__":
+    # Tablas nuevas con create_all; cambios sobre tablas existentes con las migraciones
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    print(f"Applied migrations: {applied or 'none'}")
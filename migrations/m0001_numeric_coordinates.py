@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Double, String, select, update, bindparam
+from models.container import Container
+from models.user import User
+from utils.geohash import encode, parse_coordinate
+
+ID = "0001_numeric_coordinates"
+BATCH_SIZE = 1000
+
+def _columns():
+    # Misma definición que en los modelos; columnas nuevas por tabla porque add_column no las comparte
+    return [Column("latitude_deg", Double), Column("longitude_deg", Double), Column("geohash", String(12))]
+
+def _backfill(conn, model):
+    # Rellena latitude_deg/longitude_deg/geohash a partir de las columnas de texto, por lotes
+    table = model.__table__
+    pending = (
+        select(table.c.guid, table.c.latitude, table.c.longitude)
+        .where(table.c.latitude_deg.is_(None), table.c.latitude.is_not(None))
+        .order_by(table.c.guid)
+    )
+    stmt = (
+        update(table)
+        .where(table.c.guid == bindparam("b_guid"))
+        .values(latitude_deg=bindparam("b_lat"), longitude_deg=bindparam("b_lon"), geohash=bindparam("b_geohash"))
+    )
+    last_guid = ""
+    while True:
+        rows = conn.execute(pending.where(table.c.guid > last_guid).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        params = []
+        for guid, lat, lon in rows:
+            lat, lon = parse_coordinate(lat), parse_coordinate(lon)
+            if lat is None or lon is None:
+                continue
+            params.append({"b_guid": guid, "b_lat": lat, "b_lon": lon, "b_geohash": encode(lat, lon)})
+        if params:
+            conn.execute(stmt, params)
+        last_guid = rows[-1].guid
+
+def upgrade(engine):
+    from migrations import add_column_if_missing, create_index_if_missing
+
+    for model in (Container, User):
+        table = model.__table__
+        with engine.begin() as conn:
+            for column in _columns():
+                add_column_if_missing(conn, table.name, column)
+            for index in table.indexes:
+                if index.name.endswith(("_deg_longitude_deg", "_geohash")):
+                    create_index_if_missing(conn, index)
+        with engine.begin() as conn:
+            _backfill(conn, model)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Enum, String, update
+from models.simulation import Simulation, SIMULATION_STATUSES
+
+ID = "0002_simulation_jobs"
+
+def upgrade(engine):
+    from migrations import add_column_if_missing
+
+    table = Simulation.__table__
+    with engine.begin() as conn:
+        add_column_if_missing(conn, table.name, Column("status", Enum(*SIMULATION_STATUSES, name="simulation_status")))
+        add_column_if_missing(conn, table.name, Column("error", String(1000)))
+        conn.execute(update(table).where(table.c.status.is_(None)).values(status="completed"))
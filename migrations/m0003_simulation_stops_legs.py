@@ -0,0 +1,51 @@
+import json
+from sqlalchemy import inspect, insert, text
+from models.simulation import Simulation, SimulationStop, SimulationLeg
+
+ID = "0003_simulation_stops_legs"
+BATCH_SIZE = 500
+
+def _backfill(conn):
+    # Copia las columnas JSON route/distances a simulation_stops/simulation_legs, por lotes de id
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, route, distances FROM simulations WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        stops, legs = [], []
+        for simulation_id, route, distances in rows:
+            try:
+                route = json.loads(route or "[]")
+                distances = json.loads(distances or "[]")
+            except ValueError:
+                continue
+            stops += [
+                {"simulation_id": simulation_id, "position": i, "container_guid": str(guid)}
+                for i, guid in enumerate(route)
+            ]
+            legs += [
+                {
+                    "simulation_id": simulation_id, "position": i, "from_guid": str(leg.get("from")),
+                    "to_guid": str(leg.get("to")), "distance_km": float(leg.get("distance_km") or 0),
+                } for i, leg in enumerate(distances) if isinstance(leg, dict)
+            ]
+        if stops:
+            conn.execute(insert(SimulationStop.__table__), stops)
+        if legs:
+            conn.execute(insert(SimulationLeg.__table__), legs)
+        last_id = rows[-1].id
+
+def upgrade(engine):
+    SimulationStop.__table__.create(bind=engine, checkfirst=True)
+    SimulationLeg.__table__.create(bind=engine, checkfirst=True)
+
+    columns = {c["name"] for c in inspect(engine).get_columns(Simulation.__tablename__)}
+    if "route" not in columns:
+        return
+    with engine.begin() as conn:
+        _backfill(conn)
+        conn.execute(text("ALTER TABLE simulations DROP COLUMN route"))
+        conn.execute(text("ALTER TABLE simulations DROP COLUMN distances"))
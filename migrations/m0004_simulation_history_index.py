@@ -0,0 +1,11 @@
+from models.simulation import Simulation
+
+ID = "0004_simulation_history_index"
+
+def upgrade(engine):
+    from migrations import create_index_if_missing
+
+    with engine.begin() as conn:
+        for index in Simulation.__table__.indexes:
+            if index.name == "ix_simulations_created_at_id":
+                create_index_if_missing(conn, index)
@@ -0,0 +1,18 @@
+from sqlalchemy import Boolean, Column, Integer, func, update
+from models.container import Container
+
+ID = "0005_container_alerts"
+
+def upgrade(engine):
+    from migrations import add_column_if_missing
+
+    table = Container.__table__
+    with engine.begin() as conn:
+        add_column_if_missing(conn, table.name, Column("alert_threshold", Integer))
+        add_column_if_missing(conn, table.name, Column("alert_active", Boolean))
+        # Los que ya están sobre el umbral cuentan como avisados: no hay ráfaga de alertas tras desplegar
+        conn.execute(
+            update(table)
+            .where(table.c.alert_active.is_(None))
+            .values(alert_active=table.c.capacity >= func.coalesce(table.c.alert_threshold, table.c.limit))
+        )
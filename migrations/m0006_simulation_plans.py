@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer
+from models.simulation import Simulation
+
+ID = "0006_simulation_plans"
+
+def upgrade(engine):
+    from migrations import add_column_if_missing, create_index_if_missing
+
+    # La tabla simulation_plans la crea create_all; aquí solo se enlazan las simulaciones existentes
+    table = Simulation.__table__
+    with engine.begin() as conn:
+        # ADD COLUMN no crea la clave foránea: en tablas migradas plan_id queda como entero simple
+        add_column_if_missing(conn, table.name, Column("plan_id", Integer))
+        add_column_if_missing(conn, table.name, Column("vehicle", Integer))
+        add_column_if_missing(conn, table.name, Column("vehicle_load", Integer))
+        for index in table.indexes:
+            if index.name == "ix_simulations_plan_id":
+                create_index_if_missing(conn, index)
@@ -0,0 +1,16 @@
+from sqlalchemy import Boolean, Column, select, text, update
+from models.reading import CapacityReading, RollupState
+
+ID = "0007_readings_compacted"
+
+def upgrade(engine):
+    from migrations import add_column_if_missing, create_index_if_missing
+
+    table = CapacityReading.__table__
+    with engine.begin() as conn:
+        add_column_if_missing(conn, table.name, Column("compacted", Boolean, nullable=False, server_default=text("0")))
+        # Lo que la marca de agua anterior ya daba por agregado
+        watermark = conn.execute(select(RollupState.last_reading_id).where(RollupState.id == 1)).scalar()
+        if watermark:
+            conn.execute(update(table).where(table.c.id <= watermark).values(compacted=True))
+        create_index_if_missing(conn, next(i for i in table.indexes if i.name == "ix_capacity_readings_compacted_id"))
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime
+from models.simulation import Simulation
+
+ID = "0008_simulation_job_heartbeat"
+
+def upgrade(engine):
+    from migrations import add_column_if_missing, create_index_if_missing
+
+    table = Simulation.__table__
+    with engine.begin() as conn:
+        add_column_if_missing(conn, table.name, Column("heartbeat_at", DateTime))
+        create_index_if_missing(conn, next(i for i in table.indexes if i.name == "ix_simulations_status_heartbeat_at"))
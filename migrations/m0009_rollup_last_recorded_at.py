@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime
+from models.reading import CapacityRollup
+
+ID = "0009_rollup_last_recorded_at"
+
+def upgrade(engine):
+    from migrations import add_column_if_missing
+
+    table = CapacityRollup.__table__
+    with engine.begin() as conn:
+        add_column_if_missing(conn, table.name, Column("last_recorded_at", DateTime))
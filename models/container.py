@@ -1,7 +1,9 @@
 import random
 import string
-from sqlalchemy import Column, String, Integer, Enum, Boolean
+from sqlalchemy import Column, String, Integer, Enum, Boolean, Double, Index
+from sqlalchemy.orm import validates
 from config.db import Base
+from utils.geohash import geohash_for, parse_coordinate
 
 def generate_guid():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
@@ -17,3 +19,20 @@ class Container(Base):
     status = Column(Enum("active", "inactive", name="status_enum"), default="active")
     isFavorite = Column(Boolean, default=False)
     limit = Column(Integer, nullable=False, default=100)
+    # Copia numérica de latitude/longitude para rangos e índices; se sincroniza en los validadores
+    latitude_deg = Column(Double)
+    longitude_deg = Column(Double)
+    geohash = Column(String(12), index=True)
+    # Umbral de alerta propio (None: se usa limit) y si la alerta está disparada, para avisar una sola vez por cruce
+    alert_threshold = Column(Integer)
+    alert_active = Column(Boolean, default=False)
+
+    __table_args__ = (
+        Index("ix_containers_latitude_deg_longitude_deg", "latitude_deg", "longitude_deg"),
+    )
+
+    @validates("latitude", "longitude")
+    def _sync_coordinates(self, key, value):
+        setattr(self, f"{key}_deg", parse_coordinate(value))
+        self.geohash = geohash_for(self.latitude_deg, self.longitude_deg)
+        return value
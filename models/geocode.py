@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime, UTC
+from config.db import Base
+
+class GeocodeCacheEntry(Base):
+    __tablename__ = "geocode_cache"
+
+    # Dirección normalizada (minúsculas, espacios y comas uniformes)
+    address_key = Column(String(255), primary_key=True)
+    latitude = Column(String(255), nullable=False)
+    longitude = Column(String(255), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index, Boolean, text
+from config.db import Base
+
+ROLLUP_RESOLUTIONS = ("hour", "day")
+
+class CapacityReading(Base):
+    # Histórico de capacidad: solo inserciones (por lotes), se compacta en capacity_rollups
+    __tablename__ = "capacity_readings"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    container_guid = Column(String(6), nullable=False)
+    capacity = Column(Integer, nullable=False)
+    recorded_at = Column(DateTime, nullable=False, index=True)
+    # Marcada al entrar en los agregados: con varios workers los ids no se confirman en orden, así que no basta con
+    # recordar el último id agregado (un lote con ids menores confirmado después quedaría fuera)
+    compacted = Column(Boolean, nullable=False, default=False, server_default=text("0"))
+
+    __table_args__ = (
+        Index("ix_capacity_readings_container_guid_recorded_at", "container_guid", "recorded_at"),
+        Index("ix_capacity_readings_compacted_id", "compacted", "id"),
+    )
+
+class CapacityRollup(Base):
+    __tablename__ = "capacity_rollups"
+
+    container_guid = Column(String(6), primary_key=True)
+    resolution = Column(Enum(*ROLLUP_RESOLUTIONS, name="rollup_resolution"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    samples = Column(Integer, nullable=False)
+    # Suma en lugar de media: permite fusionar lotes sin releer las lecturas
+    sum_capacity = Column(Integer, nullable=False)
+    min_capacity = Column(Integer, nullable=False)
+    max_capacity = Column(Integer, nullable=False)
+    last_capacity = Column(Integer, nullable=False)
+    # Momento de last_capacity: un lote tardío con lecturas más antiguas no la sobrescribe (NULL en filas anteriores)
+    last_recorded_at = Column(DateTime)
+
+class RollupState(Base):
+    # Una fila, bloqueada durante la compactación para que solo un worker agregue a la vez.
+    # last_reading_id es solo informativo (mayor id agregado): lo pendiente se busca por compacted
+    __tablename__ = "capacity_rollup_state"
+
+    id = Column(Integer, primary_key=True)
+    last_reading_id = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, BigInteger, Float
+from config.db import Base
+
+class RoadDistance(Base):
+    # Camino más rápido entre dos nodos del grafo viario; graph_id identifica el extracto OSM con el que se calculó
+    __tablename__ = "road_distances"
+
+    graph_id = Column(String(16), primary_key=True)
+    from_node = Column(BigInteger, primary_key=True, autoincrement=False)
+    to_node = Column(BigInteger, primary_key=True, autoincrement=False)
+    # NULL: no hay camino (se usa haversine)
+    distance_km = Column(Float)
+    duration_min = Column(Float)
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from datetime import datetime, UTC
 from config.db import Base
 
+SIMULATION_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+
 class Simulation(Base):
     __tablename__ = "simulations"
 
@@ -9,5 +12,76 @@ class Simulation(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(UTC))
     total_distance_km = Column(Float, nullable=False)
     duration_min = Column(Float, nullable=False)
-    route = Column(String(1000), nullable=False)
-    distances = Column(String(5000), nullable=False)
+    # Las simulaciones en segundo plano se crean en "queued" y se completan al terminar el job
+    status = Column(Enum(*SIMULATION_STATUSES, name="simulation_status"), nullable=False, default="completed")
+    error = Column(String(1000))
+    # Latido del worker que ejecuta el job: si deja de actualizarse, el worker murió y el job se da por fallido
+    heartbeat_at = Column(DateTime)
+    # Rutas de un plan multi-vehículo: una simulación por camión
+    plan_id = Column(Integer, ForeignKey("simulation_plans.id", ondelete="CASCADE"), index=True)
+    vehicle = Column(Integer)
+    vehicle_load = Column(Integer)
+
+    __table_args__ = (
+        # Historial paginado por (created_at, id) y agregados por día
+        Index("ix_simulations_created_at_id", "created_at", "id"),
+        # Búsqueda periódica de jobs huérfanos (queued/running sin latido reciente)
+        Index("ix_simulations_status_heartbeat_at", "status", "heartbeat_at"),
+    )
+
+    # lazy="raise": con AsyncSession las paradas/tramos se cargan explícitamente (selectinload)
+    stops = relationship(
+        "SimulationStop", order_by="SimulationStop.position", cascade="all, delete-orphan",
+        passive_deletes=True, lazy="raise",
+    )
+    legs = relationship(
+        "SimulationLeg", order_by="SimulationLeg.position", cascade="all, delete-orphan",
+        passive_deletes=True, lazy="raise",
+    )
+
+    @property
+    def route(self):
+        return [stop.container_guid for stop in self.stops]
+
+class SimulationPlan(Base):
+    __tablename__ = "simulation_plans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    method = Column(String(20), nullable=False)
+    vehicles = Column(Integer, nullable=False)
+    total_distance_km = Column(Float, nullable=False)
+    # Duración de la ruta más larga: el plan termina cuando vuelve el último camión
+    makespan_min = Column(Float, nullable=False)
+    # JSON con los contenedores que no cupieron en ningún camión
+    unassigned_guids = Column(Text, nullable=False, default="[]")
+
+    routes = relationship(
+        "Simulation", order_by="Simulation.vehicle", cascade="all, delete-orphan",
+        passive_deletes=True, lazy="raise",
+    )
+
+class SimulationStop(Base):
+    __tablename__ = "simulation_stops"
+
+    simulation_id = Column(Integer, ForeignKey("simulations.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    container_guid = Column(String(6), nullable=False, index=True)
+
+class SimulationLeg(Base):
+    __tablename__ = "simulation_legs"
+
+    simulation_id = Column(Integer, ForeignKey("simulations.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    from_guid = Column(String(6), nullable=False)
+    to_guid = Column(String(6), nullable=False)
+    distance_km = Column(Float, nullable=False)
+
+class SimulationCacheEntry(Base):
+    # Resultado memoizado: huella del conjunto de contenedores -> simulación ya calculada
+    __tablename__ = "simulation_cache"
+
+    fingerprint = Column(String(64), primary_key=True)
+    simulation_id = Column(Integer, ForeignKey("simulations.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,7 +1,9 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Enum, DateTime
+from sqlalchemy import Column, String, Enum, DateTime, Double, Index
+from sqlalchemy.orm import validates
 from config.db import Base
+from utils.geohash import geohash_for, parse_coordinate
 
 def generate_guid():
     return str(uuid.uuid4())
@@ -19,3 +21,16 @@ class User(Base):
     latitude = Column(String(255))
     longitude = Column(String(255))
     created_at = Column(DateTime, default=datetime.utcnow)
+    latitude_deg = Column(Double)
+    longitude_deg = Column(Double)
+    geohash = Column(String(12), index=True)
+
+    __table_args__ = (
+        Index("ix_users_latitude_deg_longitude_deg", "latitude_deg", "longitude_deg"),
+    )
+
+    @validates("latitude", "longitude")
+    def _sync_coordinates(self, key, value):
+        setattr(self, f"{key}_deg", parse_coordinate(value))
+        self.geohash = geohash_for(self.latitude_deg, self.longitude_deg)
+        return value
@@ -1,28 +1,53 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-from config.db import get_db
+from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import get_async_db, AsyncSessionLocal
+from config.settings import SIGNUP_GEOCODING
 from models.user import User
 from schemas.user import UserCreate, UserLogin
-from utils.auth import hash_password
+from utils.auth import hash_password_async
 from sqlalchemy.exc import IntegrityError
-from utils.geolocation import get_coordinates_from_address
-from utils.auth import verify_password
+from utils.geolocation import geocode_address
+from utils.auth import verify_and_update_async
 from utils.jwt import create_access_token
+from dependencies.auth import invalidate_user
 
 auth = APIRouter(tags=["Auth"], prefix="/auth")
 
+async def find_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def fill_user_coordinates(guid: str, address: str):
+    # Alta con SIGNUP_GEOCODING=deferred: las coordenadas se completan después de responder
+    async with AsyncSessionLocal() as db:
+        lat, lng = await geocode_address(db, address)
+        if lat is None:
+            return
+        user = await db.get(User, guid)
+        # Si la dirección cambió entretanto, estas coordenadas ya no le corresponden
+        if user is None or user.address != address:
+            return
+        user.latitude = lat
+        user.longitude = lng
+        await db.commit()
+    invalidate_user(guid)
+
 @auth.post("/signup", response_model=dict, status_code=status.HTTP_201_CREATED)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
     
-    if db.query(User).filter(User.email == user.email).first():
+    if await find_user_by_email(db, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    hashed_pwd = hash_password(user.password)
+    # bcrypt corre en el pool dedicado
+    hashed_pwd = await hash_password_async(user.password)
 
-    lat, lng = get_coordinates_from_address(user.address)
+    lat, lng = (None, None)
+    if SIGNUP_GEOCODING != "deferred":
+        lat, lng = await geocode_address(db, user.address)
 
     new_user = User(
         name=user.name,
@@ -37,12 +62,14 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
 
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error saving user")
 
+    if SIGNUP_GEOCODING == "deferred":
+        background_tasks.add_task(fill_user_coordinates, new_user.guid, user.address)
+
     return {
         "message": "User registered successfully",
         "guid": new_user.guid
@@ -50,15 +77,24 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @auth.post("/signin", response_model=dict, description="User login and token generation")
-def signin(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == credentials.email).first()
+async def signin(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await find_user_by_email(db, credentials.email)
 
-    if not user or not verify_password(credentials.password, user.password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_and_update_async(credentials.password, user.password)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
+    # Hash con otro coste (BCRYPT_ROUNDS cambió): se reemplaza aprovechando la contraseña en claro
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
     token = create_access_token(data={"sub": user.guid, "role": user.role})
 
     return {
@@ -66,4 +102,4 @@ def signin(credentials: UserLogin, db: Session = Depends(get_db)):
         "token_type": "bearer",
         "guid": user.guid,
         "role": user.role
-    }
\ No newline at end of file
+    }
@@ -1,35 +1,197 @@
-import math
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import List
-from models.container import Container
-from schemas.container import ContainerCreate, ContainerUpdate, ContainerResponse, FavoriteUpdate, CapacityUpdate, LimitUpdate
-from config.db import get_db
+import json
+import numpy as np
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from models.container import Container, generate_guid
+from schemas.container import ContainerCreate, ContainerUpdate, ContainerResponse, FavoriteUpdate, CapacityUpdate, LimitUpdate, CapacityBatchItem, BulkResult, AlertThresholdUpdate, CapacityHistoryPoint, ContainerForecast
+from config.db import get_async_db, AsyncSessionLocal
+from config.settings import (
+    BULK_CHUNK_SIZE, STREAM_BATCH_SIZE, CONTAINER_EVENTS_COALESCE_MS, CONTAINER_EVENTS_HEARTBEAT_SECONDS,
+)
+from utils.container_query import container_filters, container_query, parse_fields, parse_bbox, BBOX_DESCRIPTION
+from utils.bulk import read_bulk_items, bulk_request_body, chunked
+from utils.geohash import coordinate_fields
+from utils.cache import container_cache, container_key, status_key
+from utils.distance import haversine_one_to_many, coordinates, bounding_box, schedule_distance_update
+from utils.spatial_index import container_index, warm_container_index
+from utils.container_events import container_events, container_event, event_for, alert_event
+from utils.urgent_index import urgent_index, warm_urgent_index
+from utils.alerts import alert_threshold, alert_transition, check_alert
+from utils.readings import readings, history_query, naive_utc, utc_now
+from utils.forecast import containers_due_within
 
 container = APIRouter(prefix="/containers", tags=["Containers"])
 
-# GET all containers
+CONTAINER_STATUSES = ("active", "inactive")
+# Intentos por fila con GUID nuevo cuando el generado ya existe
+GUID_ATTEMPTS = 3
+# Rango por defecto y máximo de buckets de GET /{guid}/history
+HISTORY_DEFAULT_RANGE = {"hour": timedelta(days=7), "day": timedelta(days=90)}
+HISTORY_BUCKET = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+HISTORY_MAX_BUCKETS = 2000
+
+def invalidate_container(guid: Optional[str], *statuses: str):
+    # Borra la entrada del contenedor y las listas por estado en las que aparece (o aparecía)
+    keys = [container_key(guid)] if guid else []
+    keys += [status_key(s) for s in set(statuses) if s]
+    container_cache.invalidate(*keys)
+
+def publish_change(container: Container, changed, was_urgent: bool, transition: Optional[str] = None):
+    # Tras el commit: índice de urgentes, lectura para el histórico y eventos (cambio + alerta si cruzó el umbral)
+    urgent_index.update(container.guid, container.capacity, container.limit)
+    if "capacity" in changed or "created" in changed:
+        readings.record(container.guid, container.capacity)
+    event = event_for(container, changed, was_urgent)
+    events = [event]
+    if transition:
+        events.append(alert_event(event, transition, alert_threshold(container.alert_threshold, container.limit)))
+    container_events.publish(*events)
+
+# GET all containers (filters, keyset pagination, projection, NDJSON streaming)
 @container.get("/", response_model=List[ContainerResponse], description="Get a list of all containers")
-def get_containers(db: Session = Depends(get_db)):
-    containers = db.query(Container).all()
-    return containers
+async def get_containers(
+    response: Response,
+    filters: dict = Depends(container_filters),
+    cursor: Optional[str] = Query(None, description="Return containers whose guid is greater than this cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the next cursor is sent in X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams every matching row"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    columns = parse_fields(fields)
+    if format == "ndjson":
+        stmt = container_query(filters, columns, after=cursor, limit=limit)
+        return StreamingResponse(stream_containers(stmt), media_type="application/x-ndjson")
+
+    page_size = limit + 1 if limit else None
+    result = await db.execute(container_query(filters, columns, after=cursor, limit=page_size))
+    rows = [dict(row) for row in result.mappings()]
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = rows[-1]["guid"]
+
+    if fields:
+        return JSONResponse(content=rows, headers=dict(response.headers))
+    return rows
+
+async def stream_containers(stmt):
+    # Sesión propia: la del dependency se cierra antes de que termine el streaming
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for partition in result.mappings().partitions():
+            yield "".join(json.dumps(dict(row)) + "\n" for row in partition)
+
+# GET container change events as server-sent events
+@container.get("/events", description="Stream capacity, limit and status changes as server-sent events")
+async def stream_container_events(
+    urgent_only: bool = Query(False, description="Only containers that are or just stopped being urgent"),
+    bbox: Optional[str] = Query(None, description=BBOX_DESCRIPTION),
+):
+    box = parse_bbox(bbox)
+
+    async def events():
+        # Se suscribe al empezar el stream; al desconectarse el cliente se cancela el generador
+        subscription = container_events.subscribe(urgent_only=urgent_only, bbox=box)
+        try:
+            while True:
+                batch = await subscription.next_batch(CONTAINER_EVENTS_HEARTBEAT_SECONDS, CONTAINER_EVENTS_COALESCE_MS / 1000)
+                if batch is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield "".join(f"event: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in batch)
+        finally:
+            container_events.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# WebSocket container change events
+@container.websocket("/ws")
+async def container_events_socket(websocket: WebSocket, urgent_only: bool = False, bbox: Optional[str] = None):
+    try:
+        box = parse_bbox(bbox)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+
+    await websocket.accept()
+    subscription = container_events.subscribe(urgent_only=urgent_only, bbox=box)
+    try:
+        while True:
+            batch = await subscription.next_batch(CONTAINER_EVENTS_HEARTBEAT_SECONDS, CONTAINER_EVENTS_COALESCE_MS / 1000)
+            # send espera al socket: un cliente lento acumula en su buffer coalescido, no en memoria sin límite
+            for event in batch or [{"type": "ping"}]:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        container_events.unsubscribe(subscription)
+
+# GET urgent containers from the incremental index
+@container.get(
+    "/urgent",
+    response_model=List[ContainerResponse],
+    description="Get urgent containers (capacity >= limit), most filled first",
+)
+async def get_urgent_containers(background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    if urgent_index.fresh():
+        guids = urgent_index.guids()
+        if not guids:
+            return []
+        result = await db.execute(select(Container).where(Container.guid.in_(guids)))
+        rows = {c.guid: c for c in result.scalars()}
+        return [rows[g] for g in guids if g in rows]
+
+    # Índice frío o caducado (escrituras de otros workers): consulta completa y recarga en segundo plano
+    background_tasks.add_task(warm_urgent_index)
+    result = await db.execute(
+        select(Container).where(Container.capacity >= Container.limit).order_by(Container.capacity.desc(), Container.guid)
+    )
+    return result.scalars().all()
+
+# GET containers predicted to reach their limit soon
+@container.get(
+    "/forecast",
+    response_model=List[ContainerForecast],
+    description="Containers expected to reach their limit within the given hours, from the hourly fill rate",
+)
+async def get_fill_forecast(
+    within_hours: float = Query(24, ge=0, description="Prediction horizon in hours"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await containers_due_within(db, within_hours)
 
 # GET container by GUID
 @container.get("/{guid}", response_model=ContainerResponse, description="Get a container by GUID")
-def get_container(guid: str, db: Session = Depends(get_db)):
-    container = db.query(Container).filter(Container.guid == guid).first()
+async def get_container(guid: str, db: AsyncSession = Depends(get_async_db)):
+    cached = container_cache.get(container_key(guid))
+    if cached is not None:
+        return cached
+
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
-    return container
+    data = ContainerResponse.model_validate(container, from_attributes=True).model_dump()
+    container_cache.set(container_key(guid), data)
+    return data
 
 # GET containers by status
 @container.get("/status/{status}", response_model=List[ContainerResponse], description="Get containers by status")
-def get_containers_by_status(status: str, db: Session = Depends(get_db)):
-    if status not in ["active", "inactive"]:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Status must be 'active' or 'inactive'")
-    containers = db.query(Container).filter(Container.status == status).all()
-    return containers
+async def get_containers_by_status(status: str, db: AsyncSession = Depends(get_async_db)):
+    if status not in CONTAINER_STATUSES:
+        raise HTTPException(status_code=400, detail="Status must be 'active' or 'inactive'")
+    cached = container_cache.get(status_key(status))
+    if cached is not None:
+        return cached
+
+    result = await db.execute(container_query({"status": status}))
+    data = [ContainerResponse.model_validate(c, from_attributes=True).model_dump() for c in result.scalars()]
+    container_cache.set(status_key(status), data)
+    return data
 
 # GET containers nearby by guid
 @container.get(
@@ -37,129 +199,357 @@ def get_containers_by_status(status: str, db: Session = Depends(get_db)):
     response_model=List[ContainerResponse],
     description="Get nearby containers relative to a specific container by GUID",
 )
-def get_nearby_containers_by_guid(guid: str, db: Session = Depends(get_db)):
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371
-        phi1 = math.radians(float(lat1))
-        phi2 = math.radians(float(lat2))
-        d_phi = math.radians(float(lat2) - float(lat1))
-        d_lambda = math.radians(float(lon2) - float(lon1))
-        a = math.sin(d_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
-
+async def get_nearby_containers_by_guid(
+    guid: str,
+    background_tasks: BackgroundTasks,
+    radius_km: float = Query(5, gt=0, description="Search radius in kilometers"),
+    k: Optional[int] = Query(None, ge=1, description="Return only the k nearest containers"),
+    db: AsyncSession = Depends(get_async_db),
+):
     # Buscar contenedor base
-    ref = db.query(Container).filter(Container.guid == guid).first()
+    ref = await db.get(Container, guid)
     if not ref or not ref.latitude or not ref.longitude:
         raise HTTPException(status_code=404, detail="Reference container not found or missing coordinates")
 
-    # Buscar todos los contenedores cercanos (excepto él mismo)
-    all_containers = db.query(Container).filter(Container.guid != guid).all()
-    nearby = []
+    if container_index.fresh():
+        if k:
+            hits = container_index.nearest(ref.latitude, ref.longitude, k, max_km=radius_km, exclude=guid)
+        else:
+            hits = container_index.within(ref.latitude, ref.longitude, radius_km, exclude=guid)
+        if not hits:
+            return []
+        result = await db.execute(select(Container).where(Container.guid.in_([g for g, _ in hits])))
+        rows = {c.guid: c for c in result.scalars()}
+        return [rows[g] for g, _ in hits if g in rows]
 
-    for c in all_containers:
-        if c.latitude and c.longitude:
-            distance = haversine(ref.latitude, ref.longitude, c.latitude, c.longitude)
-            if distance <= 5:
-                nearby.append((distance, c))
+    # Índice frío o caducado (escrituras de otros workers): prefiltro por bounding box en SQL y recarga en segundo plano
+    background_tasks.add_task(warm_container_index)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(ref.latitude, ref.longitude, radius_km)
+    result = await db.execute(select(Container).where(
+        Container.guid != guid,
+        Container.latitude_deg.between(min_lat, max_lat),
+        Container.longitude_deg.between(min_lon, max_lon),
+    ))
+    candidates = result.scalars().all()
+    if not candidates:
+        return []
 
-    nearby_sorted = sorted(nearby, key=lambda x: x[0])
-    return [c for _, c in nearby_sorted]
+    distances = haversine_one_to_many(ref.latitude, ref.longitude, *coordinates(candidates))
+    nearby = np.flatnonzero(distances <= radius_km)
+    nearby_sorted = nearby[np.argsort(distances[nearby], kind="stable")]
+    return [candidates[i] for i in nearby_sorted[:k]]
 
 
 # POST create container
 @container.post("/", response_model=dict, status_code=status.HTTP_201_CREATED, description="Create a new container")
-def create_container(payload: ContainerCreate, db: Session = Depends(get_db)):
+async def create_container(payload: ContainerCreate, db: AsyncSession = Depends(get_async_db)):
     new_container = Container(**payload.dict())
+    transition = check_alert(new_container)
     db.add(new_container)
-    db.commit()
-    db.refresh(new_container)
+    await db.commit()
+    await db.refresh(new_container)
+    container_index.upsert(new_container.guid, new_container.latitude, new_container.longitude)
+    schedule_distance_update(new_container.latitude, new_container.longitude)
+    invalidate_container(None, new_container.status)
+    publish_change(new_container, ["created"], False, transition)
     return {"message": "Container created successfully", "guid": new_container.guid}
 
+async def insert_with_fresh_guid(db: AsyncSession, row: dict) -> Optional[str]:
+    # Reintento fila a fila: el GUID lo genera el servidor, así que una colisión se resuelve con otro GUID
+    # y solo se informa al cliente de lo que falla por sus propios campos (-> nombre del error o None)
+    for _ in range(GUID_ATTEMPTS):
+        row["guid"] = generate_guid()
+        try:
+            await db.execute(insert(Container), [row])
+            await db.commit()
+            return None
+        except IntegrityError as e:
+            await db.rollback()
+            taken = await db.scalar(select(Container.guid).where(Container.guid == row["guid"]))
+            if taken is None:
+                return type(e).__name__
+        except SQLAlchemyError as e:
+            await db.rollback()
+            return type(e).__name__
+    return "GUID collision"
+
+# POST bulk create containers (JSON array or NDJSON)
+@container.post(
+    "/bulk",
+    response_model=BulkResult,
+    description="Create many containers from a JSON array or an NDJSON stream",
+    openapi_extra=bulk_request_body(ContainerCreate),
+)
+async def create_containers_bulk(request: Request, db: AsyncSession = Depends(get_async_db)):
+    valid, failed = await read_bulk_items(request, ContainerCreate)
+    succeeded = []
+
+    rows = [
+        (index, {
+            "guid": generate_guid(),
+            **item.dict(),
+            **coordinate_fields(item.latitude, item.longitude),
+            "alert_active": item.capacity >= alert_threshold(item.alert_threshold, item.limit),
+        })
+        for index, item in valid
+    ]
+    for chunk in chunked(rows, BULK_CHUNK_SIZE):
+        try:
+            await db.execute(insert(Container), [row for _, row in chunk])
+            await db.commit()
+            done = chunk
+        except SQLAlchemyError:
+            # Reintenta fila a fila para aislar las que fallan (p. ej. GUID duplicado)
+            await db.rollback()
+            done = []
+            for index, row in chunk:
+                error = await insert_with_fresh_guid(db, row)
+                if error is None:
+                    done.append((index, row))
+                else:
+                    failed.append({"index": index, "guid": None, "error": error})
+
+        if done:
+            invalidate_container(None, *CONTAINER_STATUSES)
+        for _, row in done:
+            # Copia sin sesión: el INSERT masivo no devuelve objetos y publish_change los necesita
+            created = Container(status="active", **row)
+            container_index.upsert(created.guid, created.latitude, created.longitude)
+            schedule_distance_update(created.latitude, created.longitude)
+            publish_change(created, ["created"], False, "fired" if created.alert_active else None)
+            succeeded.append(created.guid)
+
+    return {"succeeded": succeeded, "failed": sorted(failed, key=lambda f: f["index"])}
+
+# PATCH batch capacity telemetry (JSON array or NDJSON)
+@container.patch(
+    "/capacity:batch",
+    response_model=BulkResult,
+    description="Update the capacity of many containers from a JSON array or an NDJSON stream",
+    openapi_extra=bulk_request_body(CapacityBatchItem),
+)
+async def update_capacity_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    valid, failed = await read_bulk_items(request, CapacityBatchItem)
+    succeeded = []
+
+    # Si un GUID aparece varias veces en el lote gana la última lectura
+    latest = {}
+    for index, item in valid:
+        if item.capacity < 0:
+            failed.append({"index": index, "guid": item.guid, "error": "Capacity must be non-negative"})
+        else:
+            latest[item.guid] = (index, item.capacity)
+
+    for chunk in chunked(list(latest.items()), BULK_CHUNK_SIZE):
+        result = await db.execute(
+            select(
+                Container.guid, Container.limit, Container.status, Container.latitude_deg, Container.longitude_deg,
+                Container.capacity, Container.alert_threshold, Container.alert_active,
+            ).where(Container.guid.in_([guid for guid, _ in chunk]))
+        )
+        existing = {row.guid: row for row in result}
+        params = []
+        transitions = {}
+        for guid, (index, capacity) in chunk:
+            if guid in existing:
+                row = existing[guid]
+                transitions[guid] = alert_transition(capacity, alert_threshold(row.alert_threshold, row.limit), row.alert_active)
+                active = row.alert_active if transitions[guid] is None else transitions[guid] == "fired"
+                params.append({"guid": guid, "capacity": capacity, "alert_active": bool(active)})
+            else:
+                failed.append({"index": index, "guid": guid, "error": "Container not found"})
+        if not params:
+            continue
+        try:
+            await db.execute(update(Container), params)
+            await db.commit()
+            succeeded.extend(p["guid"] for p in params)
+            container_cache.invalidate(*(container_key(p["guid"]) for p in params), *map(status_key, CONTAINER_STATUSES))
+            events = []
+            for p in params:
+                row = existing[p["guid"]]
+                urgent_index.update(row.guid, p["capacity"], row.limit)
+                readings.record(row.guid, p["capacity"])
+                event = container_event(
+                    row.guid, p["capacity"], row.limit, row.status, row.latitude_deg, row.longitude_deg,
+                    ["capacity"], row.capacity >= row.limit,
+                )
+                events.append(event)
+                if transitions[row.guid]:
+                    events.append(alert_event(event, transitions[row.guid], alert_threshold(row.alert_threshold, row.limit)))
+            container_events.publish(*events)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            failed.extend({"index": latest[p["guid"]][0], "guid": p["guid"], "error": type(e).__name__} for p in params)
+
+    return {"succeeded": succeeded, "failed": sorted(failed, key=lambda f: f["index"])}
+
+# GET capacity history from the hourly/daily rollups
+@container.get("/{guid}/history", response_model=List[CapacityHistoryPoint], description="Capacity history of a container")
+async def get_capacity_history(
+    guid: str,
+    resolution: Literal["hour", "day"] = Query("hour"),
+    start: Optional[datetime] = Query(None, description="Range start (default: 7 days for hour, 90 for day)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (default: now)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not await db.get(Container, guid):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
+
+    end = naive_utc(end) if end else utc_now()
+    start = naive_utc(start) if start else end - HISTORY_DEFAULT_RANGE[resolution]
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    if (end - start) / HISTORY_BUCKET[resolution] > HISTORY_MAX_BUCKETS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Range exceeds {HISTORY_MAX_BUCKETS} {resolution} buckets")
+
+    # Se incluye el bucket que contiene start
+    bucket_floor = start.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        bucket_floor = bucket_floor.replace(hour=0)
+    result = await db.execute(history_query(guid, resolution, bucket_floor, end))
+    return [
+        CapacityHistoryPoint(
+            bucket_start=r.bucket_start,
+            samples=r.samples,
+            avg_capacity=round(r.sum_capacity / r.samples, 2),
+            min_capacity=r.min_capacity,
+            max_capacity=r.max_capacity,
+            last_capacity=r.last_capacity,
+        ) for r in result.scalars()
+    ]
+
 # POST simulate sending capacity alert
 @container.post("/{guid}/alert", response_model=dict, description="Send capacity alert for a container")
-def send_capacity_alert(guid: str, db: Session = Depends(get_db)):
-    container = db.query(Container).filter(Container.guid == guid).first()
+async def send_capacity_alert(guid: str, db: AsyncSession = Depends(get_async_db)):
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
 
-    if container.capacity > 90:
-        return {"message": f"ALERT: Container {guid} is over 90% capacity!"}
+    # Mismo estado que el motor de alertas: activa desde que cruza el umbral hasta que baja de umbral - histéresis
+    threshold = alert_threshold(container.alert_threshold, container.limit)
+    if container.alert_active:
+        return {"message": f"ALERT: Container {guid} is at {container.capacity}% capacity (threshold {threshold}%)!"}
     else:
         return {"message": f"Container {guid} is within normal capacity."}
+
+# PUT update alert threshold
+@container.put("/{guid}/alert-threshold", response_model=dict, description="Set the capacity alert threshold (null: use limit)")
+async def update_alert_threshold(guid: str, payload: AlertThresholdUpdate, db: AsyncSession = Depends(get_async_db)):
+    container = await db.get(Container, guid)
+    if not container:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
+
+    if payload.alert_threshold is not None and payload.alert_threshold < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Alert threshold must be non-negative")
+
+    container.alert_threshold = payload.alert_threshold
+    transition = check_alert(container)
+    await db.commit()
+    invalidate_container(guid, container.status)
+    if transition:
+        publish_change(container, ["alert_threshold"], container.capacity >= container.limit, transition)
+    threshold = alert_threshold(container.alert_threshold, container.limit)
+    return {"message": f"Container alert threshold set to {threshold}"}
     
 # PUT update container by GUID
 @container.put("/{guid}", response_model=dict, description="Update a container by GUID")
-def update_container(guid: str, payload: ContainerUpdate, db: Session = Depends(get_db)):
-    container = db.query(Container).filter(Container.guid == guid).first()
+async def update_container(guid: str, payload: ContainerUpdate, db: AsyncSession = Depends(get_async_db)):
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
 
-    for key, value in payload.dict(exclude_unset=True).items():
+    data = payload.dict(exclude_unset=True)
+    old_status = container.status
+    was_urgent = container.capacity >= container.limit
+    for key, value in data.items():
         setattr(container, key, value)
+    transition = check_alert(container)
 
-    db.commit()
+    await db.commit()
+    invalidate_container(guid, old_status, container.status)
+    if "latitude" in data or "longitude" in data:
+        container_index.upsert(guid, container.latitude, container.longitude)
+        schedule_distance_update(container.latitude, container.longitude)
+    changed = {"capacity", "limit", "status", "alert_threshold"} & set(data)
+    if changed or transition:
+        publish_change(container, changed, was_urgent, transition)
     return {"message": "Container updated successfully"}
 
 # PUT update container status only
 @container.put("/{guid}/status", response_model=dict, description="Update container status")
-def update_container_status(guid: str, new_status: str, db: Session = Depends(get_db)):
-    if new_status not in ["active", "inactive"]:
+async def update_container_status(guid: str, new_status: str, db: AsyncSession = Depends(get_async_db)):
+    if new_status not in CONTAINER_STATUSES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Status must be 'active' or 'inactive'")
 
-    container = db.query(Container).filter(Container.guid == guid).first()
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
 
+    old_status = container.status
     container.status = new_status
-    db.commit()
+    await db.commit()
+    invalidate_container(guid, old_status, new_status)
+    publish_change(container, ["status"], container.capacity >= container.limit)
     return {"message": f"Container status is now '{new_status}'"}
 
 # PUT update isFavorite
 @container.put("/{guid}/favorite", response_model=dict, description="Update isFavorite status")
-def update_favorite_status(guid: str, payload: FavoriteUpdate, db: Session = Depends(get_db)):
-    container = db.query(Container).filter(Container.guid == guid).first()
+async def update_favorite_status(guid: str, payload: FavoriteUpdate, db: AsyncSession = Depends(get_async_db)):
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
 
     container.isFavorite = payload.isFavorite
-    db.commit()
+    await db.commit()
+    invalidate_container(guid, container.status)
     return {"message": f"Container marked as {'favorite' if payload.isFavorite else 'not favorite'}"}
 
 # PUT update capacity
 @container.put("/{guid}/capacity", response_model=dict, description="Update container capacity")
-def update_capacity(guid: str, payload: CapacityUpdate, db: Session = Depends(get_db)):
-    container = db.query(Container).filter(Container.guid == guid).first()
+async def update_capacity(guid: str, payload: CapacityUpdate, db: AsyncSession = Depends(get_async_db)):
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
 
     if payload.capacity < 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Capacity must be non-negative")
 
+    was_urgent = container.capacity >= container.limit
     container.capacity = payload.capacity
-    db.commit()
+    transition = check_alert(container)
+    await db.commit()
+    invalidate_container(guid, container.status)
+    publish_change(container, ["capacity"], was_urgent, transition)
     return {"message": f"Container capacity updated to {payload.capacity}"}
 
 # PUT update limit
 @container.put("/{guid}/limit", response_model=dict, description="Update container limit")
-def update_limit(guid: str, payload: LimitUpdate, db: Session = Depends(get_db)):
-    container = db.query(Container).filter(Container.guid == guid).first()
+async def update_limit(guid: str, payload: LimitUpdate, db: AsyncSession = Depends(get_async_db)):
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
 
     if payload.limit < 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Limit must be non-negative")
 
+    was_urgent = container.capacity >= container.limit
     container.limit = payload.limit
-    db.commit()
+    transition = check_alert(container)
+    await db.commit()
+    invalidate_container(guid, container.status)
+    publish_change(container, ["limit"], was_urgent, transition)
     return {"message": f"Container limit updated to {payload.limit}"}
 
 # DELETE container by GUID
 @container.delete("/{guid}", status_code=status.HTTP_204_NO_CONTENT, description="Delete a container by GUID")
-def delete_container(guid: str, db: Session = Depends(get_db)):
-    container = db.query(Container).filter(Container.guid == guid).first()
+async def delete_container(guid: str, db: AsyncSession = Depends(get_async_db)):
+    container = await db.get(Container, guid)
     if not container:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Container not found")
-    db.delete(container)
-    db.commit()
+    await db.delete(container)
+    await db.commit()
+    container_index.remove(guid)
+    urgent_index.remove(guid)
+    invalidate_container(guid, container.status)
     return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content={"message": "Container deleted successfully"})
@@ -1,70 +1,319 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from config.db import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import get_async_db, AsyncSessionLocal
 from models.container import Container
-from models.simulation import Simulation
-from schemas.simulation import SimulationCreate, SimulationResponse
-from utils.routes_openai import call_openai_for_simulation
-from dependencies.auth import get_current_user
-from models.user import User
-from typing import List
+from models.simulation import Simulation, SimulationPlan
+from schemas.simulation import (
+    ContainerSelection, SimulationCreate, SimulationResponse, SimulationJobResponse, SimulationLeg, SimulationSummary,
+    SimulationDayStats, FleetPlanCreate, FleetPlanResponse, VehicleRoute,
+)
+from utils.simulation import (
+    run_simulation_engine, parse_legs, simulation_rows, simulation_query, load_simulation, load_plan,
+    history_query, encode_cursor, decode_cursor, aware_utc,
+)
+from utils.fleet import plan_fleet
+from utils.simulation_jobs import simulation_jobs, JobQueueFull, TERMINAL_STATUSES
+from utils import simulation_cache
+from utils.urgent_index import current_urgent_guids
+from utils.forecast import containers_due_within
+from typing import List, Optional
+from datetime import datetime
 import json
 
 simulation = APIRouter(tags=["Simulations"], prefix="/simulation")
 
+SSE_POLL_SECONDS = 1.0
+
+async def requested_guids(db: AsyncSession, payload: ContainerSelection) -> List[str]:
+    guids = list(payload.container_guids)
+    extra = []
+    if payload.include_urgent:
+        extra += await current_urgent_guids(db)
+    if payload.include_due_within_hours is not None:
+        extra += [f["guid"] for f in await containers_due_within(db, payload.include_due_within_hours)]
+    requested = set(guids)
+    for guid in extra:
+        if guid not in requested:
+            requested.add(guid)
+            guids.append(guid)
+    return guids
+
+def to_simulation_response(sim: Simulation, include_legs: bool = True) -> SimulationResponse:
+    return SimulationResponse(
+        id=sim.id,
+        created_at=aware_utc(sim.created_at),
+        total_distance_km=sim.total_distance_km,
+        duration_min=sim.duration_min,
+        route=sim.route,
+        distances=[SimulationLeg.model_validate(leg) for leg in sim.legs] if include_legs else None
+    )
+
+def to_job_response(sim: Simulation) -> SimulationJobResponse:
+    return SimulationJobResponse(
+        id=sim.id,
+        status=sim.status,
+        created_at=aware_utc(sim.created_at),
+        error=sim.error,
+        result=to_simulation_response(sim) if sim.status == "completed" else None,
+    )
+
+def to_plan_response(plan: SimulationPlan, routes: List[VehicleRoute]) -> FleetPlanResponse:
+    return FleetPlanResponse(
+        id=plan.id,
+        created_at=aware_utc(plan.created_at),
+        method=plan.method,
+        vehicles=plan.vehicles,
+        total_distance_km=plan.total_distance_km,
+        makespan_min=plan.makespan_min,
+        routes=routes,
+        unassigned=json.loads(plan.unassigned_guids),
+    )
+
+def history_filters(
+    created_from: Optional[datetime] = Query(None, description="Only simulations created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only simulations created before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+) -> dict:
+    try:
+        decoded = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return {"created_from": created_from, "created_to": created_to, "cursor": decoded}
+
+def paginate(rows: list, limit: int, response: Response) -> list:
+    # Se pide limit + 1 filas: si sobra una, hay página siguiente
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
+
 @simulation.get("/get-all-simulations", response_model=List[SimulationResponse])
-def get_all_simulations(db: Session = Depends(get_db)):
-    simulations = db.query(Simulation).order_by(Simulation.created_at.desc()).all()
-
-    # Convertir string JSON de rutas a lista real
-    result = []
-    for sim in simulations:
-        result.append(
-            SimulationResponse(
-                id=sim.id,
-                created_at=sim.created_at,
-                total_distance_km=sim.total_distance_km,
-                duration_min=sim.duration_min,
-                route=json.loads(sim.route),
-                distances=sim.distances
-            )
-        )
+async def get_all_simulations(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    include_legs: bool = Query(False, description="Load the per-leg distances of each simulation"),
+    filters: dict = Depends(history_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    result = await db.execute(history_query(simulation_query(include_legs), **filters).limit(limit + 1))
+    simulations = paginate(result.scalars().all(), limit, response)
+    return [to_simulation_response(sim, include_legs) for sim in simulations]
 
-    return result
+# GET simulation history without route/legs payloads
+@simulation.get("/history", response_model=List[SimulationSummary])
+async def get_simulation_history(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    filters: dict = Depends(history_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(Simulation.id, Simulation.created_at, Simulation.total_distance_km, Simulation.duration_min)
+    result = await db.execute(history_query(stmt, **filters).limit(limit + 1))
+    return [
+        SimulationSummary(**{**row._mapping, "created_at": aware_utc(row.created_at)})
+        for row in paginate(result.all(), limit, response)
+    ]
+
+# GET per-day aggregates computed in SQL
+@simulation.get("/stats", response_model=List[SimulationDayStats])
+async def get_simulation_stats(
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    day = func.date(Simulation.created_at)
+    stmt = select(
+        day.label("day"),
+        func.count(Simulation.id).label("count"),
+        func.avg(Simulation.total_distance_km).label("avg_distance_km"),
+        func.avg(Simulation.duration_min).label("avg_duration_min"),
+    )
+    stmt = history_query(stmt, created_from, created_to).group_by(day).order_by(None).order_by(day.desc())
+    result = await db.execute(stmt)
+    return [SimulationDayStats(**row._mapping) for row in result]
 
 @simulation.post("/generate-simulation", response_model=SimulationResponse, status_code=status.HTTP_201_CREATED)
-def generate_simulation(
+async def generate_simulation(
     payload: SimulationCreate,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     # if current_user.role != "worker":
     #     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only workers can generate simulations")
 
-    containers = db.query(Container).filter(Container.guid.in_(payload.container_guids)).all()
+    result = await db.execute(select(Container).where(Container.guid.in_(await requested_guids(db, payload))))
+    containers = result.scalars().all()
 
     if not containers:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No valid containers found")
 
-    # Generar ruta óptima
-    route_guids, distances_json, total_distance_km, duration_min = call_openai_for_simulation(containers)
+    # Mismo conjunto y mismo estado de llenado: devolver la simulación ya calculada
+    cache_key = simulation_cache.fingerprint(containers, payload.engine)
+    if not payload.force:
+        cached = await simulation_cache.lookup(db, cache_key)
+        if cached is not None:
+            response.status_code = status.HTTP_200_OK
+            response.headers["X-Simulation-Cache"] = "hit"
+            return to_simulation_response(cached)
+    response.headers["X-Simulation-Cache"] = "miss"
 
-    # Guardar simulación
+    # Generar ruta óptima (optimizador local en un hilo o llamada async al LLM)
+    route_guids, distances_json, total_distance_km, duration_min = await run_simulation_engine(
+        containers, payload.engine
+    )
+
+    # Guardar simulación con sus paradas y tramos
+    legs = parse_legs(distances_json)
     simulation_entry = Simulation(
         total_distance_km=total_distance_km,
         duration_min=duration_min,
-        route=json.dumps(route_guids),
-        distances=distances_json
     )
 
     db.add(simulation_entry)
-    db.commit()
-    db.refresh(simulation_entry)
+    await db.flush()
+    db.add_all(simulation_rows(simulation_entry.id, route_guids, legs))
+    await db.commit()
+    await simulation_cache.store(db, cache_key, simulation_entry)
 
     return SimulationResponse(
         id=simulation_entry.id,
-        created_at=simulation_entry.created_at,
+        created_at=aware_utc(simulation_entry.created_at),
         total_distance_km=simulation_entry.total_distance_km,
         duration_min=simulation_entry.duration_min,
         route=route_guids,
-        distances=distances_json
+        distances=legs
+    )
+
+# POST multi-vehicle plan: one linked simulation per truck
+@simulation.post("/plans", response_model=FleetPlanResponse, status_code=status.HTTP_201_CREATED)
+async def create_fleet_plan(payload: FleetPlanCreate, db: AsyncSession = Depends(get_async_db)):
+    if payload.vehicle_capacities is not None and len(payload.vehicle_capacities) != payload.vehicles:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="vehicle_capacities must have one entry per vehicle"
+        )
+
+    result = await db.execute(select(Container).where(Container.guid.in_(await requested_guids(db, payload))))
+    containers = result.scalars().all()
+    if not containers:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No valid containers found")
+
+    # Agrupar por camión y optimizar cada grupo (pool de procesos) fuera del event loop
+    routes, unassigned = await run_in_threadpool(
+        plan_fleet, containers, payload.vehicles, payload.vehicle_capacities, payload.method
     )
+
+    plan = SimulationPlan(
+        method=payload.method,
+        vehicles=payload.vehicles,
+        total_distance_km=round(sum(r["total_distance_km"] for r in routes), 2),
+        makespan_min=max((r["duration_min"] for r in routes), default=0.0),
+        unassigned_guids=json.dumps(unassigned),
+    )
+    db.add(plan)
+    await db.flush()
+
+    simulations = [
+        Simulation(
+            plan_id=plan.id,
+            vehicle=r["vehicle"],
+            vehicle_load=r["load"],
+            total_distance_km=r["total_distance_km"],
+            duration_min=r["duration_min"],
+        ) for r in routes
+    ]
+    db.add_all(simulations)
+    await db.flush()
+    for sim, r in zip(simulations, routes):
+        db.add_all(simulation_rows(sim.id, r["route"], r["legs"]))
+    await db.commit()
+
+    return to_plan_response(plan, [
+        VehicleRoute(
+            vehicle=r["vehicle"],
+            load=r["load"],
+            simulation=SimulationResponse(
+                id=sim.id,
+                created_at=aware_utc(sim.created_at),
+                total_distance_km=sim.total_distance_km,
+                duration_min=sim.duration_min,
+                route=r["route"],
+                distances=r["legs"],
+            ),
+        ) for sim, r in zip(simulations, routes)
+    ])
+
+# GET multi-vehicle plan with its per-truck routes
+@simulation.get("/plans/{plan_id}", response_model=FleetPlanResponse)
+async def get_fleet_plan(plan_id: int, db: AsyncSession = Depends(get_async_db)):
+    plan = await load_plan(db, plan_id)
+    if not plan:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Simulation plan not found")
+    return to_plan_response(plan, [
+        VehicleRoute(vehicle=sim.vehicle, load=sim.vehicle_load, simulation=to_simulation_response(sim))
+        for sim in plan.routes
+    ])
+
+# POST enqueue simulation job (returns immediately)
+@simulation.post("/jobs", response_model=SimulationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_simulation_job(payload: SimulationCreate, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(Container.guid).where(Container.guid.in_(await requested_guids(db, payload))))
+    guids = result.scalars().all()
+    if not guids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No valid containers found")
+
+    try:
+        job = await simulation_jobs.submit(guids, payload.engine)
+    except JobQueueFull:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many pending simulation jobs")
+    return to_job_response(job)
+
+# GET simulation job status / result
+@simulation.get("/jobs/{job_id}", response_model=SimulationJobResponse)
+async def get_simulation_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await load_simulation(db, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Simulation job not found")
+    return to_job_response(job)
+
+# GET simulation job updates as server-sent events
+@simulation.get("/jobs/{job_id}/events")
+async def stream_simulation_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await db.get(Simulation, job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Simulation job not found")
+
+    async def events():
+        last_status = None
+        while True:
+            async with AsyncSessionLocal() as session:
+                job = await load_simulation(session, job_id)
+            if job is None:
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield f"event: {job.status}\ndata: {to_job_response(job).model_dump_json(by_alias=True)}\n\n"
+            if job.status in TERMINAL_STATUSES:
+                return
+            await simulation_jobs.wait_for_change(job_id, SSE_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# DELETE cancel simulation job
+@simulation.delete("/jobs/{job_id}", response_model=SimulationJobResponse)
+async def cancel_simulation_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(Simulation, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Simulation job not found")
+    # Un job de otro worker sin latido reciente quedó huérfano: se marca como fallido en vez de responder 409 siempre
+    if job.status not in TERMINAL_STATUSES and not simulation_jobs.is_local(job_id):
+        if job_id in await simulation_jobs.recover_stale():
+            await db.refresh(job)
+    if job.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Simulation job is already {job.status}")
+    if not simulation_jobs.cancel(job_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Simulation job is running on another worker")
+
+    await simulation_jobs.wait_for_change(job_id, SSE_POLL_SECONDS)
+    return to_job_response(await load_simulation(db, job_id))
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from config.db import get_db
-from schemas.user import UserResponse, UserUpdate
+from schemas.user import UserResponse, UserUpdate, CurrentUser
 from models.user import User
-from dependencies.auth import get_current_user
+from dependencies.auth import get_current_user, invalidate_user
 
 user = APIRouter(tags=["Users"], prefix="/user")
 
+def load_current_user(db: Session, current_user: CurrentUser) -> User:
+    # get_current_user devuelve un snapshot; para modificar hace falta la fila
+    user = db.query(User).filter(User.guid == current_user.guid).first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return user
+
 @user.get("/{guid}", response_model=UserResponse)
 def get_user_by_guid(guid: str, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.guid == guid).first()
@@ -16,16 +23,22 @@ def get_user_by_guid(guid: str, db: Session = Depends(get_db)):
 
 # UPDATE current user (token-based)
 @user.put("/", response_model=dict)
-def update_user(data: UserUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    for key, value in data.dict(exclude_unset=True).items():
-        setattr(current_user, key, value)
+def update_user(data: UserUpdate, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    user = load_current_user(db, current_user)
+    changes = data.dict(exclude_unset=True)
+    role_changed = "role" in changes and changes["role"] != user.role
+    for key, value in changes.items():
+        setattr(user, key, value)
 
     db.commit()
+    invalidate_user(user.guid, claims_changed=role_changed)
     return {"message": "User updated successfully"}
 
 # DELETE current user (token-based)
 @user.delete("/", response_model=dict)
-def delete_user(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db.delete(current_user)
+def delete_user(db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    user = load_current_user(db, current_user)
+    db.delete(user)
     db.commit()
-    return {"message": "User deleted successfully"}
\ No newline at end of file
+    invalidate_user(user.guid, claims_changed=True)
+    return {"message": "User deleted successfully"}
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional, Literal
+from typing import List, Optional, Literal
+from datetime import datetime
 
 class ContainerCreate(BaseModel):
     name: str
@@ -7,6 +8,7 @@ class ContainerCreate(BaseModel):
     longitude: str
     capacity: int
     limit: int
+    alert_threshold: Optional[int] = None
 
 class ContainerUpdate(BaseModel):
     name: Optional[str] = None
@@ -16,6 +18,7 @@ class ContainerUpdate(BaseModel):
     status: Optional[Literal["active", "inactive"]] = None
     isFavorite: Optional[bool] = None
     limit: Optional[int] = None
+    alert_threshold: Optional[int] = None
 
 class ContainerResponse(BaseModel):
     guid: str
@@ -26,6 +29,8 @@ class ContainerResponse(BaseModel):
     status: str
     isFavorite: bool
     limit: int
+    alert_threshold: Optional[int] = None
+    alert_active: Optional[bool] = None
 
 class FavoriteUpdate(BaseModel):
     isFavorite: bool
@@ -53,3 +58,35 @@ class LimitUpdate(BaseModel):
 
     class Config:
         orm_mode = True
+
+class AlertThresholdUpdate(BaseModel):
+    # None vuelve al umbral por defecto (limit)
+    alert_threshold: Optional[int] = None
+
+class CapacityBatchItem(BaseModel):
+    guid: str
+    capacity: int
+
+class BulkItemError(BaseModel):
+    index: int
+    guid: Optional[str] = None
+    error: str
+
+class BulkResult(BaseModel):
+    succeeded: List[str]
+    failed: List[BulkItemError]
+
+class CapacityHistoryPoint(BaseModel):
+    bucket_start: datetime
+    samples: int
+    avg_capacity: float
+    min_capacity: int
+    max_capacity: int
+    last_capacity: int
+
+class ContainerForecast(BaseModel):
+    guid: str
+    capacity: int
+    limit: int
+    fill_rate_per_hour: Optional[float] = None
+    hours_to_limit: Optional[float] = None
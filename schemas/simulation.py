@@ -1,9 +1,26 @@
-from pydantic import BaseModel
-from typing import List
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional, Literal
+from datetime import date, datetime
 
-class SimulationCreate(BaseModel):
-    container_guids: List[str]
+class ContainerSelection(BaseModel):
+    container_guids: List[str] = []
+    # Añade los contenedores urgentes actuales (índice incremental) a container_guids
+    include_urgent: bool = False
+    # Añade también los que se prevé que alcancen su límite en estas horas (p. ej. antes de que llegue el camión)
+    include_due_within_hours: Optional[float] = None
+
+class SimulationCreate(ContainerSelection):
+    engine: Optional[Literal["local", "openai"]] = None
+    force: bool = False
+
+class SimulationLeg(BaseModel):
+    from_guid: str = Field(alias="from")
+    to_guid: str = Field(alias="to")
+    distance_km: float
+
+    class Config:
+        populate_by_name = True
+        from_attributes = True
 
 class SimulationResponse(BaseModel):
     id: int
@@ -11,7 +28,47 @@ class SimulationResponse(BaseModel):
     total_distance_km: float
     duration_min: float
     route: List[str]
-    distances: str
+    distances: Optional[List[SimulationLeg]] = None
 
     class Config:
         orm_mode = True
+
+class SimulationJobResponse(BaseModel):
+    id: int
+    status: str
+    created_at: datetime
+    error: Optional[str] = None
+    result: Optional[SimulationResponse] = None
+
+class SimulationSummary(BaseModel):
+    id: int
+    created_at: datetime
+    total_distance_km: float
+    duration_min: float
+
+class SimulationDayStats(BaseModel):
+    day: date
+    count: int
+    avg_distance_km: float
+    avg_duration_min: float
+
+class FleetPlanCreate(ContainerSelection):
+    vehicles: int = Field(1, ge=1, le=100)
+    # Carga máxima por camión (suma del llenado de sus contenedores), una por vehículo; sin ella no hay límite
+    vehicle_capacities: Optional[List[int]] = None
+    method: Literal["kmeans", "sweep"] = "kmeans"
+
+class VehicleRoute(BaseModel):
+    vehicle: int
+    load: int
+    simulation: SimulationResponse
+
+class FleetPlanResponse(BaseModel):
+    id: int
+    created_at: datetime
+    method: str
+    vehicles: int
+    total_distance_km: float
+    makespan_min: float
+    routes: List[VehicleRoute]
+    unassigned: List[str]
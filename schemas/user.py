@@ -33,3 +33,8 @@ class UserUpdate(BaseModel):
     phone: Optional[str]
     role: Optional[Literal["worker", "citizen"]]
 
+class CurrentUser(BaseModel):
+    guid: str
+    role: str
+    name: Optional[str] = None
+    email: Optional[str] = None
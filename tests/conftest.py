@@ -0,0 +1,96 @@
+import os
+import socket
+import tempfile
+import threading
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+LLM_PORT = free_port()
+GEOCODER_PORT = free_port()
+
+# La configuración se lee al importar los módulos: se fija antes de que cualquier prueba importe la aplicación
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+os.environ["STARTUP_PREWARM"] = "off"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["OPEN_API_KEY"] = "fake"
+os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{LLM_PORT}/v1"
+os.environ["LLM_TIMEOUT_SECONDS"] = "10"
+os.environ["LLM_IDLE_TIMEOUT_SECONDS"] = "0.5"
+os.environ["LLM_MAX_RETRIES"] = "2"
+os.environ["LLM_RETRY_BASE_SECONDS"] = "0.01"
+os.environ["GEOCODER_DOMAIN"] = f"127.0.0.1:{GEOCODER_PORT}"
+os.environ["GEOCODER_SCHEME"] = "http"
+os.environ["GEOCODER_MIN_INTERVAL_SECONDS"] = "0"
+
+import pytest
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@pytest.fixture(scope="session")
+def schema():
+    from config.db import Base, engine
+    import models.container, models.geocode, models.reading, models.road, models.simulation, models.user
+
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture
+def client(schema):
+    # Base de datos vacía, cachés vacías e índices cargados (sin contenedores) en cada prueba
+    from fastapi.testclient import TestClient
+    from app import app
+    from config.db import Base, get_async_engine
+    from dependencies.auth import revoked_claims, token_cache, user_cache
+    from utils import geolocation, simulation_cache
+    from utils.cache import container_cache
+    from utils.spatial_index import container_index
+    from utils.urgent_index import urgent_index
+
+    with schema.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    for cache in (
+        container_cache, token_cache, user_cache, revoked_claims, geolocation.memory_cache, simulation_cache.memory_cache,
+    ):
+        cache.clear()
+        cache.hits = cache.misses = 0
+    for index in (container_index, urgent_index):
+        index.begin_load()
+        index.load([])
+
+    with TestClient(app) as client:
+        yield client
+        # Las conexiones async pertenecen al loop de este cliente
+        client.portal.call(get_async_engine().dispose)
+
+@pytest.fixture(scope="session")
+def llm_server():
+    from benchmarks.fake_llm import serve
+
+    server = start(serve(LLM_PORT))
+    yield server
+    server.shutdown()
+
+@pytest.fixture
+def fake_llm(llm_server):
+    # Cada prueba empieza con un servidor que responde bien a todo
+    from benchmarks.fake_llm import FakeLLMHandler
+
+    for name in ("fail_rate", "mangle_rate", "garbage_rate", "hang_rate", "fail_first", "hang_first", "calls"):
+        setattr(FakeLLMHandler, name, 0)
+    FakeLLMHandler.fail_if = None
+    return FakeLLMHandler
+
+@pytest.fixture(scope="session")
+def stub_geocoder():
+    from benchmarks.stub_geocoder import StubHandler, serve
+
+    server = start(serve(GEOCODER_PORT))
+    yield StubHandler
+    server.shutdown()
@@ -0,0 +1,83 @@
+import pytest
+from dependencies import auth
+
+USER = {"name": "Ana", "email": "ana@example.com", "password": "secret", "role": "worker",
+        "address": "Av. Arequipa 100, Lima", "phone": "999"}
+
+@pytest.fixture
+def sessions(monkeypatch):
+    # Cuenta las sesiones que abre get_current_user
+    opened = []
+    original = auth.AsyncSessionLocal
+
+    def counting():
+        opened.append(1)
+        return original()
+
+    monkeypatch.setattr(auth, "AsyncSessionLocal", counting)
+    return opened
+
+def sign_in(client) -> dict:
+    assert client.post("/api/v1/auth/signup", json=USER).status_code == 201
+    token = client.post("/api/v1/auth/signin", json={"email": USER["email"], "password": USER["password"]}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+def test_wrong_password_is_rejected(client, stub_geocoder):
+    sign_in(client)
+    response = client.post("/api/v1/auth/signin", json={"email": USER["email"], "password": "nope"})
+    assert response.status_code == 401
+
+def test_session_is_opened_only_on_a_user_cache_miss(client, stub_geocoder, sessions):
+    headers = sign_in(client)
+    for _ in range(3):
+        assert client.delete("/api/v1/user/", headers={"Authorization": "Bearer bad"}).status_code == 401
+    assert sessions == []
+
+    # DELETE /user/ carga la fila con su propia sesión; la de get_current_user solo se abre la primera vez
+    auth.user_cache.clear()
+    assert client.delete("/api/v1/user/", headers=headers).status_code == 200
+    assert len(sessions) == 1
+    # El usuario borrado invalida su snapshot: la siguiente petición vuelve a la BD y no lo encuentra
+    assert client.delete("/api/v1/user/", headers=headers).status_code == 401
+    assert len(sessions) == 2
+
+def test_cached_user_skips_the_database(client, stub_geocoder, sessions):
+    headers = sign_in(client)
+    credentials = auth.HTTPAuthorizationCredentials(scheme="Bearer", credentials=headers["Authorization"][7:])
+    first = client.portal.call(auth.get_current_user, credentials)
+    assert client.portal.call(auth.get_current_user, credentials) == first
+    assert first.email == USER["email"] and len(sessions) == 1
+
+def test_claims_only_never_opens_a_session(client, stub_geocoder, sessions, monkeypatch):
+    headers = sign_in(client)
+    monkeypatch.setattr(auth, "AUTH_CLAIMS_ONLY", True)
+    credentials = auth.HTTPAuthorizationCredentials(scheme="Bearer", credentials=headers["Authorization"][7:])
+    user = client.portal.call(auth.get_current_user, credentials)
+    assert user.role == "worker" and user.email is None
+    assert sessions == []
+
+def test_claims_only_stops_trusting_a_changed_role(client, stub_geocoder, sessions, monkeypatch):
+    headers = sign_in(client)
+    monkeypatch.setattr(auth, "AUTH_CLAIMS_ONLY", True)
+    credentials = auth.HTTPAuthorizationCredentials(scheme="Bearer", credentials=headers["Authorization"][7:])
+    assert client.portal.call(auth.get_current_user, credentials).role == "worker"
+
+    # Mismo token (claims ya en token_cache) tras cambiar el rol: se resuelve contra la BD
+    update = {"name": USER["name"], "phone": USER["phone"], "role": "citizen"}
+    assert client.put("/api/v1/user/", json=update, headers=headers).status_code == 200
+    assert client.portal.call(auth.get_current_user, credentials).role == "citizen"
+    assert len(sessions) == 1
+
+    assert client.delete("/api/v1/user/", headers=headers).status_code == 200
+    with pytest.raises(auth.HTTPException) as error:
+        client.portal.call(auth.get_current_user, credentials)
+    assert error.value.status_code == 401
+
+def test_updates_that_keep_the_role_keep_claims_only(client, stub_geocoder, sessions, monkeypatch):
+    headers = sign_in(client)
+    monkeypatch.setattr(auth, "AUTH_CLAIMS_ONLY", True)
+    update = {"name": "Ana María", "phone": USER["phone"], "role": USER["role"]}
+    assert client.put("/api/v1/user/", json=update, headers=headers).status_code == 200
+    credentials = auth.HTTPAuthorizationCredentials(scheme="Bearer", credentials=headers["Authorization"][7:])
+    assert client.portal.call(auth.get_current_user, credentials).role == "worker"
+    assert sessions == []
@@ -0,0 +1,106 @@
+import pytest
+from utils import cache as cache_module
+from utils.cache import Cache, MemoryBackend, NullBackend, container_cache, container_key, status_key
+
+class FakeRedis:
+    # Subconjunto de redis.Redis(decode_responses=True) que usa Cache; guarda también el TTL pedido
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.deleted = []
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    def delete(self, *keys):
+        self.deleted.extend(keys)
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        self.data.clear()
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.get("a")
+    backend.set("c", "3")
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == ("1", None, "3")
+
+def test_memory_backend_expires_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    backend = MemoryBackend()
+    backend.set("short", "1", ex=5)
+    backend.set("forever", "2")
+    clock.now += 6
+    assert backend.get("short") is None
+    assert backend.get("forever") == "2"
+
+def test_cache_round_trips_json_and_counts_hits():
+    cache = Cache(FakeRedis(), ttl=30)
+    assert cache.get("k") is None
+    cache.set("k", {"guid": "A", "capacity": 5})
+    assert cache.get("k") == {"guid": "A", "capacity": 5}
+    assert cache.backend.ttls["k"] == 30
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+def test_null_backend_never_hits():
+    cache = Cache(NullBackend())
+    cache.set("k", 1)
+    assert cache.get("k") is None
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        cache_module.build_cache_backend("memcached")
+
+@pytest.fixture
+def fake_redis(client, monkeypatch):
+    backend = FakeRedis()
+    monkeypatch.setattr(container_cache, "backend", backend)
+    return backend
+
+def create(client, capacity=10):
+    payload = {"name": "c", "latitude": "-12.0", "longitude": "-77.0", "capacity": capacity, "limit": 90}
+    return client.post("/api/v1/containers/", json=payload).json()["guid"]
+
+def test_reads_are_served_from_the_cache(client, fake_redis):
+    guid = create(client)
+    first = client.get(f"/api/v1/containers/{guid}").json()
+    assert container_key(guid) in fake_redis.data
+    assert client.get(f"/api/v1/containers/{guid}").json() == first
+    client.get("/api/v1/containers/status/active")
+    client.get("/api/v1/containers/status/active")
+    assert (container_cache.hits, container_cache.misses) == (2, 2)
+
+@pytest.mark.parametrize("method, path, body, keys", [
+    ("put", "", {"capacity": 50}, ["active"]),
+    ("put", "/status?new_status=inactive", None, ["active", "inactive"]),
+    ("put", "/favorite", {"isFavorite": True}, ["active"]),
+    ("put", "/capacity", {"capacity": 50}, ["active"]),
+    ("put", "/limit", {"limit": 40}, ["active"]),
+    ("delete", "", None, ["active"]),
+])
+def test_writes_invalidate_exactly_the_affected_keys(client, fake_redis, method, path, body, keys):
+    guid = create(client)
+    fake_redis.deleted.clear()
+    response = client.request(method.upper(), f"/api/v1/containers/{guid}{path}", json=body)
+    assert response.status_code < 300
+    assert sorted(fake_redis.deleted) == sorted([container_key(guid)] + [status_key(s) for s in keys])
+
+def test_a_stale_entry_is_not_served_after_an_update(client, fake_redis):
+    guid = create(client)
+    client.get(f"/api/v1/containers/{guid}")
+    client.put(f"/api/v1/containers/{guid}/capacity", json={"capacity": 70})
+    assert client.get(f"/api/v1/containers/{guid}").json()["capacity"] == 70
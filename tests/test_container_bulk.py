@@ -0,0 +1,51 @@
+import json
+from routes import container as container_module
+from utils.container_events import container_events
+from utils.spatial_index import container_index
+from utils.urgent_index import urgent_index
+
+def item(name, capacity=10, limit=90, lat="-12.0", lon="-77.0"):
+    return {"name": name, "latitude": lat, "longitude": lon, "capacity": capacity, "limit": limit}
+
+def test_bulk_create_reports_invalid_items_by_index(client):
+    body = [item("a"), {"name": "missing fields"}, item("b")]
+    result = client.post("/api/v1/containers/bulk", json=body).json()
+    assert len(result["succeeded"]) == 2
+    assert [f["index"] for f in result["failed"]] == [1]
+
+def test_bulk_create_accepts_ndjson(client):
+    lines = "\n".join(json.dumps(item(f"c{i}")) for i in range(3)) + "\nnot json\n"
+    result = client.post(
+        "/api/v1/containers/bulk", content=lines, headers={"Content-Type": "application/x-ndjson"},
+    ).json()
+    assert len(result["succeeded"]) == 3
+    assert result["failed"][0]["index"] == 3
+
+def test_bulk_create_publishes_created_events_and_updates_the_indexes(client, monkeypatch):
+    published = []
+    monkeypatch.setattr(container_events, "publish", lambda *events: published.extend(events))
+    result = client.post("/api/v1/containers/bulk", json=[item("full", capacity=95), item("empty")]).json()
+    full, empty = result["succeeded"]
+
+    created = {e["guid"]: e for e in published if e["type"] == "container"}
+    assert set(created) == {full, empty}
+    assert all(e["changed"] == ["created"] and e["status"] == "active" for e in created.values())
+    assert [(e["guid"], e["alert"]) for e in published if e["type"] == "alert"] == [(full, "fired")]
+    assert urgent_index.guids() == [full]
+    assert {g for g, _ in container_index.within(-12.0, -77.0, 1)} == {full, empty}
+
+def test_bulk_create_retries_generated_guid_collisions(client, monkeypatch):
+    taken = client.post("/api/v1/containers/", json=item("existing")).json()["guid"]
+    # Los dos primeros GUID generados ya existen: el lote falla y cada fila se reintenta con uno nuevo
+    guids = iter([taken, taken, "NEW001", "NEW002"])
+    monkeypatch.setattr(container_module, "generate_guid", lambda: next(guids))
+    result = client.post("/api/v1/containers/bulk", json=[item("a"), item("b")]).json()
+    assert result == {"succeeded": ["NEW001", "NEW002"], "failed": []}
+    assert client.get("/api/v1/containers/NEW001").json()["name"] == "a"
+    assert client.get(f"/api/v1/containers/{taken}").json()["name"] == "existing"
+
+def test_bulk_create_gives_up_after_repeated_collisions(client, monkeypatch):
+    taken = client.post("/api/v1/containers/", json=item("existing")).json()["guid"]
+    monkeypatch.setattr(container_module, "generate_guid", lambda: taken)
+    result = client.post("/api/v1/containers/bulk", json=[item("a")]).json()
+    assert result == {"succeeded": [], "failed": [{"index": 0, "guid": None, "error": "GUID collision"}]}
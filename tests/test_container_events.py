@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from utils.container_events import ContainerEventBus, Subscription, alert_event, container_event
+
+def event(guid: str, capacity: int = 10, limit: int = 90, changed=("capacity",), was_urgent: bool = False,
+          latitude_deg: float = -12.05, longitude_deg: float = -77.04) -> dict:
+    return container_event(guid, capacity, limit, "active", latitude_deg, longitude_deg, changed, was_urgent)
+
+@pytest.fixture
+def drain():
+    # Un solo loop por prueba: el asyncio.Event de la suscripción queda ligado al primero que espera
+    loop = asyncio.new_event_loop()
+    yield lambda subscription, timeout=0.01: loop.run_until_complete(subscription.next_batch(timeout))
+    loop.close()
+
+def test_burst_on_one_container_is_coalesced(drain):
+    subscription = Subscription()
+    subscription.offer(event("A", capacity=10, changed=("capacity",), was_urgent=True))
+    subscription.offer(event("A", capacity=95, changed=("status",)))
+    subscription.offer(event("B"))
+    batch = drain(subscription)
+    assert [e["guid"] for e in batch] == ["A", "B"]
+    # Queda el último estado con los cambios acumulados y la urgencia de antes de la ráfaga
+    assert batch[0]["capacity"] == 95
+    assert batch[0]["changed"] == ["capacity", "status"]
+    assert batch[0]["was_urgent"] is True
+    assert subscription.coalesced == 1
+    assert drain(subscription) is None
+
+def test_alerts_are_not_coalesced_with_container_events(drain):
+    subscription = Subscription()
+    update = event("A", capacity=95)
+    subscription.offer(update)
+    subscription.offer(alert_event(update, "fired", 90))
+    assert [e["type"] for e in drain(subscription)] == ["container", "alert"]
+
+def test_coalescing_is_per_subscriber(drain):
+    bus = ContainerEventBus()
+    fast, slow = bus.subscribe(), bus.subscribe()
+    bus.publish(event("A", capacity=10))
+    assert [e["capacity"] for e in drain(fast)] == [10]
+    bus.publish(event("A", capacity=20))
+    assert [e["capacity"] for e in drain(fast)] == [20]
+    assert [e["capacity"] for e in drain(slow)] == [20]
+    assert (fast.coalesced, slow.coalesced) == (0, 1)
+
+def test_filters_apply_to_new_events(drain):
+    subscription = Subscription(urgent_only=True, bbox=(-13.0, -78.0, -12.0, -77.0))
+    subscription.offer(event("calm"))
+    subscription.offer(event("outside", capacity=95, latitude_deg=-11.0))
+    subscription.offer(event("urgent", capacity=95))
+    subscription.offer(event("recovered", capacity=10, was_urgent=True))
+    assert [e["guid"] for e in drain(subscription)] == ["urgent", "recovered"]
+
+def test_overflow_sends_a_single_resync(drain):
+    subscription = Subscription(max_pending=5)
+    for i in range(50):
+        subscription.offer(event(f"C{i}"))
+    # En lugar de 50 eventos pendientes, un solo resync y nada más hasta el siguiente cambio
+    assert drain(subscription) == [{"type": "resync"}]
+    assert subscription.overflows == 1
+    assert drain(subscription) is None
+    subscription.offer(event("after"))
+    assert [e["guid"] for e in drain(subscription)] == ["after"]
+
+def test_overflow_only_affects_the_slow_subscriber(drain):
+    bus = ContainerEventBus()
+    fast, slow = bus.subscribe(), bus.subscribe()
+    slow.max_pending = 3
+    for i in range(10):
+        bus.publish(event(f"C{i}"))
+        assert [e["guid"] for e in drain(fast)] == [f"C{i}"]
+    assert drain(slow) == [{"type": "resync"}]
+    assert (fast.overflows, slow.overflows) == (0, 1)
+    bus.unsubscribe(slow)
+    assert bus.subscriber_count == 1
@@ -0,0 +1,46 @@
+import json
+
+def seed(client, count: int):
+    body = [
+        {"name": f"c{i}", "latitude": str(-12.0 - i / 100), "longitude": "-77.0",
+         "capacity": 95 if i % 3 == 0 else 10, "limit": 90}
+        for i in range(count)
+    ]
+    return sorted(client.post("/api/v1/containers/bulk", json=body).json()["succeeded"])
+
+def test_keyset_pages_cover_every_container_once(client):
+    guids = seed(client, 25)
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/containers/", params=params)
+        pages.append([c["guid"] for c in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert [g for page in pages for g in page] == guids
+
+def test_cursor_without_limit_returns_the_rest(client):
+    guids = seed(client, 6)
+    first = client.get("/api/v1/containers/", params={"limit": 3})
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get("/api/v1/containers/", params={"cursor": cursor}).json()
+    assert [c["guid"] for c in rest] == guids[3:]
+
+def test_filters_and_projection(client):
+    seed(client, 9)
+    urgent = client.get("/api/v1/containers/", params={"above_limit": "true", "fields": "capacity"}).json()
+    assert len(urgent) == 3
+    assert all(set(c) == {"guid", "capacity"} and c["capacity"] == 95 for c in urgent)
+    boxed = client.get("/api/v1/containers/", params={"bbox": "-12.035,-77.1,-12.0,-76.9"}).json()
+    assert len(boxed) == 4
+    assert client.get("/api/v1/containers/", params={"fields": "nope"}).status_code == 400
+    assert client.get("/api/v1/containers/", params={"bbox": "1,2"}).status_code == 400
+
+def test_ndjson_streams_every_matching_row(client):
+    guids = seed(client, 12)
+    response = client.get("/api/v1/containers/", params={"format": "ndjson", "fields": "name"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["guid"] for r in rows] == guids
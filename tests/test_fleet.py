@@ -0,0 +1,80 @@
+import pytest
+from benchmarks.bench_route_optimizer import make_containers
+from utils import fleet as fleet_module
+from utils.fleet import FLEET_METHODS, plan_fleet
+from utils.route import is_urgent
+
+VEHICLES = 6
+
+@pytest.fixture(autouse=True)
+def inline(monkeypatch):
+    # Sin pool de procesos: el resultado es el mismo y las pruebas no dependen de "spawn"
+    monkeypatch.setattr(fleet_module, "FLEET_PARALLEL_MIN_CONTAINERS", float("inf"))
+
+def tight_capacities(containers, vehicles: int) -> list:
+    # ~80 % de la carga total repartida entre los vehículos: siempre queda algo sin asignar
+    total = sum(c.capacity for c in containers)
+    return [int(total * 0.8 / vehicles)] * vehicles
+
+def check_plan(containers, routes, unassigned, capacities=None):
+    by_guid = {c.guid: c for c in containers}
+    assigned = [guid for r in routes for guid in r["route"]]
+    # Cada contenedor aparece exactamente una vez: en una ruta o como no asignado
+    assert sorted(assigned + unassigned) == sorted(by_guid)
+    for r in routes:
+        assert r["route"], "no debe haber rutas vacías"
+        urgent = [is_urgent(by_guid[g]) for g in r["route"]]
+        assert urgent == sorted(urgent, reverse=True), "los urgentes van primero"
+        assert r["load"] == sum(by_guid[g].capacity for g in r["route"])
+        if capacities is not None:
+            assert r["load"] <= capacities[r["vehicle"]]
+        assert len(r["legs"]) == len(r["route"]) - 1
+    assert len({r["vehicle"] for r in routes}) == len(routes)
+
+@pytest.mark.parametrize("method", FLEET_METHODS)
+@pytest.mark.parametrize("n", [100, 1000, 3000])
+def test_every_container_is_planned_once(method, n):
+    containers = make_containers(n, seed=n)
+    routes, unassigned = plan_fleet(containers, VEHICLES, method=method)
+    check_plan(containers, routes, unassigned)
+    assert unassigned == []
+
+@pytest.mark.parametrize("method", FLEET_METHODS)
+@pytest.mark.parametrize("n", [100, 1000, 3000])
+def test_capacities_are_respected(method, n):
+    containers = make_containers(n, seed=n)
+    capacities = tight_capacities(containers, VEHICLES)
+    routes, unassigned = plan_fleet(containers, VEHICLES, capacities, method=method)
+    check_plan(containers, routes, unassigned, capacities)
+    assert unassigned
+
+@pytest.mark.parametrize("method", FLEET_METHODS)
+def test_urgent_containers_fill_capacity_first(method):
+    containers = make_containers(500, seed=7)
+    capacities = tight_capacities(containers, VEHICLES)
+    routes, unassigned = plan_fleet(containers, VEHICLES, capacities, method=method)
+    check_plan(containers, routes, unassigned, capacities)
+    if method == "kmeans":
+        # k-means asigna por prioridad: ningún urgente se queda fuera mientras quepan
+        urgent_load = sum(c.capacity for c in containers if is_urgent(c))
+        assert urgent_load <= sum(capacities)
+        assert not any(is_urgent(c) for c in containers if c.guid in set(unassigned))
+
+@pytest.mark.parametrize("method", FLEET_METHODS)
+@pytest.mark.parametrize("capacities", [None, [1000] * 10])
+def test_more_vehicles_than_containers(method, capacities):
+    containers = make_containers(3, seed=1)
+    routes, unassigned = plan_fleet(containers, 10, capacities, method=method)
+    check_plan(containers, routes, unassigned, capacities)
+    assert unassigned == []
+    assert 1 <= len(routes) <= 3
+
+def test_container_heavier_than_any_vehicle_is_unassigned():
+    containers = make_containers(20, seed=3)
+    containers[0].capacity = 100
+    routes, unassigned = plan_fleet(containers, 2, [60, 60])
+    check_plan(containers, routes, unassigned, [60, 60])
+    assert containers[0].guid in unassigned
+
+def test_no_containers():
+    assert plan_fleet([], 3) == ([], [])
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from benchmarks.stub_geocoder import coordinates_for
+from config.db import AsyncSessionLocal
+from routes import auth as auth_routes
+from utils import geolocation
+from utils.geolocation import RateLimiter, geocode_address, normalize_address
+
+ADDRESS = "Av. Arequipa 100, Lima"
+
+async def geocode(address: str):
+    async with AsyncSessionLocal() as db:
+        return await geocode_address(db, address)
+
+def test_normalize_address():
+    assert normalize_address("  AV. Arequipa   100 ,Lima. ") == "av. arequipa 100, lima"
+    assert normalize_address(None) == ""
+
+def test_results_are_cached_in_memory_and_in_the_table(client, stub_geocoder):
+    before = stub_geocoder.calls
+    expected = tuple(str(v) for v in coordinates_for(ADDRESS))
+    assert client.portal.call(geocode, ADDRESS) == expected
+    # Otra forma de escribir la misma dirección usa la misma entrada
+    assert client.portal.call(geocode, "av. arequipa 100 , LIMA") == expected
+    geolocation.memory_cache.clear()
+    assert client.portal.call(geocode, ADDRESS) == expected
+    assert stub_geocoder.calls == before + 1
+
+def test_misses_are_remembered(client, stub_geocoder):
+    before = stub_geocoder.calls
+    assert client.portal.call(geocode, "Nowhere street") == (None, None)
+    assert client.portal.call(geocode, "Nowhere street") == (None, None)
+    assert stub_geocoder.calls == before + 1
+
+def test_rate_limiter_spaces_calls():
+    async def three_calls():
+        limiter = RateLimiter(0.05)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.wait() for _ in range(3)))
+        return time.monotonic() - start
+
+    assert asyncio.run(three_calls()) >= 0.1
+
+def signup(client, email):
+    user = {"name": "Ana", "email": email, "password": "secret", "role": "citizen", "address": ADDRESS, "phone": "1"}
+    guid = client.post("/api/v1/auth/signup", json=user).json()["guid"]
+    return client.get(f"/api/v1/user/{guid}").json()
+
+def test_signup_geocodes_inline_by_default(client, stub_geocoder):
+    assert signup(client, "inline@example.com")["latitude"] == str(coordinates_for(ADDRESS)[0])
+
+def test_deferred_signup_fills_coordinates_in_the_background(client, stub_geocoder, monkeypatch):
+    monkeypatch.setattr(auth_routes, "SIGNUP_GEOCODING", "deferred")
+    before = stub_geocoder.calls
+    # TestClient ejecuta las BackgroundTasks antes de devolver la respuesta
+    user = signup(client, "deferred@example.com")
+    assert (user["latitude"], user["longitude"]) == tuple(str(v) for v in coordinates_for(ADDRESS))
+    assert stub_geocoder.calls == before + 1
@@ -0,0 +1,78 @@
+import json
+from sqlalchemy import create_engine, inspect, text
+from config.db import Base
+from migrations import MIGRATIONS, run_migrations
+
+import models.container, models.geocode, models.reading, models.road, models.simulation, models.user
+
+# Esquema de la versión inicial, antes de cualquier migración
+LEGACY_SCHEMA = [
+    """CREATE TABLE containers (
+        guid VARCHAR(6) PRIMARY KEY, name VARCHAR(255) NOT NULL, latitude VARCHAR(255) NOT NULL,
+        longitude VARCHAR(255) NOT NULL, capacity INTEGER NOT NULL, status VARCHAR(8), isFavorite BOOLEAN,
+        "limit" INTEGER NOT NULL)""",
+    """CREATE TABLE users (
+        guid VARCHAR(36) PRIMARY KEY, name VARCHAR(255) NOT NULL, email VARCHAR(255) NOT NULL UNIQUE,
+        password VARCHAR(255) NOT NULL, role VARCHAR(7) NOT NULL, address VARCHAR(255) NOT NULL,
+        phone VARCHAR(50) NOT NULL, latitude VARCHAR(255), longitude VARCHAR(255), created_at DATETIME)""",
+    """CREATE TABLE simulations (
+        id INTEGER PRIMARY KEY, created_at DATETIME, total_distance_km FLOAT NOT NULL, duration_min FLOAT NOT NULL,
+        route VARCHAR(1000) NOT NULL, distances VARCHAR(5000) NOT NULL)""",
+]
+
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as conn:
+        for ddl in LEGACY_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text(
+            """INSERT INTO containers VALUES ('AAA111', 'a', '-12.05', '-77.04', 95, 'active', 0, 90),
+                                             ('BBB222', 'b', 'n/a', '-77.00', 10, 'active', 0, 90)"""
+        ))
+        conn.execute(text(
+            "INSERT INTO users VALUES ('u1', 'u', 'u@example.com', 'x', 'worker', '-', '-', '-12.1', '-77.1', NULL)"
+        ))
+        legs = [{"from": "AAA111", "to": "BBB222", "distance_km": 4.5}]
+        conn.execute(
+            text("INSERT INTO simulations VALUES (1, '2024-01-01 00:00:00', 4.5, 9.0, :route, :distances)"),
+            {"route": json.dumps(["AAA111", "BBB222"]), "distances": json.dumps(legs)},
+        )
+    return engine
+
+def test_upgrades_the_legacy_schema_and_backfills(tmp_path):
+    engine = legacy_engine(tmp_path)
+    # Igual que python -m migrations: tablas nuevas con create_all, cambios con las migraciones
+    Base.metadata.create_all(bind=engine)
+    assert run_migrations(engine) == [m.ID for m in MIGRATIONS]
+
+    with engine.connect() as conn:
+        containers = conn.execute(text(
+            "SELECT guid, latitude_deg, longitude_deg, geohash, alert_active FROM containers ORDER BY guid"
+        )).all()
+        assert containers[0][:3] == ("AAA111", -12.05, -77.04) and containers[0].geohash
+        # Ya estaba por encima de su límite: cuenta como alertado
+        assert containers[0].alert_active
+        # Coordenadas ilegibles: se dejan sin valor numérico
+        assert containers[1].latitude_deg is None
+        assert conn.execute(text("SELECT latitude_deg FROM users")).scalar() == -12.1
+        assert conn.execute(text("SELECT status FROM simulations")).scalar() == "completed"
+        stops = conn.execute(text("SELECT container_guid FROM simulation_stops ORDER BY position")).scalars().all()
+        assert stops == ["AAA111", "BBB222"]
+        assert conn.execute(text("SELECT distance_km FROM simulation_legs")).scalar() == 4.5
+
+    columns = {c["name"] for c in inspect(engine).get_columns("simulations")}
+    assert "route" not in columns and "heartbeat_at" in columns
+    assert "last_recorded_at" in {c["name"] for c in inspect(engine).get_columns("capacity_rollups")}
+
+def test_is_idempotent(tmp_path):
+    engine = legacy_engine(tmp_path)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    assert run_migrations(engine) == []
+
+def test_fresh_schema_only_records_the_migrations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    Base.metadata.create_all(bind=engine)
+    assert run_migrations(engine) == [m.ID for m in MIGRATIONS]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM simulation_stops")).scalar() == 0
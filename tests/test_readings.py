@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+import numpy as np
+from sqlalchemy import func, insert, select
+from config.db import AsyncSessionLocal
+from models.reading import CapacityReading, CapacityRollup
+from utils import readings as readings_module
+from utils.readings import ReadingRecorder, aggregate, compact
+
+def test_aggregate_groups_by_container_and_bucket():
+    guids = np.array(["A", "A", "A", "B"])
+    recorded_at = np.array(
+        ["2024-01-01T10:50", "2024-01-01T10:10", "2024-01-01T11:00", "2024-01-01T10:30"], dtype="datetime64[us]",
+    )
+    groups = aggregate(guids, recorded_at, np.array([40, 20, 60, 5]), "hour")
+    first = groups[0]
+    assert (first["container_guid"], first["bucket_start"]) == ("A", datetime(2024, 1, 1, 10))
+    assert (first["samples"], first["sum_capacity"], first["min_capacity"], first["max_capacity"]) == (2, 60, 20, 40)
+    # La última es la más reciente aunque llegara antes
+    assert (first["last_capacity"], first["last_recorded_at"]) == (40, datetime(2024, 1, 1, 10, 50))
+    assert [(g["container_guid"], g["samples"]) for g in groups[1:]] == [("A", 1), ("B", 1)]
+
+async def insert_and_compact(rows):
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(CapacityReading), rows)
+        await db.commit()
+        await compact(db)
+
+async def hourly_rollup():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(CapacityRollup).where(CapacityRollup.resolution == "hour"))).scalar_one()
+
+def reading(capacity, minute):
+    return {"container_guid": "A", "capacity": capacity, "recorded_at": datetime(2024, 1, 1, 10, minute)}
+
+def test_late_older_batch_does_not_overwrite_last_capacity(client):
+    client.portal.call(insert_and_compact, [reading(70, 50)])
+    client.portal.call(insert_and_compact, [reading(30, 5)])
+    rollup = client.portal.call(hourly_rollup)
+    assert (rollup.samples, rollup.min_capacity, rollup.max_capacity) == (2, 30, 70)
+    assert (rollup.last_capacity, rollup.last_recorded_at) == (70, datetime(2024, 1, 1, 10, 50))
+
+    client.portal.call(insert_and_compact, [reading(90, 55)])
+    assert client.portal.call(hourly_rollup).last_capacity == 90
+
+async def record_and_stop(count: int):
+    recorder = ReadingRecorder(batch_size=10, flush_seconds=3600)
+    for i in range(count):
+        recorder.record("A", i)
+    # Los volcados arrancan y se llevan el buffer; stop llega mientras escriben
+    await asyncio.sleep(0)
+    await recorder.stop()
+    pending = len(recorder._flushes)
+    async with AsyncSessionLocal() as db:
+        return pending, (await db.execute(select(func.count()).select_from(CapacityReading))).scalar()
+
+def test_stop_waits_for_flushes_in_flight(client):
+    assert client.portal.call(record_and_stop, 25) == (0, 25)
+
+class SlowSession:
+    # Sesión real con una escritura lenta, para que stop() llegue con el volcado periódico a medias
+    def __init__(self, writing: asyncio.Event):
+        self.db = AsyncSessionLocal()
+        self.writing = writing
+
+    async def __aenter__(self):
+        await self.db.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self.db.__aexit__(*exc)
+
+    async def execute(self, *args, **kwargs):
+        self.writing.set()
+        await asyncio.sleep(0.05)
+        return await self.db.execute(*args, **kwargs)
+
+    async def commit(self):
+        await self.db.commit()
+
+async def stop_during_periodic_flush(monkeypatch) -> int:
+    writing = asyncio.Event()
+    monkeypatch.setattr(readings_module, "AsyncSessionLocal", lambda: SlowSession(writing))
+    recorder = ReadingRecorder(batch_size=500, flush_seconds=0.01)
+    for i in range(10):
+        recorder.record("A", i)
+    await asyncio.wait_for(writing.wait(), 5)
+    await recorder.stop()
+    monkeypatch.undo()
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(CapacityReading))).scalar()
+
+def test_stop_during_a_periodic_flush_keeps_every_reading(client, monkeypatch):
+    assert client.portal.call(stop_during_periodic_flush, monkeypatch) == 10
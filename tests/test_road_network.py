@@ -0,0 +1,46 @@
+import pytest
+from utils import distance, road_network
+from utils.road_network import RoadGraph
+
+# Extracto recortado: la vía sigue hacia el nodo 3, que quedó fuera del área
+CLIPPED_OSM = """<?xml version="1.0"?>
+<osm version="0.6">
+ <node id="1" lat="-12.000" lon="-77.000"/>
+ <node id="2" lat="-12.010" lon="-77.000"/>
+ <way id="10"><nd ref="1"/><nd ref="2"/><nd ref="3"/><tag k="highway" v="residential"/></way>
+ <way id="11"><nd ref="4"/><nd ref="5"/><tag k="highway" v="primary"/></way>
+</osm>
+"""
+
+@pytest.fixture
+def clipped_osm(tmp_path):
+    path = tmp_path / "clipped.osm"
+    path.write_text(CLIPPED_OSM)
+    return str(path)
+
+def test_clipped_extract_skips_missing_nodes(clipped_osm):
+    graph = RoadGraph.from_osm(clipped_osm, "clipped")
+    assert graph.node_ids.tolist() == [1, 2]
+    # Tramo 1-2 en ambos sentidos; los que tocan nodos ausentes se descartan
+    assert sorted(zip(graph.edges[0].tolist(), graph.edges[1].tolist())) == [(0, 1), (1, 0)]
+
+@pytest.fixture
+def provider_settings(monkeypatch):
+    def configure(path):
+        monkeypatch.setattr(distance, "DISTANCE_PROVIDER", "road")
+        monkeypatch.setattr(distance, "ROAD_GRAPH_PATH", path)
+        monkeypatch.setattr(distance, "_provider", None)
+    yield configure
+    distance._provider = None
+
+def test_clipped_extract_loads_as_road_provider(schema, clipped_osm, provider_settings):
+    provider_settings(clipped_osm)
+    assert distance.get_distance_provider().name == "road"
+
+def test_unreadable_graph_falls_back_to_haversine(provider_settings, monkeypatch):
+    def broken(path):
+        raise KeyError(3)
+
+    monkeypatch.setattr(road_network, "load_graph", broken)
+    provider_settings("/data/extract.osm")
+    assert distance.get_distance_provider().name == "haversine"
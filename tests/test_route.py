@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from benchmarks.bench_route_optimizer import make_containers
+from utils.distance import get_distance_provider
+from utils.route import (
+    _best_or_opt, _best_two_opt, _improve, _nearest_neighbour, _optimize_path, is_urgent, optimize_route,
+    OR_OPT_SEGMENT_LENGTHS,
+)
+
+SEEDS = range(20)
+
+def random_matrix(n: int, seed: int) -> np.ndarray:
+    points = np.random.default_rng(seed).uniform(0, 10, size=(n, 2))
+    return np.linalg.norm(points[:, None] - points[None, :], axis=-1)
+
+def length(dist: np.ndarray, route) -> float:
+    return float(sum(dist[a, b] for a, b in zip(route, route[1:])))
+
+def edges_of(dist: np.ndarray) -> np.ndarray:
+    return np.append(np.diagonal(dist, 1), 0.0)
+
+def reversed_between(route: list, i: int, j: int) -> list:
+    return route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+
+def moved_after(route: list, i: int, seg: int, k: int) -> list:
+    segment, rest = route[i:i + seg], route[:i] + route[i + seg:]
+    position = k + 1 if k < i else k + 1 - seg
+    return rest[:position] + segment + rest[position:]
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_two_opt_delta_matches_brute_force(seed):
+    n = 4 + seed % 7
+    dist = random_matrix(n, seed)
+    route = list(range(n))
+    delta, i, j = _best_two_opt(dist, edges_of(dist), np.tri(n - 1, dtype=bool))
+    best = min(
+        length(dist, reversed_between(route, a, b)) - length(dist, route)
+        for a in range(1, n) for b in range(a + 1, n)
+    )
+    assert delta == pytest.approx(best)
+    assert length(dist, reversed_between(route, i, j)) - length(dist, route) == pytest.approx(delta)
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("seg", OR_OPT_SEGMENT_LENGTHS)
+def test_or_opt_delta_matches_brute_force(seed, seg):
+    n = 5 + seed % 7
+    dist = random_matrix(n, seed)
+    route = list(range(n))
+    delta, i, k = _best_or_opt(dist, edges_of(dist), seg)
+    best = min(
+        length(dist, moved_after(route, a, seg, b)) - length(dist, route)
+        for a in range(1, n - seg + 1) for b in range(n) if not a - 1 <= b <= a + seg - 1
+    )
+    assert delta == pytest.approx(best)
+    assert length(dist, moved_after(route, i, seg, k)) - length(dist, route) == pytest.approx(delta)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_improvement_never_lengthens_the_nearest_neighbour_tour(seed):
+    n = 5 + seed * 3
+    dist = random_matrix(n, seed)
+    start = seed % n
+    tour = _nearest_neighbour(dist, list(range(n)), start)
+    improved = _improve(dist, np.array(tour, dtype=np.intp)).tolist()
+    assert sorted(improved) == list(range(n))
+    assert length(dist, improved) <= length(dist, tour) + 1e-9
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_start_is_honoured(seed):
+    n = 3 + seed * 2
+    dist = random_matrix(n, seed)
+    nodes = list(range(0, n, 2)) + list(range(1, n, 2))
+    start = nodes[seed % n]
+    route = _optimize_path(dist, nodes, start)
+    assert route[0] == start and sorted(route) == sorted(nodes)
+
+@pytest.mark.parametrize("count", [1, 2, 30, 200])
+def test_urgent_containers_come_first_starting_with_the_fullest(count):
+    containers = make_containers(count, seed=count)
+    route, legs, total, _ = optimize_route(containers)
+    by_guid = {c.guid: c for c in containers}
+    flags = [is_urgent(by_guid[g]) for g in route]
+    assert sorted(route) == sorted(by_guid)
+    assert flags == sorted(flags, reverse=True)
+    first_group = [c for c in containers if is_urgent(c)] or containers
+    assert int(by_guid[route[0]].capacity) == max(int(c.capacity) for c in first_group)
+    assert len(legs) == count - 1
+
+def test_optimized_route_is_not_longer_than_the_priority_nearest_neighbour():
+    containers = sorted(make_containers(120, seed=3), key=lambda c: c.guid)
+    dist, _ = get_distance_provider().matrix(containers)
+    route, _, total, _ = optimize_route(containers)
+    position = {c.guid: i for i, c in enumerate(containers)}
+    urgent = sorted((i for i, c in enumerate(containers) if is_urgent(c)), key=lambda i: -int(containers[i].capacity))
+    regular = [i for i, c in enumerate(containers) if not is_urgent(c)]
+    tour = _nearest_neighbour(dist, urgent, urgent[0])
+    tour += _nearest_neighbour(dist, [tour[-1]] + regular, tour[-1])[1:]
+    assert length(dist, [position[g] for g in route]) <= length(dist, tour) + 1e-9
+
+def test_empty_input():
+    assert optimize_route([]) == ([], [], 0.0, 0.0)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+import pytest
+from benchmarks.bench_route_optimizer import make_containers
+from utils import routes_openai
+from utils.route import is_urgent
+from utils.route_repair import parse_route_ids, repair_route
+from utils.routes_openai import call_openai_for_simulation, order_with_openai
+
+ATTEMPTS = routes_openai.LLM_MAX_RETRIES + 1
+
+def assert_valid(route, containers):
+    by_guid = {c.guid: c for c in containers}
+    assert sorted(route) == sorted(by_guid)
+    flags = [is_urgent(by_guid[g]) for g in route]
+    assert flags == sorted(flags, reverse=True)
+
+def assert_local_distances(route, legs, total):
+    assert [leg["from"] for leg in legs] == route[:-1]
+    assert [leg["to"] for leg in legs] == route[1:]
+    assert total == pytest.approx(sum(leg["distance_km"] for leg in legs), abs=0.01)
+
+def test_valid_reply(fake_llm):
+    containers = make_containers(30)
+    route, legs, total, _ = asyncio.run(order_with_openai(containers))
+    assert_valid(route, containers)
+    assert_local_distances(route, legs, total)
+    assert fake_llm.calls == 1
+
+def test_mangled_route_is_repaired_without_retrying(fake_llm):
+    fake_llm.mangle_rate = 1.0
+    containers = make_containers(40)
+    route, legs, total, _ = asyncio.run(order_with_openai(containers))
+    assert_valid(route, containers)
+    assert_local_distances(route, legs, total)
+    assert fake_llm.calls == 1
+
+def test_truncated_reply_keeps_complete_ids():
+    containers = make_containers(10)
+    assert parse_route_ids('{"route": [3, 1, 0, 12') == [3, 1, 0]
+    assert parse_route_ids('```json\n{"route": [2, 1]}\n```') == [2, 1]
+    route, legs, total, _, repairs = repair_route(containers, parse_route_ids('{"route": [0, 1, 2, 3, 4, 5, 6, 7'))
+    assert_valid(route, containers)
+    assert_local_distances(route, legs, total)
+    assert repairs["missing"] >= 2
+
+@pytest.mark.parametrize("reply", ["Sorry, I cannot help.", '{"route": [1, "A'])
+def test_unusable_reply_is_rejected(reply):
+    with pytest.raises(ValueError):
+        repair_route(make_containers(10), parse_route_ids(reply))
+
+def test_server_error_is_retried(fake_llm):
+    fake_llm.fail_first = 2
+    containers = make_containers(20)
+    route, _, _, _ = asyncio.run(order_with_openai(containers))
+    assert_valid(route, containers)
+    assert fake_llm.calls == 3
+
+def test_idle_stream_is_retried(fake_llm):
+    fake_llm.hang_first = 1
+    containers = make_containers(20)
+    route, _, _, _ = asyncio.run(order_with_openai(containers))
+    assert_valid(route, containers)
+    assert fake_llm.calls == 2
+
+def test_gives_up_after_retries(fake_llm):
+    fake_llm.garbage_rate = 1.0
+    with pytest.raises(RuntimeError, match=f"after {ATTEMPTS} attempt"):
+        asyncio.run(order_with_openai(make_containers(20)))
+    assert fake_llm.calls == ATTEMPTS
+
+def all_urgent(stops) -> bool:
+    return all(capacity >= limit for _, _, _, capacity, limit in stops)
+
+def test_chunks_are_stitched_urgent_first_and_a_failed_chunk_runs_locally(fake_llm, monkeypatch, caplog):
+    monkeypatch.setattr(routes_openai, "LLM_CHUNK_SIZE", 10)
+    containers = make_containers(60)
+    urgent = sum(is_urgent(c) for c in containers)
+    urgent_chunks, regular_chunks = -(-urgent // 10), -(-(60 - urgent) // 10)
+    # Todos los prompts de urgentes fallan; los trozos normales responden bien
+    fake_llm.fail_if = all_urgent
+
+    with caplog.at_level(logging.WARNING, logger=routes_openai.__name__):
+        route, distances, total, _ = asyncio.run(call_openai_for_simulation(containers))
+
+    assert_valid(route, containers)
+    assert_local_distances(route, json.loads(distances), total)
+    assert sum("optimized locally" in r.getMessage() for r in caplog.records) == urgent_chunks
+    assert fake_llm.calls == regular_chunks + urgent_chunks * ATTEMPTS
+
+def test_failed_chunk_without_fallback_fails_the_run(fake_llm, monkeypatch):
+    monkeypatch.setattr(routes_openai, "LLM_CHUNK_SIZE", 10)
+    monkeypatch.setattr(routes_openai, "SIMULATION_LLM_FALLBACK", False)
+    fake_llm.fail_if = all_urgent
+    with pytest.raises(RuntimeError):
+        asyncio.run(call_openai_for_simulation(make_containers(60)))
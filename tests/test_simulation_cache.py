@@ -0,0 +1,116 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from config.db import AsyncSessionLocal, get_async_engine
+from models.simulation import Simulation, SimulationCacheEntry
+from utils import simulation_cache
+
+class RecordingBackend:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        self.data.clear()
+
+def container(guid, capacity=10):
+    return SimpleNamespace(guid=guid, latitude="-12.0", longitude="-77.0", capacity=capacity, limit=90)
+
+def test_fingerprint_ignores_order_but_not_fill_state_or_engine():
+    a, b = container("A"), container("B")
+    key = simulation_cache.fingerprint([a, b], "local")
+    assert simulation_cache.fingerprint([b, a], "local") == key
+    assert simulation_cache.fingerprint([a, container("B", capacity=11)], "local") != key
+    assert simulation_cache.fingerprint([a, b], "openai") != key
+
+def create(client, name, lat, capacity=10):
+    payload = {"name": name, "latitude": str(lat), "longitude": "-77.0", "capacity": capacity, "limit": 90}
+    return client.post("/api/v1/containers/", json=payload).json()["guid"]
+
+def test_same_containers_reuse_the_stored_simulation(client):
+    guids = [create(client, f"c{i}", -12.0 - i / 100) for i in range(4)]
+    body = {"container_guids": guids, "engine": "local"}
+    first = client.post("/api/v1/simulation/generate-simulation", json=body)
+    second = client.post("/api/v1/simulation/generate-simulation", json=body)
+    assert (first.status_code, first.headers["X-Simulation-Cache"]) == (201, "miss")
+    assert (second.status_code, second.headers["X-Simulation-Cache"]) == (200, "hit")
+    assert second.json() == first.json()
+
+    # Tras vaciar la copia en memoria, el acierto sale de la tabla simulation_cache
+    simulation_cache.memory_cache.clear()
+    assert client.post("/api/v1/simulation/generate-simulation", json=body).json()["id"] == first.json()["id"]
+
+    client.put(f"/api/v1/containers/{guids[0]}/capacity", json={"capacity": 80})
+    changed = client.post("/api/v1/simulation/generate-simulation", json=body)
+    assert changed.headers["X-Simulation-Cache"] == "miss"
+    assert changed.json()["id"] != first.json()["id"]
+    forced = client.post("/api/v1/simulation/generate-simulation", json={**body, "force": True})
+    assert forced.headers["X-Simulation-Cache"] == "miss"
+
+async def lookup_entry(expires_in: timedelta):
+    async with AsyncSessionLocal() as db:
+        simulation = Simulation(total_distance_km=1.0, duration_min=2.0)
+        db.add(simulation)
+        await db.flush()
+        db.add(SimulationCacheEntry(
+            fingerprint="f" * 64, simulation_id=simulation.id, expires_at=simulation_cache._now() + expires_in,
+        ))
+        await db.commit()
+        found = await simulation_cache.lookup(db, "f" * 64)
+    await get_async_engine().dispose()
+    return found
+
+def test_database_hit_keeps_only_the_remaining_ttl_in_memory(client, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(simulation_cache.memory_cache, "backend", backend)
+    assert asyncio.run(lookup_entry(timedelta(seconds=90))) is not None
+    assert 89 <= backend.ttls["f" * 64] <= 90
+
+def test_expired_database_entry_is_a_miss(client, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(simulation_cache.memory_cache, "backend", backend)
+    assert asyncio.run(lookup_entry(timedelta(seconds=-1))) is None
+    assert backend.data == {}
+
+async def store_racing(key: str):
+    # La otra petición guarda su entrada justo después de que esta comprobara que no había ninguna
+    async with AsyncSessionLocal() as db:
+        winner = Simulation(total_distance_km=1.0, duration_min=2.0)
+        loser = Simulation(total_distance_km=3.0, duration_min=4.0)
+        db.add_all([winner, loser])
+        await db.commit()
+    async with AsyncSessionLocal() as other:
+        other.add(SimulationCacheEntry(
+            fingerprint=key, simulation_id=winner.id, expires_at=simulation_cache._now() + timedelta(hours=1),
+        ))
+        await other.commit()
+    async with AsyncSessionLocal() as db:
+        db.add(loser)
+        original_get = db.get
+
+        async def missing(model, ident, **kw):
+            return None if model is SimulationCacheEntry else await original_get(model, ident, **kw)
+
+        db.get = missing
+        stored = await simulation_cache.store(db, key, loser)
+        # La simulación propia sigue utilizable para la respuesta
+        loaded = (loser.id, loser.total_distance_km, loser.created_at is not None)
+        kept = (await original_get(SimulationCacheEntry, key)).simulation_id
+    await get_async_engine().dispose()
+    return winner.id, loser.id, stored, loaded, kept
+
+def test_concurrent_store_keeps_the_first_entry(client):
+    winner, loser, stored, loaded, kept = asyncio.run(store_racing("r" * 64))
+    assert stored == kept == winner
+    assert loaded == (loser, 3.0, True)
+    assert simulation_cache.memory_cache.get("r" * 64) == winner
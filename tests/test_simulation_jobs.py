@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+import pytest
+from sqlalchemy import select
+from config.db import AsyncSessionLocal
+from models.simulation import Simulation
+from utils import simulation_jobs as jobs_module
+from utils.route import optimize_simulation
+from utils.simulation_jobs import SimulationJobQueue, WORKER_LOST_ERROR, simulation_jobs, utc_now
+
+@pytest.fixture
+def gate(monkeypatch):
+    # El motor espera a que la prueba abra la puerta: así se puede observar el job en "running"
+    opened = threading.Event()
+
+    async def engine(containers, engine=None):
+        while not opened.is_set():
+            await asyncio.sleep(0.01)
+        if getattr(opened, "error", None):
+            raise RuntimeError(opened.error)
+        return optimize_simulation(containers)
+
+    monkeypatch.setattr(jobs_module, "run_simulation_engine", engine)
+    return opened
+
+def create(client, count=3):
+    payload = lambda i: {"name": f"c{i}", "latitude": str(-12.0 - i / 100), "longitude": "-77.0",
+                         "capacity": 10, "limit": 90}
+    return [client.post("/api/v1/containers/", json=payload(i)).json()["guid"] for i in range(count)]
+
+def wait_for(client, job_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/v1/simulation/jobs/{job_id}").json()
+        if job["status"] == status or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+def submit(client, guids):
+    response = client.post("/api/v1/simulation/jobs", json={"container_guids": guids, "engine": "local"})
+    assert response.status_code == 202
+    return response.json()
+
+def test_job_goes_from_queued_to_running_to_completed(client, gate):
+    guids = create(client)
+    job = submit(client, guids)
+    assert job["status"] == "queued"
+    assert wait_for(client, job["id"], "running")["status"] == "running"
+    gate.set()
+    done = wait_for(client, job["id"], "completed")
+    assert done["status"] == "completed"
+    assert sorted(done["result"]["route"]) == sorted(guids)
+
+def test_engine_error_fails_the_job(client, gate):
+    gate.error = "engine exploded"
+    gate.set()
+    job = wait_for(client, submit(client, create(client))["id"], "failed")
+    assert (job["status"], job["error"]) == ("failed", "engine exploded")
+
+def test_running_job_can_be_cancelled(client, gate):
+    job = submit(client, create(client))
+    wait_for(client, job["id"], "running")
+    assert client.delete(f"/api/v1/simulation/jobs/{job['id']}").json()["status"] == "cancelled"
+    assert client.delete(f"/api/v1/simulation/jobs/{job['id']}").status_code == 409
+
+def test_full_queue_is_rejected(client, gate, monkeypatch):
+    monkeypatch.setattr(simulation_jobs, "max_pending", 1)
+    guids = create(client)
+    submit(client, guids)
+    response = client.post("/api/v1/simulation/jobs", json={"container_guids": guids})
+    assert response.status_code == 429
+    gate.set()
+
+async def restart_with(rows):
+    async with AsyncSessionLocal() as db:
+        db.add_all(rows)
+        await db.commit()
+    queue = SimulationJobQueue(stale_seconds=60, heartbeat_seconds=3600)
+    await queue.start()
+    await queue.stop()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Simulation.id, Simulation.status, Simulation.error).order_by(Simulation.id))
+        return result.all()
+
+def test_start_fails_jobs_left_behind_by_a_dead_worker(client):
+    old = utc_now() - timedelta(minutes=5)
+    job = lambda id, status, **kw: Simulation(id=id, total_distance_km=0, duration_min=0, status=status, **kw)
+    rows = client.portal.call(restart_with, [
+        job(1, "running", heartbeat_at=old),
+        job(2, "queued", heartbeat_at=None, created_at=old),
+        # Latido reciente: su worker sigue vivo
+        job(3, "running", heartbeat_at=utc_now()),
+        job(4, "completed", heartbeat_at=old),
+    ])
+    assert [tuple(r) for r in rows] == [
+        (1, "failed", WORKER_LOST_ERROR),
+        (2, "failed", WORKER_LOST_ERROR),
+        (3, "running", None),
+        (4, "completed", None),
+    ]
@@ -0,0 +1,84 @@
+import random
+import numpy as np
+from utils.distance import haversine_one_to_many
+from utils.spatial_index import SpatialIndex
+
+def make_points(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [(f"C{i:05d}", -12.05 + rng.uniform(-0.2, 0.2), -77.04 + rng.uniform(-0.2, 0.2)) for i in range(n)]
+
+def loaded(points, **kwargs) -> SpatialIndex:
+    index = SpatialIndex(**kwargs)
+    index.begin_load()
+    index.load(points)
+    return index
+
+def brute_force(points, lat, lon, radius_km):
+    distances = haversine_one_to_many(lat, lon, np.array([p[1] for p in points]), np.array([p[2] for p in points]))
+    return sorted((d, p[0]) for p, d in zip(points, distances) if d <= radius_km)
+
+def test_within_matches_a_full_scan():
+    points = make_points(2000)
+    index = loaded(points)
+    for radius in (0.5, 3, 15):
+        found = index.within(-12.05, -77.04, radius)
+        expected = brute_force(points, -12.05, -77.04, radius)
+        assert [g for g, _ in found] == [g for _, g in expected]
+        assert [d for _, d in found] == [float(d) for d, _ in expected]
+
+def test_nearest_grows_the_radius_until_k_points():
+    points = make_points(500)
+    index = loaded(points)
+    found = index.nearest(-12.3, -77.3, k=5, exclude="C00000")
+    expected = [g for _, g in brute_force(points, -12.3, -77.3, 1000) if g != "C00000"][:5]
+    assert [g for g, _ in found] == expected
+
+def test_upsert_moves_and_remove_deletes():
+    index = loaded([("A", -12.0, -77.0)])
+    index.upsert("A", -13.0, -78.0)
+    assert index.within(-12.0, -77.0, 1) == []
+    assert [g for g, _ in index.within(-13.0, -78.0, 1)] == ["A"]
+    index.remove("A")
+    assert len(index) == 0 and index.within(-13.0, -78.0, 1) == []
+
+def test_invalid_coordinates_are_skipped():
+    index = loaded([("A", None, None), ("B", "x", "-77"), ("C", "-12.0", "-77.0")])
+    assert len(index) == 1
+
+def test_writes_during_a_load_are_replayed():
+    index = SpatialIndex()
+    assert index.begin_load()
+    # Una segunda recarga simultánea se descarta
+    assert not index.begin_load()
+    index.upsert("NEW", -12.0, -77.0)
+    index.remove("OLD")
+    index.load([("OLD", -12.0, -77.0)])
+    assert [g for g, _ in index.within(-12.0, -77.0, 1)] == ["NEW"]
+
+def test_expires_after_ttl():
+    assert not SpatialIndex().fresh()
+    assert loaded([], ttl_seconds=60).fresh()
+    assert loaded([], ttl_seconds=0).fresh()
+    index = loaded([], ttl_seconds=60)
+    index.loaded_at -= 61
+    assert not index.fresh()
+
+def create(client, name, lat, lon) -> str:
+    payload = {"name": name, "latitude": str(lat), "longitude": str(lon), "capacity": 10, "limit": 90}
+    return client.post("/api/v1/containers/", json=payload).json()["guid"]
+
+def test_nearby_endpoint_gives_the_same_answer_from_sql_when_the_index_expires(client):
+    from utils.spatial_index import container_index
+
+    ref = create(client, "ref", -12.0, -77.0)
+    near = create(client, "near", -12.01, -77.0)
+    nearer = create(client, "nearer", -12.001, -77.0)
+    create(client, "far", -12.5, -77.0)
+
+    url = f"/api/v1/containers/get-nearby-containers/{ref}?radius_km=5"
+    from_index = [c["guid"] for c in client.get(url).json()]
+    container_index.loaded_at -= container_index.ttl_seconds + 1
+    from_sql = [c["guid"] for c in client.get(url).json()]
+    assert from_index == from_sql == [nearer, near]
+    # La consulta SQL programa la recarga del índice
+    assert container_index.fresh()
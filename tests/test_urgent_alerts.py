@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+import pytest
+from utils.alerts import alert_threshold, alert_transition, check_alert
+from utils.container_events import container_events
+from utils.urgent_index import UrgentIndex, urgent_index
+
+@pytest.mark.parametrize("capacity, active, expected", [
+    (79, False, None),
+    (80, False, "fired"),
+    (95, True, None),
+    # Dentro de la banda de histéresis sigue disparada
+    (75, True, None),
+    (74, True, "cleared"),
+    (74, False, None),
+])
+def test_alert_transition_with_hysteresis(capacity, active, expected):
+    assert alert_transition(capacity, 80, active, hysteresis=5) == expected
+
+def test_threshold_defaults_to_limit():
+    assert alert_threshold(None, 90) == 90
+    assert alert_threshold(70, 90) == 70
+
+def test_check_alert_fires_once_and_rearms():
+    container = SimpleNamespace(capacity=95, limit=90, alert_threshold=None, alert_active=False)
+    assert check_alert(container) == "fired" and container.alert_active
+    assert check_alert(container) is None
+    container.capacity = 10
+    assert check_alert(container) == "cleared" and not container.alert_active
+
+def test_urgent_index_orders_by_fill_and_follows_updates():
+    index = UrgentIndex()
+    index.begin_load()
+    index.load([("A", 95, 90), ("B", 99, 90), ("C", 10, 90)])
+    assert index.guids() == ["B", "A"]
+    index.update("C", 100, 90)
+    index.update("B", 10, 90)
+    index.remove("A")
+    assert index.guids() == ["C"]
+
+def test_urgent_index_replays_writes_made_during_a_load():
+    index = UrgentIndex(ttl_seconds=60)
+    index.begin_load()
+    index.update("NEW", 95, 90)
+    index.update("OLD", 10, 90)
+    index.load([("OLD", 95, 90)])
+    assert index.guids() == ["NEW"] and index.fresh()
+    index.loaded_at -= 61
+    assert not index.fresh()
+
+def create(client, capacity, limit=90):
+    payload = {"name": "c", "latitude": "-12.0", "longitude": "-77.0", "capacity": capacity, "limit": limit}
+    return client.post("/api/v1/containers/", json=payload).json()["guid"]
+
+def test_urgent_endpoint_from_index_and_from_sql(client):
+    fuller, full, _ = create(client, 99), create(client, 95), create(client, 10)
+    assert [c["guid"] for c in client.get("/api/v1/containers/urgent").json()] == [fuller, full]
+    urgent_index.loaded_at -= urgent_index.ttl_seconds + 1
+    assert [c["guid"] for c in client.get("/api/v1/containers/urgent").json()] == [fuller, full]
+
+def test_capacity_updates_fire_and_clear_one_alert_per_crossing(client, monkeypatch):
+    guid = create(client, 10)
+    alerts = []
+    monkeypatch.setattr(
+        container_events, "publish", lambda *events: alerts.extend(e["alert"] for e in events if e["type"] == "alert"),
+    )
+    for capacity in (92, 95, 88, 10, 91):
+        client.put(f"/api/v1/containers/{guid}/capacity", json={"capacity": capacity})
+    assert alerts == ["fired", "cleared", "fired"]
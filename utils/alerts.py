@@ -0,0 +1,23 @@
+from typing import Optional
+from config.settings import ALERT_HYSTERESIS
+
+def alert_threshold(threshold: Optional[int], limit: int) -> int:
+    # Sin umbral propio, el contenedor alerta al volverse urgente (capacity >= limit)
+    return int(limit) if threshold is None else int(threshold)
+
+def alert_transition(capacity: int, threshold: int, active: Optional[bool],
+                     hysteresis: int = ALERT_HYSTERESIS) -> Optional[str]:
+    # "fired" una sola vez al cruzar el umbral; "cleared" al bajar de threshold - hysteresis
+    if not active and capacity >= threshold:
+        return "fired"
+    if active and capacity < threshold - hysteresis:
+        return "cleared"
+    return None
+
+def check_alert(container) -> Optional[str]:
+    # Antes del commit: actualiza alert_active para que la transición se persista con la escritura
+    threshold = alert_threshold(container.alert_threshold, container.limit)
+    transition = alert_transition(int(container.capacity), threshold, container.alert_active)
+    if transition is not None:
+        container.alert_active = transition == "fired"
+    return transition
@@ -1,9 +1,39 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from config.settings import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+from utils.metrics import timed
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max = rounds: los hashes con otro coste se marcan para re-hash en el siguiente login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
+# bcrypt libera el GIL: un pool propio y acotado evita ocupar el threadpool de FastAPI y el event loop
+password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+@timed("bcrypt_hash")
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+@timed("bcrypt_verify")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+@timed("bcrypt_verify")
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # Devuelve (válida, nuevo_hash); nuevo_hash solo si el hash guardado usa otro coste o esquema
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(password_pool, hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.get_running_loop().run_in_executor(
+        password_pool, verify_and_update, plain_password, hashed_password
+    )
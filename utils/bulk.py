@@ -0,0 +1,71 @@
+import json
+from typing import Any, List, Tuple, Type
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+def chunked(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def describe_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"] for e in error.errors()
+    )
+
+async def _ndjson_items(request: Request):
+    # Lee el cuerpo por trozos sin cargar todo el stream en memoria antes de parsear
+    buffer = b""
+    index = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, line
+                index += 1
+    if buffer.strip():
+        yield index, buffer
+
+async def read_bulk_items(request: Request, schema: Type[BaseModel]) -> Tuple[List[Tuple[int, Any]], List[dict]]:
+    # Devuelve (índice, item validado) y los errores por item, en una sola pasada
+    valid, failed = [], []
+
+    def validate(index: int, raw: Any):
+        try:
+            valid.append((index, schema.model_validate(raw)))
+        except ValidationError as e:
+            guid = raw.get("guid") if isinstance(raw, dict) else None
+            failed.append({"index": index, "guid": guid, "error": describe_validation_error(e)})
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_MEDIA_TYPES:
+        async for index, line in _ndjson_items(request):
+            try:
+                validate(index, json.loads(line))
+            except json.JSONDecodeError as e:
+                failed.append({"index": index, "guid": None, "error": f"Invalid JSON: {e.msg}"})
+        return valid, failed
+
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON stream")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON stream")
+    for index, raw in enumerate(payload):
+        validate(index, raw)
+    return valid, failed
+
+def bulk_request_body(schema: Type[BaseModel]) -> dict:
+    item = schema.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": item}},
+                "application/x-ndjson": {"schema": item},
+            },
+        }
+    }
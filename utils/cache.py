@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from config.settings import CACHE_BACKEND, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, REDIS_URL
+
+class MemoryBackend:
+    # LRU en proceso con expiración por entrada; misma interfaz mínima que un cliente Redis
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ex: Optional[int] = None):
+        expires_at = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+class NullBackend:
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def set(self, key: str, value: str, ex: Optional[int] = None):
+        pass
+
+    def delete(self, *keys: str) -> int:
+        return 0
+
+    def flushdb(self):
+        pass
+
+class Cache:
+    # Serializa a JSON y cuenta aciertos/fallos; el backend puede ser MemoryBackend o un cliente Redis
+    def __init__(self, backend, ttl: int = CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.backend.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self.backend.set(key, json.dumps(value, default=str), ex=ttl or self.ttl)
+
+    def invalidate(self, *keys: str):
+        if keys:
+            self.backend.delete(*keys)
+
+    def clear(self):
+        self.backend.flushdb()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hits / total if total else 0.0}
+
+def build_cache_backend(name: str = CACHE_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        import redis
+
+        return redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+container_cache = Cache(build_cache_backend())
+
+def container_key(guid: str) -> str:
+    return f"container:{guid}"
+
+def status_key(status: str) -> str:
+    return f"containers:status:{status}"
@@ -0,0 +1,123 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, UTC
+from typing import Iterable, List, Optional, Set, Tuple
+from config.settings import CONTAINER_EVENTS_MAX_PENDING
+
+def container_event(guid: str, capacity: int, limit: int, status: str,
+                    latitude_deg: Optional[float], longitude_deg: Optional[float],
+                    changed: Iterable[str], was_urgent: bool) -> dict:
+    # Cada evento lleva el estado completo: el cliente no necesita pedir el contenedor tras recibirlo
+    return {
+        "type": "container",
+        "guid": guid,
+        "changed": sorted(changed),
+        "capacity": capacity,
+        "limit": limit,
+        "status": status,
+        "urgent": capacity >= limit,
+        "was_urgent": was_urgent,
+        "latitude_deg": latitude_deg,
+        "longitude_deg": longitude_deg,
+        "at": datetime.now(UTC).isoformat(),
+    }
+
+def event_for(container, changed: Iterable[str], was_urgent: bool) -> dict:
+    return container_event(
+        container.guid, int(container.capacity), int(container.limit), container.status,
+        container.latitude_deg, container.longitude_deg, changed, was_urgent,
+    )
+
+def alert_event(event: dict, transition: str, threshold: int) -> dict:
+    # Mismo estado que el evento del contenedor, con la transición de alerta ("fired"/"cleared")
+    return {**event, "type": "alert", "alert": transition, "threshold": threshold}
+
+class Subscription:
+    # Un buffer por cliente con un solo evento pendiente por contenedor y tipo (coalescencia por GUID)
+    def __init__(self, urgent_only: bool = False, bbox: Optional[Tuple[float, float, float, float]] = None,
+                 max_pending: int = CONTAINER_EVENTS_MAX_PENDING):
+        self.urgent_only = urgent_only
+        self.bbox = bbox
+        self.max_pending = max_pending
+        self.coalesced = 0
+        self.overflows = 0
+        self._pending: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._overflowed = False
+        self._ready = asyncio.Event()
+
+    def matches(self, event: dict) -> bool:
+        # urgent_only también recibe la salida de urgencia (was_urgent) para poder quitarlo de su lista
+        if self.urgent_only and not (event["urgent"] or event["was_urgent"]):
+            return False
+        if self.bbox is not None:
+            lat, lon = event["latitude_deg"], event["longitude_deg"]
+            min_lat, min_lon, max_lat, max_lon = self.bbox
+            if lat is None or lon is None or not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                return False
+        return True
+
+    def offer(self, event: dict):
+        if self._overflowed:
+            return
+        key = (event["type"], event["guid"])
+        previous = self._pending.get(key)
+        if previous is not None:
+            # Ráfaga sobre el mismo contenedor: queda el último estado con los cambios y la urgencia previa acumulados
+            self._pending[key] = {
+                **event,
+                "changed": sorted(set(previous["changed"]) | set(event["changed"])),
+                "was_urgent": previous["was_urgent"],
+            }
+            self.coalesced += 1
+        elif not self.matches(event):
+            return
+        elif len(self._pending) >= self.max_pending:
+            # Cliente demasiado lento: se descarta lo pendiente y se le pide recargar el estado completo
+            self._pending.clear()
+            self._overflowed = True
+            self.overflows += 1
+        else:
+            self._pending[key] = event
+        self._ready.set()
+
+    async def next_batch(self, timeout: float, window: float = 0.0) -> Optional[List[dict]]:
+        # None si no hubo eventos en `timeout` (el llamador envía un heartbeat)
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if window > 0:
+            await asyncio.sleep(window)
+        self._ready.clear()
+        if self._overflowed:
+            self._overflowed = False
+            return [{"type": "resync"}]
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+class ContainerEventBus:
+    # Pub/sub en proceso; publish se llama desde el event loop y nunca espera a los suscriptores
+    def __init__(self):
+        self._subscribers: Set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self, urgent_only: bool = False, bbox: Optional[Tuple[float, float, float, float]] = None) -> Subscription:
+        subscription = Subscription(urgent_only=urgent_only, bbox=bbox)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, *events: dict):
+        self.published += len(events)
+        for subscription in tuple(self._subscribers):
+            for event in events:
+                subscription.offer(event)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+container_events = ContainerEventBus()
@@ -0,0 +1,60 @@
+from typing import List, Literal, Optional
+from fastapi import HTTPException, Query, status
+from sqlalchemy import select
+from models.container import Container
+from schemas.container import ContainerResponse
+
+CONTAINER_FIELDS = list(ContainerResponse.model_fields)
+BBOX_DESCRIPTION = "Bounding box as min_lat,min_lon,max_lat,max_lon"
+
+def parse_bbox(bbox: Optional[str]):
+    if bbox is None:
+        return None
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bbox must be min_lat,min_lon,max_lat,max_lon")
+    return min_lat, min_lon, max_lat, max_lon
+
+def container_filters(
+    status_filter: Optional[Literal["active", "inactive"]] = Query(None, alias="status"),
+    isFavorite: Optional[bool] = Query(None),
+    above_limit: Optional[bool] = Query(None, description="true: capacity >= limit, false: capacity < limit"),
+    bbox: Optional[str] = Query(None, description=BBOX_DESCRIPTION),
+) -> dict:
+    return {"status": status_filter, "isFavorite": isFavorite, "above_limit": above_limit, "bbox": parse_bbox(bbox)}
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return CONTAINER_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in CONTAINER_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+    # guid siempre se incluye: es la clave del cursor
+    return ["guid"] + [f for f in requested if f != "guid"]
+
+def container_query(filters: Optional[dict] = None, columns: Optional[List[str]] = None,
+                    after: Optional[str] = None, limit: Optional[int] = None):
+    # Keyset sobre guid: estable y sin OFFSET
+    stmt = select(*(getattr(Container, c) for c in columns)) if columns else select(Container)
+    filters = filters or {}
+    if filters.get("status") is not None:
+        stmt = stmt.where(Container.status == filters["status"])
+    if filters.get("isFavorite") is not None:
+        stmt = stmt.where(Container.isFavorite == filters["isFavorite"])
+    if filters.get("above_limit") is not None:
+        urgent = Container.capacity >= Container.limit
+        stmt = stmt.where(urgent if filters["above_limit"] else ~urgent)
+    if filters.get("bbox") is not None:
+        min_lat, min_lon, max_lat, max_lon = filters["bbox"]
+        stmt = stmt.where(
+            Container.latitude_deg.between(min_lat, max_lat),
+            Container.longitude_deg.between(min_lon, max_lon),
+        )
+    if after is not None:
+        stmt = stmt.where(Container.guid > after)
+    stmt = stmt.order_by(Container.guid)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
@@ -0,0 +1,105 @@
+import logging
+import math
+import threading
+import numpy as np
+from typing import Iterable, Optional, Tuple
+from config.settings import DISTANCE_PROVIDER, ROAD_GRAPH_PATH
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371
+# Velocidad media supuesta en ciudad (30 km/h) cuando no hay tiempos por carretera
+MINUTES_PER_KM = 2
+
+def haversine(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_KM
+    phi1 = math.radians(float(lat1))
+    phi2 = math.radians(float(lat2))
+    d_phi = math.radians(float(lat2) - float(lat1))
+    d_lambda = math.radians(float(lon2) - float(lon1))
+    a = math.sin(d_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
+
+def _coordinate(point, key: str):
+    # Usa la columna numérica (latitude_deg/longitude_deg) si existe y está rellena
+    value = getattr(point, f"{key}_deg", None)
+    return getattr(point, key) if value is None else value
+
+def coordinates(points: Iterable, dtype=np.float64) -> Tuple[np.ndarray, np.ndarray]:
+    # Convierte lat/lon (string o numérico) de una sola vez, sin float() por par
+    points = list(points)
+    lats = np.array([_coordinate(p, "latitude") for p in points], dtype=dtype)
+    lons = np.array([_coordinate(p, "longitude") for p in points], dtype=dtype)
+    return lats, lons
+
+def _haversine_kernel(phi1, lam1, phi2, lam2, dtype):
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin((lam2 - lam1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).astype(dtype, copy=False)
+
+def haversine_one_to_many(lat, lon, lats, lons, dtype=np.float64) -> np.ndarray:
+    phi1 = np.radians(np.asarray(float(lat), dtype=dtype))
+    lam1 = np.radians(np.asarray(float(lon), dtype=dtype))
+    phi2 = np.radians(np.asarray(lats, dtype=dtype))
+    lam2 = np.radians(np.asarray(lons, dtype=dtype))
+    return _haversine_kernel(phi1, lam1, phi2, lam2, dtype)
+
+def haversine_pairwise(lats1, lons1, lats2, lons2, dtype=np.float64) -> np.ndarray:
+    # Distancia elemento a elemento entre dos listas de puntos de igual longitud
+    return _haversine_kernel(
+        np.radians(np.asarray(lats1, dtype=dtype)), np.radians(np.asarray(lons1, dtype=dtype)),
+        np.radians(np.asarray(lats2, dtype=dtype)), np.radians(np.asarray(lons2, dtype=dtype)), dtype,
+    )
+
+def haversine_matrix(lats, lons, lats2=None, lons2=None, dtype=np.float64) -> np.ndarray:
+    # Matriz n x m; sin segundo conjunto calcula la matriz cuadrada de todos contra todos
+    phi1 = np.radians(np.asarray(lats, dtype=dtype))
+    lam1 = np.radians(np.asarray(lons, dtype=dtype))
+    if lats2 is None:
+        phi2, lam2 = phi1, lam1
+    else:
+        phi2 = np.radians(np.asarray(lats2, dtype=dtype))
+        lam2 = np.radians(np.asarray(lons2, dtype=dtype))
+    return _haversine_kernel(phi1[:, None], lam1[:, None], phi2[None, :], lam2[None, :], dtype)
+
+def bounding_box(lat, lon, radius_km: float) -> Tuple[float, float, float, float]:
+    # (min_lat, max_lat, min_lon, max_lon) que contiene el círculo de radio radius_km
+    lat, lon = float(lat), float(lon)
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    d_lon = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return lat - d_lat, lat + d_lat, lon - d_lon, lon + d_lon
+
+class HaversineProvider:
+    # Distancia en línea recta y duración a MINUTES_PER_KM
+    name = "haversine"
+
+    def matrix(self, origins: Iterable, destinations: Optional[Iterable] = None) -> Tuple[np.ndarray, np.ndarray]:
+        lats, lons = coordinates(origins)
+        km = haversine_matrix(lats, lons, *(coordinates(destinations) if destinations is not None else (None, None)))
+        return km, km * MINUTES_PER_KM
+
+    def schedule(self, latitude, longitude):
+        return None
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_distance_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = HaversineProvider()
+            if DISTANCE_PROVIDER == "road" and ROAD_GRAPH_PATH:
+                from utils.road_network import RoadNetworkProvider, load_graph
+
+                try:
+                    _provider = RoadNetworkProvider(load_graph(ROAD_GRAPH_PATH))
+                except (OSError, ValueError, SyntaxError, KeyError) as e:
+                    logger.warning("Road graph %s not loaded, using haversine: %s", ROAD_GRAPH_PATH, e)
+        return _provider
+
+def schedule_distance_update(latitude, longitude):
+    # Contenedor creado o movido; si el grafo aún no se ha cargado no hay nada que actualizar (se calcula al usarlo)
+    if _provider is not None and latitude is not None and longitude is not None:
+        _provider.schedule(latitude, longitude)
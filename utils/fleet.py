@@ -0,0 +1,239 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence
+import numpy as np
+from config.settings import FLEET_PROCESS_WORKERS, FLEET_MAX_CLUSTER_SIZE, FLEET_PARALLEL_MIN_CONTAINERS
+from utils.distance import coordinates, get_distance_provider
+from utils.route import optimize_route, is_urgent
+from utils.metrics import timed
+
+FLEET_METHODS = ("kmeans", "sweep")
+KMEANS_ITERATIONS = 20
+KM_PER_DEG_LAT = 110.57
+KM_PER_DEG_LON = 111.32
+
+class Stop(NamedTuple):
+    # Copia ligera (y serializable para el pool de procesos) de un contenedor
+    guid: str
+    latitude_deg: float
+    longitude_deg: float
+    capacity: int
+    limit: int
+
+def to_stops(containers) -> List[Stop]:
+    lats, lons = coordinates(containers)
+    return [
+        Stop(c.guid, float(lat), float(lon), int(c.capacity), int(c.limit))
+        for c, lat, lon in zip(containers, lats, lons)
+    ]
+
+def project(stops: Sequence[Stop]) -> np.ndarray:
+    # Equirectangular en km alrededor de la latitud media: suficiente para agrupar a escala de ciudad
+    lats = np.array([s.latitude_deg for s in stops], dtype=np.float64)
+    lons = np.array([s.longitude_deg for s in stops], dtype=np.float64)
+    scale = math.cos(math.radians(float(lats.mean()))) if len(lats) else 1.0
+    return np.column_stack((lons * KM_PER_DEG_LON * scale, lats * KM_PER_DEG_LAT))
+
+def _kmeans_plus_plus(points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = [points[rng.integers(len(points))]]
+    nearest = ((points - centroids[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = nearest.sum()
+        index = rng.choice(len(points), p=nearest / total) if total > 0 else rng.integers(len(points))
+        centroids.append(points[index])
+        nearest = np.minimum(nearest, ((points - points[index]) ** 2).sum(axis=1))
+    return np.array(centroids, dtype=np.float64)
+
+def _capacitated_assign(distances: np.ndarray, weights: np.ndarray, capacities: np.ndarray,
+                        priority: np.ndarray) -> np.ndarray:
+    # Greedy: primero los prioritarios y, entre ellos, los que más pierden si no van a su cluster más cercano
+    preference = np.argsort(distances, axis=1)
+    rows = np.arange(len(distances))
+    regret = distances[rows, preference[:, 1]] - distances[rows, preference[:, 0]]
+    remaining = capacities.astype(np.float64)
+    labels = np.full(len(distances), -1, dtype=np.intp)
+    for i in np.lexsort((-regret, ~priority)):
+        for cluster in preference[i]:
+            if weights[i] <= remaining[cluster]:
+                labels[i] = cluster
+                remaining[cluster] -= weights[i]
+                break
+    return labels
+
+def kmeans_partition(points: np.ndarray, k: int, weights: Optional[np.ndarray] = None,
+                     capacities: Optional[np.ndarray] = None, priority: Optional[np.ndarray] = None,
+                     seed: int = 0) -> np.ndarray:
+    # Etiqueta de cluster por punto; con capacidades, -1 = no cabe en ningún cluster
+    n = len(points)
+    if n == 0:
+        return np.zeros(0, dtype=np.intp)
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    priority = np.zeros(n, dtype=bool) if priority is None else np.asarray(priority, dtype=bool)
+    if k == 1 or n == 1:
+        centroids = points.mean(axis=0, keepdims=True)
+        if k > 1:
+            centroids = np.repeat(centroids, k, axis=0)
+    else:
+        centroids = _kmeans_plus_plus(points, min(k, n), np.random.default_rng(seed))
+        if len(centroids) < k:
+            centroids = np.vstack([centroids, np.repeat(centroids[:1], k - len(centroids), axis=0)])
+
+    labels = None
+    for _ in range(KMEANS_ITERATIONS):
+        distances = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        if capacities is None:
+            new_labels = np.argmin(distances, axis=1)
+        elif k == 1:
+            # Un solo cluster: entran en orden de prioridad hasta llenarlo
+            new_labels = np.full(n, -1, dtype=np.intp)
+            order = np.lexsort((distances[:, 0], ~priority))
+            new_labels[order[np.cumsum(weights[order]) <= capacities[0]]] = 0
+        else:
+            new_labels = _capacitated_assign(distances, weights, capacities, priority)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        assigned = labels >= 0
+        counts = np.bincount(labels[assigned], minlength=k)
+        for axis in range(2):
+            sums = np.bincount(labels[assigned], points[assigned, axis], minlength=k)
+            # Un cluster vacío conserva su centroide anterior
+            centroids[:, axis] = np.where(counts > 0, sums / np.maximum(counts, 1), centroids[:, axis])
+    return labels
+
+def sweep_partition(points: np.ndarray, k: int, weights: Optional[np.ndarray] = None,
+                    capacities: Optional[np.ndarray] = None) -> np.ndarray:
+    # Barrido angular alrededor del centroide: sectores consecutivos, uno por vehículo
+    n = len(points)
+    if n == 0:
+        return np.zeros(0, dtype=np.intp)
+    center = points.mean(axis=0)
+    order = np.argsort(np.arctan2(points[:, 1] - center[1], points[:, 0] - center[0]), kind="stable")
+    labels = np.full(n, -1, dtype=np.intp)
+    if capacities is None:
+        # Sin capacidades: mismo número de paradas por vehículo
+        for vehicle, sector in enumerate(np.array_split(order, k)):
+            labels[sector] = vehicle
+        return labels
+
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    vehicle, load = 0, 0.0
+    for i in order:
+        while vehicle < k and load + weights[i] > capacities[vehicle]:
+            vehicle, load = vehicle + 1, 0.0
+        if vehicle == k:
+            break
+        labels[i] = vehicle
+        load += weights[i]
+    return labels
+
+def geographic_chunks(stops: List[Stop], max_size: int) -> List[List[Stop]]:
+    # Trozos geográficamente compactos de como mucho max_size paradas
+    if len(stops) <= max_size:
+        return [stops] if stops else []
+    k = math.ceil(len(stops) / max_size)
+    labels = kmeans_partition(project(stops), k, capacities=np.full(k, max_size))
+    return [[s for s, label in zip(stops, labels) if label == c] for c in range(k) if (labels == c).any()]
+
+def optimize_chunk(stops: List[Stop]):
+    # Se ejecuta en el pool de procesos: solo recibe y devuelve tipos serializables
+    return optimize_route(stops)
+
+# El pool se crea al primer plan grande; "spawn" evita heredar el estado del servidor (hilos, conexiones)
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=FLEET_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+def _optimize_chunks(chunks: List[List[Stop]]) -> list:
+    if len(chunks) < 2 or sum(len(c) for c in chunks) < FLEET_PARALLEL_MIN_CONTAINERS:
+        return [optimize_chunk(chunk) for chunk in chunks]
+    # Los trozos grandes primero para equilibrar el trabajo entre procesos
+    order = sorted(range(len(chunks)), key=lambda i: -len(chunks[i]))
+    results = dict(zip(order, get_pool().map(optimize_chunk, [chunks[i] for i in order])))
+    return [results[i] for i in range(len(chunks))]
+
+def _reverse_legs(legs: List[dict]) -> List[dict]:
+    return [{"from": leg["to"], "to": leg["from"], "distance_km": leg["distance_km"]} for leg in reversed(legs)]
+
+def stitch(pieces: List[tuple], urgent_count: int, stops_by_guid: dict) -> tuple:
+    # Une rutas parciales: urgentes primero (desde el trozo con el urgente más lleno), luego el resto,
+    # siempre hacia el extremo de trozo más cercano y recorriéndolo al revés si conviene
+    provider = get_distance_provider()
+    route, legs, total, duration = [], [], 0.0, 0.0
+    for group in (pieces[:urgent_count], pieces[urgent_count:]):
+        remaining = list(group)
+        while remaining:
+            if not route:
+                piece = max(remaining, key=lambda p: max(stops_by_guid[g].capacity for g in p[0]))
+                remaining.remove(piece)
+                route, legs, total, duration = list(piece[0]), list(piece[1]), piece[2], piece[3]
+                continue
+            ends = [stops_by_guid[p[0][0]] for p in remaining] + [stops_by_guid[p[0][-1]] for p in remaining]
+            gaps, gap_minutes = provider.matrix([stops_by_guid[route[-1]]], ends)
+            best = int(np.argmin(gaps[0]))
+            piece_route, piece_legs, piece_total, piece_duration = remaining.pop(best % len(remaining))
+            # Un trozo recorrido al revés cuesta lo mismo solo si la matriz es simétrica; por carretera es una aproximación
+            if best >= len(ends) // 2:
+                piece_route, piece_legs = piece_route[::-1], _reverse_legs(piece_legs)
+            gap = float(gaps[0, best])
+            legs.append({"from": route[-1], "to": piece_route[0], "distance_km": round(gap, 2)})
+            route += piece_route
+            legs += piece_legs
+            total += gap + piece_total
+            duration += float(gap_minutes[0, best]) + piece_duration
+    return route, legs, round(total, 2), round(duration, 2)
+
+def partition(stops: List[Stop], vehicles: int, capacities: Optional[List[int]] = None,
+              method: str = "kmeans") -> np.ndarray:
+    # La carga de cada contenedor es su llenado actual (capacity); los urgentes entran antes si no cabe todo
+    points = project(stops)
+    weights = np.array([s.capacity for s in stops], dtype=np.float64)
+    limits = None if capacities is None else np.asarray(capacities, dtype=np.float64)
+    if method == "sweep":
+        return sweep_partition(points, vehicles, weights, limits)
+    return kmeans_partition(points, vehicles, weights, limits, priority=np.array([is_urgent(s) for s in stops]))
+
+@timed("fleet_plan")
+def plan_fleet(containers, vehicles: int, capacities: Optional[List[int]] = None,
+               method: str = "kmeans") -> tuple:
+    # -> (rutas por vehículo con paradas, guids sin vehículo por falta de capacidad)
+    stops = sorted(to_stops(containers), key=lambda s: s.guid)
+    stops_by_guid = {s.guid: s for s in stops}
+    labels = partition(stops, vehicles, capacities, method)
+
+    # Cada vehículo se divide en trozos de como mucho FLEET_MAX_CLUSTER_SIZE (urgentes y resto por separado)
+    chunks, layout = [], []
+    for vehicle in range(vehicles):
+        assigned = [s for s, label in zip(stops, labels) if label == vehicle]
+        if not assigned:
+            continue
+        urgent = geographic_chunks([s for s in assigned if is_urgent(s)], FLEET_MAX_CLUSTER_SIZE)
+        regular = geographic_chunks([s for s in assigned if not is_urgent(s)], FLEET_MAX_CLUSTER_SIZE)
+        layout.append((vehicle, len(chunks), len(urgent), len(urgent) + len(regular), sum(s.capacity for s in assigned)))
+        chunks += urgent + regular
+
+    results = _optimize_chunks(chunks)
+    routes = []
+    for vehicle, first, urgent_count, count, load in layout:
+        route, legs, total, duration = stitch(results[first:first + count], urgent_count, stops_by_guid)
+        routes.append({
+            "vehicle": vehicle,
+            "load": load,
+            "route": route,
+            "legs": legs,
+            "total_distance_km": total,
+            "duration_min": duration,
+        })
+    unassigned = [s.guid for s, label in zip(stops, labels) if label < 0]
+    return routes, unassigned
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import FORECAST_WINDOW_HOURS
+from models.container import Container
+from models.reading import CapacityRollup
+from utils.readings import utc_now
+
+# Una bajada de al menos estos puntos entre horas consecutivas se toma como vaciado
+EMPTYING_DROP = 10
+
+def fill_rates(groups: np.ndarray, hours: np.ndarray, capacity: np.ndarray, n: int) -> np.ndarray:
+    # Pendiente (puntos/hora) por mínimos cuadrados de cada grupo, solo desde su último vaciado; NaN si no hay datos
+    if len(groups) == 0:
+        return np.full(n, np.nan)
+    order = np.lexsort((hours, groups))
+    groups, hours, capacity = groups[order], hours[order], capacity[order]
+
+    same = np.r_[False, groups[1:] == groups[:-1]]
+    emptied = same & (np.r_[0.0, np.diff(capacity)] <= -EMPTYING_DROP)
+    segment = np.cumsum(emptied)
+    last_segment = np.zeros(n, dtype=segment.dtype)
+    np.maximum.at(last_segment, groups, segment)
+    keep = segment == last_segment[groups]
+    groups, hours, capacity = groups[keep], hours[keep], capacity[keep]
+
+    count = np.bincount(groups, minlength=n)
+    sum_t = np.bincount(groups, hours, minlength=n)
+    sum_y = np.bincount(groups, capacity, minlength=n)
+    sum_tt = np.bincount(groups, hours * hours, minlength=n)
+    sum_ty = np.bincount(groups, hours * capacity, minlength=n)
+    denominator = count * sum_tt - sum_t ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (count * sum_ty - sum_t * sum_y) / denominator
+    slope[(count < 2) | (denominator <= 1e-12)] = np.nan
+    return slope
+
+def hours_to_limit(capacity: np.ndarray, limit: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hours = np.where(rate > 0, (limit - capacity) / rate, np.nan)
+    return np.where(capacity >= limit, 0.0, hours)
+
+async def forecast_containers(db: AsyncSession, guids: Optional[List[str]] = None,
+                              now: Optional[datetime] = None) -> List[dict]:
+    now = now or utc_now()
+    stmt = select(Container.guid, Container.capacity, Container.limit)
+    if guids is not None:
+        stmt = stmt.where(Container.guid.in_(guids))
+    containers = (await db.execute(stmt)).all()
+    if not containers:
+        return []
+    index = {c.guid: i for i, c in enumerate(containers)}
+
+    stmt = select(
+        CapacityRollup.container_guid, CapacityRollup.bucket_start, CapacityRollup.sum_capacity, CapacityRollup.samples,
+    ).where(
+        CapacityRollup.resolution == "hour",
+        CapacityRollup.bucket_start >= now - timedelta(hours=FORECAST_WINDOW_HOURS),
+    )
+    if guids is not None:
+        stmt = stmt.where(CapacityRollup.container_guid.in_(guids))
+    rollups = [r for r in (await db.execute(stmt)).all() if r.container_guid in index]
+
+    # Cada hora cuenta como un punto (media de la hora, en el centro del bucket)
+    groups = np.array([index[r.container_guid] for r in rollups], dtype=np.intp)
+    hours = np.array([(r.bucket_start - now).total_seconds() / 3600 + 0.5 for r in rollups], dtype=np.float64)
+    averages = np.array([r.sum_capacity / r.samples for r in rollups], dtype=np.float64)
+
+    rate = fill_rates(groups, hours, averages, len(containers))
+    capacity = np.array([c.capacity for c in containers], dtype=np.float64)
+    limit = np.array([c.limit for c in containers], dtype=np.float64)
+    eta = hours_to_limit(capacity, limit, rate)
+
+    return [
+        {
+            "guid": c.guid,
+            "capacity": int(c.capacity),
+            "limit": int(c.limit),
+            "fill_rate_per_hour": None if np.isnan(rate[i]) else round(float(rate[i]), 3),
+            "hours_to_limit": None if np.isnan(eta[i]) else round(float(eta[i]), 2),
+        } for i, c in enumerate(containers)
+    ]
+
+async def containers_due_within(db: AsyncSession, hours: float) -> List[dict]:
+    due = [f for f in await forecast_containers(db) if f["hours_to_limit"] is not None and f["hours_to_limit"] <= hours]
+    return sorted(due, key=lambda f: (f["hours_to_limit"], f["guid"]))
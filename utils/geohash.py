@@ -0,0 +1,40 @@
+from typing import Optional
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~4.8 m x 4.8 m
+
+def encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+def parse_coordinate(value) -> Optional[float]:
+    # Coordenadas guardadas como texto: None si vienen vacías o no son numéricas
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def geohash_for(lat: Optional[float], lon: Optional[float]) -> Optional[str]:
+    return encode(lat, lon) if lat is not None and lon is not None else None
+
+def coordinate_fields(latitude, longitude) -> dict:
+    # Columnas numéricas derivadas de latitude/longitude, para inserts/updates masivos sin ORM
+    lat, lon = parse_coordinate(latitude), parse_coordinate(longitude)
+    return {"latitude_deg": lat, "longitude_deg": lon, "geohash": geohash_for(lat, lon)}
@@ -1,13 +1,95 @@
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderUnavailable, GeocoderTimedOut
+import asyncio
+import re
+import time
+import unicodedata
+from typing import Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import (
+    GEOCODER_TIMEOUT_SECONDS, GEOCODER_MIN_INTERVAL_SECONDS, GEOCODER_DOMAIN, GEOCODER_SCHEME,
+    GEOCODE_CACHE_MAX_ENTRIES, GEOCODE_MISS_TTL_SECONDS,
+)
+from models.geocode import GeocodeCacheEntry
+from utils.cache import Cache, MemoryBackend
+from utils.metrics import timed
 
-geolocator = Nominatim(user_agent="wastetrack-app")
+_geolocator = None
 
-def get_coordinates_from_address(address: str):
-    try:
-        location = geolocator.geocode(address)
-        if location:
-            return str(location.latitude), str(location.longitude)
-    except (GeocoderUnavailable, GeocoderTimedOut):
-        pass
+def get_geolocator():
+    # geopy se importa al primer uso o en el pre-calentamiento: el arranque de cada worker no lo paga
+    global _geolocator
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+
+        _geolocator = Nominatim(user_agent="wastetrack-app", domain=GEOCODER_DOMAIN, scheme=GEOCODER_SCHEME)
+    return _geolocator
+
+# Las coordenadas de una dirección no cambian: en memoria duran un día, en la tabla no caducan
+memory_cache = Cache(MemoryBackend(GEOCODE_CACHE_MAX_ENTRIES), ttl=24 * 3600)
+
+class RateLimiter:
+    # Separa las llamadas al menos min_interval segundos dentro del proceso
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_at = time.monotonic() + self.min_interval
+
+rate_limiter = RateLimiter(GEOCODER_MIN_INTERVAL_SECONDS)
+
+def normalize_address(address: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKC", address or "").casefold()
+    text = re.sub(r"\s*,\s*", ", ", text)
+    text = re.sub(r"\s+", " ", text).strip(" ,.;")
+    return text[:255]
+
+@timed("geocode")
+def _geocode_remote(address: str) -> Tuple[Optional[str], Optional[str]]:
+    location = get_geolocator().geocode(address, timeout=GEOCODER_TIMEOUT_SECONDS)
+    if location:
+        return str(location.latitude), str(location.longitude)
     return None, None
+
+async def geocode_address(db: AsyncSession, address: str) -> Tuple[Optional[str], Optional[str]]:
+    key = normalize_address(address)
+    if not key:
+        return None, None
+
+    cached = memory_cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    entry = await db.get(GeocodeCacheEntry, key)
+    if entry is not None:
+        coords = (entry.latitude, entry.longitude)
+        memory_cache.set(key, coords)
+        return coords
+
+    from geopy.exc import GeocoderServiceError
+
+    await rate_limiter.wait()
+    try:
+        coords = await run_in_threadpool(_geocode_remote, address)
+    except GeocoderServiceError:
+        # Timeout, cuota o servicio caído: no se cachea para reintentar en la próxima petición
+        return None, None
+
+    if coords[0] is None:
+        memory_cache.set(key, coords, ttl=GEOCODE_MISS_TTL_SECONDS)
+        return coords
+
+    try:
+        await db.merge(GeocodeCacheEntry(address_key=key, latitude=coords[0], longitude=coords[1]))
+        await db.commit()
+    except IntegrityError:
+        # Otra petición guardó la misma dirección a la vez
+        await db.rollback()
+    memory_cache.set(key, coords)
+    return coords
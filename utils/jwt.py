@@ -2,9 +2,8 @@ from datetime import datetime, timedelta
 from jose import JWTError, jwt
 import os
 
-from dotenv import load_dotenv
-
-load_dotenv()
+# config.settings carga el .env una sola vez por proceso
+import config.settings
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
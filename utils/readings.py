@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, UTC
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import delete, insert, select, update, false, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import AsyncSessionLocal
+from config.settings import (
+    READINGS_BATCH_SIZE, READINGS_FLUSH_SECONDS, READINGS_COMPACT_SECONDS, READINGS_RETENTION_DAYS,
+)
+from models.reading import CapacityReading, CapacityRollup, RollupState, ROLLUP_RESOLUTIONS
+
+logger = logging.getLogger(__name__)
+
+COMPACT_BATCH_SIZE = 5000
+# Si la BD no responde, el buffer conserva como mucho esta cantidad de lotes
+MAX_BUFFERED_BATCHES = 20
+BUCKET_UNITS = {"hour": "h", "day": "D"}
+
+def utc_now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+def naive_utc(value: datetime) -> datetime:
+    # Las lecturas y agregados se guardan como DATETIME sin zona (UTC)
+    return value.astimezone(UTC).replace(tzinfo=None) if value.tzinfo else value
+
+def history_query(guid: str, resolution: str, start: datetime, end: datetime):
+    return (
+        select(CapacityRollup)
+        .where(
+            CapacityRollup.container_guid == guid,
+            CapacityRollup.resolution == resolution,
+            CapacityRollup.bucket_start >= start,
+            CapacityRollup.bucket_start < end,
+        )
+        .order_by(CapacityRollup.bucket_start)
+    )
+
+def aggregate(guids: np.ndarray, recorded_at: np.ndarray, capacities: np.ndarray, resolution: str) -> List[dict]:
+    # Agrupa por (contenedor, bucket); dentro de cada grupo se ordena por recorded_at, así que la última es la más reciente
+    buckets = recorded_at.astype(f"datetime64[{BUCKET_UNITS[resolution]}]")
+    names, codes = np.unique(guids, return_inverse=True)
+    order = np.lexsort((recorded_at, buckets, codes))
+    codes, buckets, capacities, recorded_at = codes[order], buckets[order], capacities[order], recorded_at[order]
+
+    starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (buckets[1:] != buckets[:-1])])
+    ends = np.r_[starts[1:], len(codes)]
+    samples = ends - starts
+    sums = np.add.reduceat(capacities, starts)
+    mins = np.minimum.reduceat(capacities, starts)
+    maxs = np.maximum.reduceat(capacities, starts)
+    lasts = capacities[ends - 1]
+    last_times = recorded_at[ends - 1].astype("datetime64[us]").tolist()
+    bucket_starts = buckets[starts].astype("datetime64[us]").tolist()
+
+    return [
+        {
+            "container_guid": str(names[codes[s]]),
+            "bucket_start": bucket_starts[i],
+            "samples": int(samples[i]),
+            "sum_capacity": int(sums[i]),
+            "min_capacity": int(mins[i]),
+            "max_capacity": int(maxs[i]),
+            "last_capacity": int(lasts[i]),
+            "last_recorded_at": last_times[i],
+        } for i, s in enumerate(starts)
+    ]
+
+async def _merge_rollups(db: AsyncSession, resolution: str, groups: List[dict]):
+    result = await db.execute(select(CapacityRollup).where(
+        CapacityRollup.resolution == resolution,
+        CapacityRollup.container_guid.in_({g["container_guid"] for g in groups}),
+        CapacityRollup.bucket_start.between(min(g["bucket_start"] for g in groups), max(g["bucket_start"] for g in groups)),
+    ))
+    existing = {(r.container_guid, r.bucket_start): r for r in result.scalars()}
+    for group in groups:
+        rollup = existing.get((group["container_guid"], group["bucket_start"]))
+        if rollup is None:
+            db.add(CapacityRollup(resolution=resolution, **group))
+            continue
+        rollup.samples += group["samples"]
+        rollup.sum_capacity += group["sum_capacity"]
+        rollup.min_capacity = min(rollup.min_capacity, group["min_capacity"])
+        rollup.max_capacity = max(rollup.max_capacity, group["max_capacity"])
+        if rollup.last_recorded_at is None or group["last_recorded_at"] >= rollup.last_recorded_at:
+            rollup.last_capacity = group["last_capacity"]
+            rollup.last_recorded_at = group["last_recorded_at"]
+
+async def compact(db: AsyncSession, batch_size: int = COMPACT_BATCH_SIZE) -> int:
+    # Un lote de lecturas sin agregar -> agregados por hora y día. La fila de estado bloqueada evita que dos workers
+    # agreguen el mismo lote; la marca compacted hace que las lecturas confirmadas tarde (ids menores) no se pierdan
+    state = await db.get(RollupState, 1, with_for_update=True)
+    if state is None:
+        state = RollupState(id=1, last_reading_id=0)
+        db.add(state)
+        await db.flush()
+
+    result = await db.execute(
+        select(CapacityReading.id, CapacityReading.container_guid, CapacityReading.capacity, CapacityReading.recorded_at)
+        .where(CapacityReading.compacted == false())
+        .order_by(CapacityReading.id)
+        .limit(batch_size)
+    )
+    rows = result.all()
+    if rows:
+        guids = np.array([r.container_guid for r in rows])
+        recorded_at = np.array([r.recorded_at for r in rows], dtype="datetime64[us]")
+        capacities = np.array([r.capacity for r in rows], dtype=np.int64)
+        for resolution in ROLLUP_RESOLUTIONS:
+            await _merge_rollups(db, resolution, aggregate(guids, recorded_at, capacities, resolution))
+        await db.execute(
+            update(CapacityReading).where(CapacityReading.id.in_([r.id for r in rows])).values(compacted=True)
+        )
+        state.last_reading_id = max(state.last_reading_id, rows[-1].id)
+
+    # El detalle ya agregado se conserva READINGS_RETENTION_DAYS; lo no agregado nunca se borra
+    await db.execute(delete(CapacityReading).where(
+        CapacityReading.compacted == true(),
+        CapacityReading.recorded_at < utc_now() - timedelta(days=READINGS_RETENTION_DAYS),
+    ))
+    await db.commit()
+    return len(rows)
+
+async def compact_all() -> int:
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            done = await compact(db)
+        total += done
+        if done < COMPACT_BATCH_SIZE:
+            return total
+
+class ReadingRecorder:
+    # Buffer en memoria: las escrituras de capacidad no esperan a la tabla de lecturas
+    def __init__(self, batch_size: int = READINGS_BATCH_SIZE, flush_seconds: float = READINGS_FLUSH_SECONDS,
+                 compact_seconds: float = READINGS_COMPACT_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.compact_seconds = compact_seconds
+        self.dropped = 0
+        self._buffer: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._flushes = set()
+
+    def record(self, guid: str, capacity, recorded_at: Optional[datetime] = None):
+        self._buffer.append({"container_guid": guid, "capacity": int(capacity), "recorded_at": recorded_at or utc_now()})
+        self._ensure_task()
+        if len(self._buffer) >= self.batch_size:
+            # Referencia fuerte hasta que termine: el loop solo guarda referencias débiles a las tareas
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def _ensure_task(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._stopping = asyncio.Event()
+            self._task = loop.create_task(self._run(self._stopping))
+
+    async def flush(self) -> int:
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(CapacityReading), rows)
+                await db.commit()
+        except Exception:
+            # Se reintenta en el siguiente volcado, descartando lo más antiguo si el buffer crece demasiado
+            self._buffer[:0] = rows
+            overflow = len(self._buffer) - self.batch_size * MAX_BUFFERED_BATCHES
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.dropped += overflow
+            raise
+        return len(rows)
+
+    async def _run(self, stopping: asyncio.Event):
+        last_compact = time.monotonic()
+        while True:
+            try:
+                # stop() hace el último volcado
+                await asyncio.wait_for(stopping.wait(), self.flush_seconds)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+                if time.monotonic() - last_compact >= self.compact_seconds:
+                    await compact_all()
+                    last_compact = time.monotonic()
+            except Exception:
+                logger.exception("Capacity readings flush/compact failed")
+
+    async def stop(self):
+        # Sin cancelar: un volcado interrumpido ya habría sacado sus filas del buffer y se perderían.
+        # Se avisa al loop y se esperan los volcados en curso (pueden fallar y devolver sus filas) antes del último
+        loop = asyncio.get_running_loop()
+        task, self._task = self._task, None
+        if task is not None and task.get_loop() is loop:
+            self._stopping.set()
+        pending = [t for t in (task, *self._flushes) if t is not None and t.get_loop() is loop]
+        await asyncio.gather(*pending, return_exceptions=True)
+        await self.flush()
+
+readings = ReadingRecorder()
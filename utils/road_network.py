@@ -0,0 +1,399 @@
+import bz2
+import gzip
+import hashlib
+import heapq
+import math
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from config.db import SessionLocal
+from config.settings import ROAD_MATRIX_CACHE_ROWS
+from models.road import RoadDistance
+from utils.distance import coordinates, haversine_matrix, haversine_pairwise, MINUTES_PER_KM
+
+# Velocidad (km/h) por tipo de vía; las que no aparecen no son transitables para el camión
+HIGHWAY_SPEEDS_KMH = {
+    "motorway": 90, "motorway_link": 50,
+    "trunk": 70, "trunk_link": 40,
+    "primary": 50, "primary_link": 35,
+    "secondary": 40, "secondary_link": 30,
+    "tertiary": 35, "tertiary_link": 30,
+    "unclassified": 30, "road": 30, "residential": 25,
+    "service": 15, "living_street": 10,
+}
+# Filas por inserción y orígenes por consulta al cargar/guardar la matriz
+MATRIX_CHUNK_SIZE = 500
+# Nodos comparados a la vez al ajustar puntos al grafo (memoria: SNAP_CHUNK_SIZE x nodos)
+SNAP_CHUNK_SIZE = 256
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+def _speed(tags: dict) -> Optional[float]:
+    speed = HIGHWAY_SPEEDS_KMH.get(tags.get("highway"))
+    if speed is None:
+        return None
+    maxspeed = tags.get("maxspeed", "").split(" ")[0]
+    return float(maxspeed) if maxspeed.replace(".", "", 1).isdigit() else float(speed)
+
+def _is_oneway(tags: dict) -> bool:
+    return tags.get("oneway") in ("yes", "true", "1", "-1") or tags.get("highway") == "motorway" or \
+        tags.get("junction") == "roundabout"
+
+def parse_osm(path: str) -> Tuple[Dict[int, Tuple[float, float]], List[tuple]]:
+    # Extracto .osm (XML, opcionalmente .gz/.bz2) -> coordenadas de nodos y tramos (desde, hasta, km/h, sentido único)
+    nodes, ways = {}, []
+    refs, tags = [], {}
+    for _, element in ET.iterparse(_open(path), events=("end",)):
+        if element.tag == "node":
+            nodes[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+        elif element.tag == "nd":
+            refs.append(int(element.get("ref")))
+        elif element.tag == "tag":
+            tags[element.get("k")] = element.get("v")
+        elif element.tag == "way":
+            speed = _speed(tags)
+            if speed is not None and len(refs) > 1:
+                # oneway=-1: sentido único contrario al del dibujo
+                if tags.get("oneway") == "-1":
+                    refs.reverse()
+                oneway = _is_oneway(tags)
+                ways.extend((a, b, speed, oneway) for a, b in zip(refs, refs[1:]))
+            refs, tags = [], {}
+        elif element.tag == "relation":
+            refs, tags = [], {}
+        if element.tag in ("node", "way", "relation"):
+            element.clear()
+    return nodes, ways
+
+def _csr(sources: np.ndarray, targets: np.ndarray, n: int, *weights: np.ndarray):
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    # Listas de Python: en el bucle de Dijkstra son bastante más rápidas que indexar arrays de NumPy
+    return [offsets.tolist(), targets[order].tolist()] + [w[order].tolist() for w in weights]
+
+class RoadGraph:
+    def __init__(self, graph_id: str, node_ids: np.ndarray, lats: np.ndarray, lons: np.ndarray,
+                 edge_from: np.ndarray, edge_to: np.ndarray, edge_km: np.ndarray, edge_min: np.ndarray):
+        self.graph_id = graph_id
+        self.node_ids = node_ids
+        self.lats = lats
+        self.lons = lons
+        self.edges = (edge_from, edge_to, edge_km, edge_min)
+        n = len(node_ids)
+        self._forward = _csr(edge_from, edge_to, n, edge_min, edge_km)
+        self._reverse = _csr(edge_to, edge_from, n, edge_min, edge_km)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @classmethod
+    def from_osm(cls, path: str, graph_id: str) -> "RoadGraph":
+        nodes, ways = parse_osm(path)
+        # Los extractos recortados conservan vías que salen del área con referencias a nodos ausentes
+        ways = [w for w in ways if w[0] in nodes and w[1] in nodes]
+        used = sorted({a for a, *_ in ways} | {b for _, b, *_ in ways})
+        index = {node: i for i, node in enumerate(used)}
+        node_ids = np.array(used, dtype=np.int64)
+        lats = np.array([nodes[n][0] for n in used], dtype=np.float64)
+        lons = np.array([nodes[n][1] for n in used], dtype=np.float64)
+
+        a = np.array([index[w[0]] for w in ways], dtype=np.int64)
+        b = np.array([index[w[1]] for w in ways], dtype=np.int64)
+        speed = np.array([w[2] for w in ways], dtype=np.float64)
+        oneway = np.array([w[3] for w in ways], dtype=bool)
+        km = haversine_pairwise(lats[a], lons[a], lats[b], lons[b])
+        minutes = km / speed * 60
+
+        two_way = ~oneway
+        edge_from = np.concatenate((a, b[two_way]))
+        edge_to = np.concatenate((b, a[two_way]))
+        return cls(
+            graph_id, node_ids, lats, lons, edge_from, edge_to,
+            np.concatenate((km, km[two_way])), np.concatenate((minutes, minutes[two_way])),
+        )
+
+    def save(self, path: str):
+        np.savez(
+            path, graph_id=np.array(self.graph_id), node_ids=self.node_ids, lats=self.lats, lons=self.lons,
+            edge_from=self.edges[0], edge_to=self.edges[1], edge_km=self.edges[2], edge_min=self.edges[3],
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        with np.load(path) as data:
+            return cls(
+                str(data["graph_id"]), data["node_ids"], data["lats"], data["lons"],
+                data["edge_from"], data["edge_to"], data["edge_km"], data["edge_min"],
+            )
+
+    def snap(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Nodo más cercano a cada punto y distancia (km) hasta él
+        nodes = np.empty(len(lats), dtype=np.intp)
+        for start in range(0, len(lats), SNAP_CHUNK_SIZE):
+            chunk = slice(start, start + SNAP_CHUNK_SIZE)
+            scale = np.cos(np.radians(lats[chunk]))[:, None]
+            d = (self.lats[None, :] - lats[chunk, None]) ** 2 + ((self.lons[None, :] - lons[chunk, None]) * scale) ** 2
+            nodes[chunk] = np.argmin(d, axis=1)
+        return nodes, haversine_pairwise(lats, lons, self.lats[nodes], self.lons[nodes])
+
+    def dijkstra(self, source: int, targets: Set[int], reverse: bool = False) -> Dict[int, Tuple[float, float]]:
+        # Camino más rápido desde source (o hacia source con reverse) -> {nodo: (km, minutos)}; para en cuanto llega a todos
+        offsets, heads, weights, lengths = self._reverse if reverse else self._forward
+        best = {source: 0.0}
+        km = {source: 0.0}
+        heap = [(0.0, source)]
+        pending = set(targets)
+        settled = set()
+        found = {}
+        while heap and pending:
+            minutes, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if node in pending:
+                pending.discard(node)
+                found[node] = (km[node], minutes)
+            for edge in range(offsets[node], offsets[node + 1]):
+                head = heads[edge]
+                candidate = minutes + weights[edge]
+                if candidate < best.get(head, math.inf):
+                    best[head] = candidate
+                    km[head] = km[node] + lengths[edge]
+                    heapq.heappush(heap, (candidate, head))
+        return found
+
+def graph_fingerprint(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def load_graph(path: str) -> RoadGraph:
+    # El grafo procesado se guarda junto al extracto (.npz) y se reutiliza mientras el extracto no cambie
+    cached = path + ".npz"
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path):
+        return RoadGraph.load(cached)
+    graph = RoadGraph.from_osm(path, graph_fingerprint(path))
+    try:
+        graph.save(cached)
+    except OSError:
+        pass
+    return graph
+
+class RoadNetworkProvider:
+    # Matriz contenedor-contenedor por carretera. Los pares se guardan por nodo del grafo en road_distances:
+    # un contenedor nuevo o movido solo obliga a calcular los pares de su nodo
+    name = "road"
+
+    def __init__(self, graph: RoadGraph, session_factory=SessionLocal, max_rows: int = ROAD_MATRIX_CACHE_ROWS):
+        self.graph = graph
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.known_nodes: Set[int] = set()
+        # LRU de filas nodo origen -> {nodo destino: (km, minutos) o None}. El lock solo protege el diccionario:
+        # las lecturas de BD y Dijkstra se hacen fuera para no serializar las peticiones
+        self._rows: "OrderedDict[int, Dict[int, tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._updates = ThreadPoolExecutor(max_workers=1, thread_name_prefix="road-matrix")
+
+    def matrix(self, origins: Iterable, destinations: Optional[Iterable] = None) -> Tuple[np.ndarray, np.ndarray]:
+        origins = list(origins)
+        o_lats, o_lons = coordinates(origins)
+        o_nodes, o_offsets = self.graph.snap(o_lats, o_lons)
+        if destinations is None:
+            d_lats, d_lons, d_nodes, d_offsets = o_lats, o_lons, o_nodes, o_offsets
+        else:
+            d_lats, d_lons = coordinates(list(destinations))
+            d_nodes, d_offsets = self.graph.snap(d_lats, d_lons)
+        rows = self.ensure(o_nodes.tolist(), d_nodes.tolist())
+
+        km = np.full((len(o_nodes), len(d_nodes)), np.nan)
+        minutes = np.full_like(km, np.nan)
+        for i, a in enumerate(o_nodes.tolist()):
+            row = rows[a]
+            for j, b in enumerate(d_nodes.tolist()):
+                km[i, j], minutes[i, j] = row.get(b) or (np.nan, np.nan)
+        # Del contenedor al nodo más cercano y del nodo al contenedor, a la velocidad por defecto
+        access = o_offsets[:, None] + d_offsets[None, :]
+        km += access
+        minutes += access * MINUTES_PER_KM
+
+        # Sin camino entre ambos nodos: línea recta
+        missing = np.isnan(km)
+        if missing.any():
+            straight = haversine_matrix(o_lats, o_lons, d_lats, d_lons)
+            km[missing] = straight[missing]
+            minutes[missing] = straight[missing] * MINUTES_PER_KM
+        if destinations is None:
+            np.fill_diagonal(km, 0.0)
+            np.fill_diagonal(minutes, 0.0)
+        return km, minutes
+
+    def ensure(self, sources: List[int], targets: List[int]) -> Dict[int, Dict[int, tuple]]:
+        # Devuelve las filas de sources con todos los targets; las filas siguen siendo válidas aunque salgan del LRU
+        wanted = set(targets)
+        sources = set(sources)
+        with self._lock:
+            self.known_nodes.update(sources)
+            self.known_nodes.update(wanted)
+            rows = {source: self._cached(source) for source in sources}
+        rows.update(self._load_rows([source for source, row in rows.items() if row is None]))
+
+        # Dos peticiones pueden calcular el mismo par a la vez: mismo resultado, _store tolera el duplicado
+        computed = []
+        for source, row in rows.items():
+            need = [target for target in wanted if target not in row]
+            if not need:
+                continue
+            found = self.graph.dijkstra(source, set(need))
+            computed.extend((source, target, found.get(target)) for target in need)
+        with self._lock:
+            for source, target, value in computed:
+                rows[source][target] = value
+            for source, row in rows.items():
+                rows[source] = self._remember(source, row)
+        self._store(computed)
+        return rows
+
+    def _cached(self, source: int) -> Optional[Dict[int, tuple]]:
+        row = self._rows.get(source)
+        if row is not None:
+            self._rows.move_to_end(source)
+        return row
+
+    def _remember(self, source: int, row: Dict[int, tuple]) -> Dict[int, tuple]:
+        # Con self._lock. Si otro hilo guardó la fila mientras tanto, se combinan
+        cached = self._rows.get(source)
+        if cached is not None and cached is not row:
+            cached.update(row)
+            row = cached
+        self._rows[source] = row
+        self._rows.move_to_end(source)
+        while len(self._rows) > self.max_rows:
+            self._rows.popitem(last=False)
+        return row
+
+    def schedule(self, latitude, longitude):
+        # Contenedor creado o movido: calcula en segundo plano los pares de su nodo con los ya conocidos
+        node = int(self.graph.snap(np.array([float(latitude)]), np.array([float(longitude)]))[0][0])
+        if node not in self.known_nodes:
+            return self._updates.submit(self._add_node, node)
+        return None
+
+    def _add_node(self, node: int):
+        with self._lock:
+            others = set(self.known_nodes) - {node}
+            self.known_nodes.add(node)
+        # Lo ya guardado se consulta en road_distances: las filas de los demás nodos pueden no estar en memoria
+        outgoing_known = self._load_rows([node])[node]
+        incoming_known = self._load_incoming(node, others)
+        outgoing = self.graph.dijkstra(node, others - outgoing_known.keys())
+        incoming = self.graph.dijkstra(node, others - incoming_known, reverse=True)
+        computed = [(node, node, (0.0, 0.0))] if node not in outgoing_known else []
+        for other in others:
+            if other not in outgoing_known:
+                computed.append((node, other, outgoing.get(other)))
+            if other not in incoming_known:
+                computed.append((other, node, incoming.get(other)))
+        with self._lock:
+            for source, target, value in computed:
+                if source == node:
+                    outgoing_known[target] = value
+                elif source in self._rows:
+                    self._rows[source][target] = value
+            self._remember(node, outgoing_known)
+        self._store(computed)
+
+    def _load_rows(self, sources: List[int]) -> Dict[int, Dict[int, tuple]]:
+        # Los node_ids del grafo están ordenados: id OSM -> índice con searchsorted
+        node_ids = self.graph.node_ids
+        rows = {s: {} for s in sources}
+        if not sources:
+            return rows
+        ids = [int(node_ids[s]) for s in sources]
+        with self.session_factory() as db:
+            for start in range(0, len(ids), MATRIX_CHUNK_SIZE):
+                result = db.execute(
+                    select(RoadDistance.from_node, RoadDistance.to_node, RoadDistance.distance_km, RoadDistance.duration_min)
+                    .where(RoadDistance.graph_id == self.graph.graph_id, RoadDistance.from_node.in_(ids[start:start + MATRIX_CHUNK_SIZE]))
+                )
+                for from_id, to_id, km, minutes in result:
+                    source, target = np.searchsorted(node_ids, (from_id, to_id)).tolist()
+                    rows[source][target] = None if km is None else (km, minutes)
+        return rows
+
+    def _load_incoming(self, node: int, sources: Set[int]) -> Set[int]:
+        # De sources, los que ya tienen guardado el par (source, node); por clave primaria, sin recorrer la tabla
+        node_ids = self.graph.node_ids
+        ids = [int(node_ids[s]) for s in sources]
+        found = []
+        with self.session_factory() as db:
+            for start in range(0, len(ids), MATRIX_CHUNK_SIZE):
+                found += db.execute(
+                    select(RoadDistance.from_node)
+                    .where(RoadDistance.graph_id == self.graph.graph_id, RoadDistance.from_node.in_(ids[start:start + MATRIX_CHUNK_SIZE]),
+                           RoadDistance.to_node == int(node_ids[node]))
+                ).scalars().all()
+        return set(np.searchsorted(node_ids, found).tolist()) if found else set()
+
+    def _store(self, computed: List[tuple]):
+        if not computed:
+            return
+        node_ids = self.graph.node_ids
+        rows = [
+            {
+                "graph_id": self.graph.graph_id,
+                "from_node": int(node_ids[source]),
+                "to_node": int(node_ids[target]),
+                "distance_km": None if value is None else value[0],
+                "duration_min": None if value is None else value[1],
+            } for source, target, value in computed
+        ]
+        with self.session_factory() as db:
+            for start in range(0, len(rows), MATRIX_CHUNK_SIZE):
+                chunk = rows[start:start + MATRIX_CHUNK_SIZE]
+                try:
+                    db.execute(insert(RoadDistance), chunk)
+                    db.commit()
+                except IntegrityError:
+                    # Otro proceso guardó parte de estos pares (mismo resultado): se insertan solo los que faltan
+                    db.rollback()
+                    for row in chunk:
+                        try:
+                            db.execute(insert(RoadDistance), [row])
+                            db.commit()
+                        except IntegrityError:
+                            db.rollback()
+
+    def close(self):
+        self._updates.shutdown(wait=True)
+
+def precompute_matrix() -> int:
+    # Calcula y guarda de una vez la matriz de todos los contenedores (p. ej. tras cargar un extracto nuevo)
+    from models.container import Container
+    from utils.distance import get_distance_provider
+
+    provider = get_distance_provider()
+    if provider.name != "road":
+        raise RuntimeError("DISTANCE_PROVIDER=road and a loadable ROAD_GRAPH_PATH are required")
+    with SessionLocal() as db:
+        containers = db.execute(select(Container.guid, Container.latitude, Container.longitude,
+                                       Container.latitude_deg, Container.longitude_deg)).all()
+    provider.matrix(containers)
+    return len(containers)
+
+if __name__ == "__main__":
+    print(f"Road distance matrix ready for {precompute_matrix()} containers")
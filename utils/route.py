@@ -1,33 +1,137 @@
-import math
+import json
+import numpy as np
 from typing import List, Tuple
 from models.container import Container
+from utils.distance import get_distance_provider
+from utils.metrics import timed
 
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371
-    phi1 = math.radians(float(lat1))
-    phi2 = math.radians(float(lat2))
-    d_phi = math.radians(float(lat2) - float(lat1))
-    d_lambda = math.radians(float(lon2) - float(lon1))
-    a = math.sin(d_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+MAX_IMPROVEMENT_MOVES = 2
+OR_OPT_SEGMENT_LENGTHS = (1, 2, 3)
+EPSILON = 1e-9
 
-def generate_optimal_route(containers: List[Container]) -> Tuple[List[str], float, float]:
-    # Ordenar por menor capacidad
-    ordered = sorted(containers, key=lambda c: c.capacity)
+def is_urgent(container) -> bool:
+    return int(container.capacity) >= int(container.limit)
+
+def _nearest_neighbour(dist: np.ndarray, nodes: List[int], start: int) -> List[int]:
+    remaining = np.array([n for n in nodes if n != start], dtype=np.intp)
+    route = [start]
+    current = start
+    while remaining.size:
+        k = int(np.argmin(dist[current, remaining]))
+        current = int(remaining[k])
+        route.append(current)
+        remaining = np.delete(remaining, k)
+    return route
+
+def _best_two_opt(ordered: np.ndarray, edges: np.ndarray, lower: np.ndarray):
+    # ordered = dist reordenada según la ruta; delta[i - 1, j - 1] al invertir route[i..j], 1 <= i < j <= n - 1
+    n = len(ordered)
+    after = np.zeros((n - 1, n - 1))
+    after[:, :-1] = ordered[1:, 2:]
+    delta = ordered[:-1, 1:] + after - edges[:-1, None] - edges[None, 1:]
+    delta[lower] = np.inf
+    flat = int(np.argmin(delta))
+    i, j = divmod(flat, n - 1)
+    return float(delta[i, j]), i + 1, j + 1
+
+def _best_or_opt(ordered: np.ndarray, edges: np.ndarray, length: int):
+    # Mueve route[i:i + length] justo después de route[k] (k = n - 1 es el final de la ruta)
+    n = len(ordered)
+    starts = np.arange(1, n - length + 1)
+    ends = starts + length - 1
+
+    removal_gain = ordered[starts - 1, starts] + edges[ends]
+    has_next = ends + 1 < n
+    removal_gain[has_next] -= ordered[starts[has_next] - 1, ends[has_next] + 1]
+
+    insert_cost = ordered[:, starts].T - edges[None, :]
+    insert_cost[:, :-1] += ordered[ends, 1:]
+    positions = np.arange(n)[None, :]
+    insert_cost[(positions >= starts[:, None] - 1) & (positions <= ends[:, None])] = np.inf
+
+    delta = insert_cost - removal_gain[:, None]
+    flat = int(np.argmin(delta))
+    row, k = divmod(flat, n)
+    return float(delta[row, k]), int(starts[row]), k
+
+def _improve(dist: np.ndarray, route: np.ndarray) -> np.ndarray:
+    lower = np.tri(len(route) - 1, dtype=bool)
+    for _ in range(MAX_IMPROVEMENT_MOVES * len(route)):
+        ordered = dist[np.ix_(route, route)]
+        # edges[k] = route[k] -> route[k + 1]; la ruta es abierta, así que el último tramo vale 0
+        edges = np.append(np.diagonal(ordered, 1), 0.0)
+        gain, i, j = _best_two_opt(ordered, edges, lower)
+        if gain < -EPSILON:
+            route[i:j + 1] = route[i:j + 1][::-1].copy()
+            continue
 
-    # Calcular distancia total de la ruta
-    total_distance = 0.0
-    for i in range(len(ordered) - 1):
-        c1 = ordered[i]
-        c2 = ordered[i + 1]
-        if c1.latitude and c1.longitude and c2.latitude and c2.longitude:
-            total_distance += haversine(c1.latitude, c1.longitude, c2.latitude, c2.longitude)
+        best = min(
+            (_best_or_opt(ordered, edges, length) + (length,)
+             for length in OR_OPT_SEGMENT_LENGTHS if length < len(route) - 1),
+            default=(0.0, 0, 0, 0),
+        )
+        gain, i, k, length = best
+        if gain >= -EPSILON:
+            break
+        segment = route[i:i + length].copy()
+        rest = np.delete(route, np.s_[i:i + length])
+        route = np.insert(rest, k + 1 if k < i else k + 1 - length, segment)
+    return route
 
-    # Estimar duración (2 min/km)
-    estimated_duration = total_distance * 2
+def _optimize_path(dist: np.ndarray, nodes: List[int], start: int) -> List[int]:
+    route = np.array(_nearest_neighbour(dist, nodes, start), dtype=np.intp)
+    if len(route) < 3:
+        return route.tolist()
+    return _improve(dist, route).tolist()
 
-    # Obtener lista de GUIDs ordenados
-    route_guids = [c.guid for c in ordered]
+def _priority_order(containers: List[Container], dist: np.ndarray) -> List[int]:
+    indices = range(len(containers))
+    by_capacity = lambda i: (-int(containers[i].capacity), containers[i].guid)
+    urgent = sorted((i for i in indices if is_urgent(containers[i])), key=by_capacity)
+    regular = sorted((i for i in indices if not is_urgent(containers[i])), key=by_capacity)
+
+    # La ruta arranca en el urgente de mayor capacidad; ningún no urgente va antes de un urgente
+    order = _optimize_path(dist, urgent, urgent[0]) if urgent else []
+    if regular:
+        if order:
+            anchor = order[-1]
+            order += _optimize_path(dist, [anchor] + regular, anchor)[1:]
+        else:
+            order = _optimize_path(dist, regular, regular[0])
+    return order
+
+def route_summary(ordered: List[Container], order: List[int], dist: np.ndarray, minutes: np.ndarray):
+    # (guids, tramos, km, minutos) de un orden de visita sobre la matriz de `ordered`
+    legs = [
+        {
+            "from": ordered[a].guid,
+            "to": ordered[b].guid,
+            "distance_km": round(float(dist[a, b]), 2),
+        } for a, b in zip(order, order[1:])
+    ]
+    total_distance = float(sum(dist[a, b] for a, b in zip(order, order[1:])))
+    duration = float(sum(minutes[a, b] for a, b in zip(order, order[1:])))
+
+    route_guids = [ordered[i].guid for i in order]
+    return route_guids, legs, round(total_distance, 2), round(duration, 2)
+
+@timed("optimizer")
+def optimize_route(containers: List[Container]) -> Tuple[List[str], List[dict], float, float]:
+    ordered = sorted(containers, key=lambda c: c.guid)
+    if not ordered:
+        return [], [], 0.0, 0.0
+
+    dist, minutes = get_distance_provider().matrix(ordered)
+
+    # Por carretera la matriz puede ser asimétrica (sentido único): 2-opt invierte tramos, así que se optimiza sobre la media
+    order = _priority_order(ordered, (dist + dist.T) / 2)
+    return route_summary(ordered, order, dist, minutes)
+
+def generate_optimal_route(containers: List[Container]) -> Tuple[List[str], float, float]:
+    route_guids, _, total_distance, estimated_duration = optimize_route(containers)
+    return route_guids, total_distance, estimated_duration
 
-    return route_guids, round(total_distance, 2), round(estimated_duration, 2)
+def optimize_simulation(containers: List[Container]):
+    # Misma forma que call_openai_for_simulation: (route, distances_json, total_km, duration_min)
+    route_guids, legs, total_distance, duration = optimize_route(containers)
+    return route_guids, json.dumps(legs), total_distance, duration
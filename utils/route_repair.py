@@ -0,0 +1,115 @@
+import json
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+import numpy as np
+from utils.distance import get_distance_provider
+from utils.route import is_urgent, route_summary
+
+# Por debajo de esta fracción de paradas válidas la respuesta no se repara: se reintenta
+MIN_VALID_FRACTION = 0.5
+
+def parse_route_ids(content: str) -> list:
+    # Acepta {"route": [...]} o una lista suelta, con o sin bloque ```json
+    cleaned = re.sub(r"^```(?:json)?|```$", "", content.strip()).strip()
+    start = min((i for i in (cleaned.find("{"), cleaned.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise ValueError("No JSON in model response")
+    try:
+        data, _ = json.JSONDecoder().raw_decode(cleaned[start:])
+    except json.JSONDecodeError:
+        return _truncated_route(cleaned[start:])
+    route = data.get("route") if isinstance(data, dict) else data
+    if not isinstance(route, list):
+        raise ValueError("Model response has no route list")
+    return route
+
+def _truncated_route(text: str) -> list:
+    # Stream cortado a mitad de la lista: se aprovechan los ids completos y repair_order inserta el resto
+    start = text.find("[")
+    if start < 0:
+        raise ValueError("Truncated model response has no route list")
+    body = text[start + 1:]
+    end = body.find("]")
+    items = body[:end].split(",") if end >= 0 else body.split(",")[:-1]
+    try:
+        return [json.loads(item) for item in items if item.strip()]
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unreadable model response: {e.msg}") from e
+
+def _resolve(item, count: int, by_guid: dict) -> Optional[int]:
+    # El prompt identifica cada contenedor por su posición; se aceptan también los GUID
+    if isinstance(item, bool):
+        return None
+    if isinstance(item, (int, float)) and float(item).is_integer():
+        index = int(item)
+    elif isinstance(item, str) and item.strip().isdigit():
+        index = int(item.strip())
+    elif isinstance(item, str):
+        return by_guid.get(item.strip())
+    else:
+        return None
+    return index if 0 <= index < count else None
+
+def _cheapest_insertion(group: List[int], node: int, anchor: Optional[int], dist: np.ndarray):
+    # Posición que menos alarga el tramo; anchor es la parada anterior al grupo (si la hay)
+    best, best_cost = 0, np.inf
+    for position in range(len(group) + 1):
+        before = group[position - 1] if position else anchor
+        after = group[position] if position < len(group) else None
+        cost = (dist[before, node] if before is not None else 0.0) + (dist[node, after] if after is not None else 0.0)
+        if before is not None and after is not None:
+            cost -= dist[before, after]
+        if cost < best_cost:
+            best, best_cost = position, cost
+    group.insert(best, node)
+
+def repair_order(ordered: list, proposed: list, dist: np.ndarray) -> Tuple[List[int], Counter]:
+    # Orden propuesto por el modelo -> orden válido: sin duplicados ni desconocidos, urgentes primero empezando
+    # por el más lleno, y los que falten insertados donde menos cuesten. Devuelve también qué se corrigió
+    count = len(ordered)
+    if not count:
+        return [], Counter()
+    by_guid = {c.guid: i for i, c in enumerate(ordered)}
+    repairs = Counter()
+    seen, order = set(), []
+    for item in proposed:
+        index = _resolve(item, count, by_guid)
+        if index is None:
+            repairs["unknown"] += 1
+        elif index in seen:
+            repairs["duplicate"] += 1
+        else:
+            seen.add(index)
+            order.append(index)
+    if len(order) < count * MIN_VALID_FRACTION:
+        raise ValueError(f"Model route covers {len(order)} of {count} containers")
+
+    urgent = [i for i in order if is_urgent(ordered[i])]
+    regular = [i for i in order if not is_urgent(ordered[i])]
+    if order != urgent + regular:
+        repairs["priority"] += 1
+
+    by_capacity = lambda i: (-int(ordered[i].capacity), ordered[i].guid)
+    for index in sorted((i for i in range(count) if i not in seen), key=by_capacity):
+        repairs["missing"] += 1
+        if is_urgent(ordered[index]):
+            _cheapest_insertion(urgent, index, None, dist)
+        else:
+            _cheapest_insertion(regular, index, urgent[-1] if urgent else None, dist)
+
+    # La ruta empieza en el contenedor más lleno (urgente si hay alguno)
+    first = urgent or regular
+    top = min(first, key=by_capacity)
+    if first[0] != top:
+        first.remove(top)
+        first.insert(0, top)
+        repairs["start"] += 1
+    return urgent + regular, repairs
+
+def repair_route(containers: list, proposed: list) -> Tuple[List[str], List[dict], float, float, Counter]:
+    # Distancias, total y duración se recalculan en local: del modelo solo se usa el orden
+    ordered = sorted(containers, key=lambda c: c.guid)
+    dist, minutes = get_distance_provider().matrix(ordered)
+    order, repairs = repair_order(ordered, proposed, dist)
+    return (*route_summary(ordered, order, dist, minutes), repairs)
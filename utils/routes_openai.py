@@ -1,116 +1,155 @@
-import os
-import openai
+import asyncio
+import logging
+import random
 import json
-from openai import OpenAIError
-from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from config.settings import (
+    OPEN_API_KEY, OPENAI_MODEL, OPENAI_API_BASE, LLM_TIMEOUT_SECONDS, LLM_IDLE_TIMEOUT_SECONDS, LLM_MAX_RETRIES, LLM_RETRY_BASE_SECONDS,
+    LLM_CHUNK_SIZE, LLM_CHUNK_CONCURRENCY, SIMULATION_LLM_FALLBACK,
+)
+from utils.distance import coordinates
+from utils.fleet import to_stops, geographic_chunks, stitch
+from utils.metrics import span
+from utils.route import optimize_route, is_urgent
+from utils.route_repair import parse_route_ids, repair_route
 
-load_dotenv()
-openai.api_key = os.getenv("OPEN_API_KEY")
+logger = logging.getLogger(__name__)
 
-def build_simulation_prompt(containers):
-    data = [
-        {
-            "guid": c.guid,
-            "capacity": int(c.capacity),
-            "limit": int(c.limit),
-            "latitude": float(c.latitude),
-            "longitude": float(c.longitude),
-        } for c in containers
-    ]
+SYSTEM_PROMPT = "You order waste-collection stops. Reply with JSON only."
 
-    # Pre‑compute urgent list for clarity 
-    urgent = [c for c in data if c["capacity"] >= c["limit"]]
-    urgent_sorted = sorted(urgent, key=lambda x: (-x["capacity"], x["guid"]))
-    urgent_guids = [u["guid"] for u in urgent_sorted]
+_openai = None
 
-    print(f"[DEBUG] urgent_guids = {urgent_guids}")
+def get_openai():
+    # openai (y aiohttp) tarda ~0.2 s en importarse: se carga al primer uso o en el pre-calentamiento, no al arrancar
+    global _openai
+    if _openai is None:
+        import openai
 
-    total = len(data)
+        openai.api_key = OPEN_API_KEY
+        _openai = openai
+    return _openai
 
+def retryable_errors() -> tuple:
+    # Errores transitorios: se reintentan. El resto (clave inválida, petición mal formada...) falla a la primera
+    error = get_openai().error
     return (
-        "You are optimizing a municipal waste‑collection route (Traveling Salesman Problem, TSP).\n"
-        "\n"
-        "Each container record provides: guid, latitude, longitude, capacity (0‑100) and limit (0‑100).\n"
-        "A container is **urgent** as soon as its own capacity ≥ its own limit (note the ≥).\n"
-        "\n"
-        "PRIORITY RULES (must hold in the final route):\n"
-        "  A. **All urgent containers FIRST**, before any non‑urgent.\n"
-        "  B. **Within urgent**, order by capacity DESC (ties → nearest by haversine to the previous stop).\n"
-        "  C. **After urgent**, place remaining containers by capacity DESC with distance as tiebreaker.\n\n"
-        "The route MUST start at the urgent container with the HIGHEST capacity.\n"
-        "Do NOT reorder a non‑urgent stop ahead of an urgent one under any circumstance.\n\n"
-        "\n"
-        "OPTIMISATION GOAL\n"
-        "Minimise total distance (haversine) subject to the rules above.\n"
-        "\n"
-        "OUTPUT – return STRICT JSON (no markdown):\n"
-        "{\n"
-        "  \"route\": [guid1, guid2, ...],               # every GUID appears exactly once\n"
-        "  \"distances\": [                             # one entry for each consecutive pair\n"
-        "    {\"from\": guid1, \"to\": guid2, \"distance_km\": float},\n"
-        "    ...\n"
-        "  ],\n"
-        "  \"total_distance_km\": float,                # sum of the above, round 2 dec\n"
-        "  \"duration_min\": float                     # assume constant truck speed if needed\n"
-        "}\n"
-        "\n"
-        "RULE CHECK (self‑validate **before** responding):\n"
-        "  1. urgent = [containers with capacity ≥ limit]  # see list below.\n"
-        "  2. Assert urgent appear contiguously at the BEGINNING of route, in capacity‑DESC order.\n"
-        "  3. Assert no non‑urgent precedes an urgent.\n"
-        "  4. distances is a JSON ARRAY and len == len(route)-1.\n"
-        "  5. abs(sum(distances[*].distance_km) − total_distance_km) ≤ 0.01.\n"
-        "  6. route contains every GUID exactly once.\n"
-        "\n"
-        f"DATA SET HAS {total} CONTAINERS.  Urgent containers (capacity ≥ limit) → {urgent_guids}\n\n"
-        f"{json.dumps(data, indent=2)}"
+        error.Timeout, error.APIConnectionError, error.RateLimitError, error.ServiceUnavailableError, error.TryAgain,
+        asyncio.TimeoutError,
     )
 
+def build_simulation_prompt(containers):
+    # Una línea CSV por contenedor con un id corto (su posición): el modelo solo devuelve el orden de visita
+    ordered = sorted(containers, key=lambda c: c.guid)
+    lats, lons = coordinates(ordered)
+    rows = []
+    urgent = []
+    for i, (c, lat, lon) in enumerate(zip(ordered, lats, lons)):
+        capacity, limit = int(c.capacity), int(c.limit)
+        if capacity >= limit:
+            urgent.append((-capacity, i))
+        rows.append(f"{i},{lat:.5f},{lon:.5f},{capacity},{limit}")
+    urgent_ids = ",".join(str(i) for _, i in sorted(urgent))
 
-def parse_openai_simulation_response(content: str):
-    try:
-
-        cleaned_content = content.strip()
-        if cleaned_content.startswith("```json"):
-            cleaned_content = cleaned_content[7:]
-        if cleaned_content.startswith("```"):
-            cleaned_content = cleaned_content[3:]
-        if cleaned_content.endswith("```"):
-            cleaned_content = cleaned_content[:-3]
-        
-        cleaned_content = cleaned_content.strip()
+    return (
+        "Order a waste-collection truck route over the containers below.\n"
+        "Urgent = capacity>=limit. All urgent stops go first, starting with the fullest one; then the rest.\n"
+        "Minimise total straight-line distance within those rules. Visit every id exactly once.\n"
+        'Reply {"route":[id,...]}\n'
+        f"urgent:{urgent_ids or '-'}\n"
+        "id,lat,lon,capacity,limit\n"
+        + "\n".join(rows)
+    )
 
-        data = json.loads(cleaned_content)
-        route = data["route"]
-        distances = data["distances"]
-        total_distance = float(data["total_distance_km"])
-        duration = float(data["duration_min"])
+async def _stream_completion(messages) -> str:
+    # Stream: el timeout de inactividad corta una respuesta colgada sin limitar las largas que siguen llegando
+    stream = await get_openai().ChatCompletion.acreate(
+        model=OPENAI_MODEL,
+        messages=messages,
+        temperature=0.2,
+        response_format={"type": "json_object"},
+        stream=True,
+        request_timeout=LLM_TIMEOUT_SECONDS,
+        api_base=OPENAI_API_BASE or None,
+    )
+    parts = []
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), LLM_IDLE_TIMEOUT_SECONDS)
+            except StopAsyncIteration:
+                break
+            choice = chunk["choices"][0] if chunk.get("choices") else {}
+            parts.append(choice.get("delta", {}).get("content") or "")
+    finally:
+        await stream.aclose()
+    return "".join(parts)
 
-        if not isinstance(route, list) or not all(isinstance(x, str) for x in route):
-            raise ValueError("Invalid 'route' format")
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, (*retryable_errors(), ValueError)):
+        return True
+    # APIError sin más detalle: 5xx o respuesta cortada
+    api_error = get_openai().error.APIError
+    return isinstance(exc, api_error) and (exc.http_status is None or exc.http_status >= 500)
 
-        if not isinstance(distances, list):
-            raise ValueError("Invalid 'distances' format")
-        
-        distances_json = json.dumps(distances)
+async def order_with_openai(containers) -> tuple:
+    # Un solo prompt -> (route, legs, total_km, duration_min) ya validado y con distancias locales
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_simulation_prompt(containers)},
+    ]
+    handled = (get_openai().error.OpenAIError, asyncio.TimeoutError, ValueError)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            # Un span por intento: los reintentos y timeouts se ven como llamadas aparte (y errores)
+            with span("llm"):
+                async with asyncio.timeout(LLM_TIMEOUT_SECONDS):
+                    content = await _stream_completion(messages)
+            # Respuesta ilegible o que cubre menos de la mitad de las paradas -> ValueError (se reintenta)
+            route_guids, legs, total_distance, duration, repairs = await run_in_threadpool(
+                repair_route, containers, parse_route_ids(content)
+            )
+        except handled as e:
+            if not _retryable(e) or attempt == LLM_MAX_RETRIES:
+                raise RuntimeError(f"OpenAI simulation failed after {attempt + 1} attempt(s): {e}") from e
+            # Backoff exponencial con jitter completo para no reintentar todos a la vez
+            await asyncio.sleep(random.uniform(0, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+            continue
+        if repairs:
+            logger.info("Repaired OpenAI route: %s", dict(repairs))
+        return route_guids, legs, total_distance, duration
 
-        return route, distances_json, total_distance, duration
-    except Exception as e:
-        raise ValueError(f"Invalid response from OpenAI: {content}") from e
+async def _order_chunk(chunk, semaphore: asyncio.Semaphore) -> tuple:
+    async with semaphore:
+        try:
+            return await order_with_openai(chunk)
+        except RuntimeError as e:
+            if not SIMULATION_LLM_FALLBACK:
+                raise
+            # Solo este trozo se calcula con el optimizador local; el resto conserva la ruta del modelo
+            logger.warning("OpenAI chunk of %d containers optimized locally: %s", len(chunk), e)
+            return await run_in_threadpool(optimize_route, chunk)
 
-def call_openai_for_simulation(containers):
-    prompt = build_simulation_prompt(containers)
+async def call_openai_for_simulation(containers):
+    # Misma forma que optimize_simulation: (route, distances_json, total_km, duration_min)
+    if len(containers) <= LLM_CHUNK_SIZE:
+        route_guids, legs, total_distance, duration = await order_with_openai(containers)
+        return route_guids, json.dumps(legs), total_distance, duration
 
+    # Conjuntos grandes: trozos geográficos (urgentes y resto por separado) pedidos en paralelo y unidos en local
+    stops = sorted(to_stops(containers), key=lambda s: s.guid)
+    urgent = geographic_chunks([s for s in stops if is_urgent(s)], LLM_CHUNK_SIZE)
+    regular = geographic_chunks([s for s in stops if not is_urgent(s)], LLM_CHUNK_SIZE)
+    semaphore = asyncio.Semaphore(LLM_CHUNK_CONCURRENCY)
+    tasks = [asyncio.ensure_future(_order_chunk(chunk, semaphore)) for chunk in urgent + regular]
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a route optimisation assistant that MUST follow the priority and validation rules strictly. Self validate per checklist before answering"},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2
-        )
-        content = response["choices"][0]["message"]["content"]
-        return parse_openai_simulation_response(content)
-    except OpenAIError as e:
-        raise RuntimeError(f"OpenAI API error: {str(e)}") from e
\ No newline at end of file
+        pieces = await asyncio.gather(*tasks)
+    except BaseException:
+        # Si un trozo falla no tiene sentido seguir esperando (ni pagando) los demás
+        for task in tasks:
+            task.cancel()
+        raise
+
+    route_guids, legs, total_distance, duration = await run_in_threadpool(
+        stitch, list(pieces), len(urgent), {s.guid: s for s in stops}
+    )
+    return route_guids, json.dumps(legs), total_distance, duration
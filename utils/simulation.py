@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime, UTC
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import selectinload
+from fastapi.concurrency import run_in_threadpool
+from utils.routes_openai import call_openai_for_simulation
+from utils.route import optimize_simulation
+from config.settings import SIMULATION_ENGINE, SIMULATION_LLM_FALLBACK
+from models.simulation import Simulation, SimulationPlan, SimulationStop, SimulationLeg
+
+async def run_simulation_engine(containers, engine: str = None):
+    engine = engine or SIMULATION_ENGINE
+    if engine == "openai":
+        try:
+            return await call_openai_for_simulation(containers)
+        except (RuntimeError, ValueError):
+            if not SIMULATION_LLM_FALLBACK:
+                raise
+    # Optimizador local: CPU bloqueante fuera del event loop
+    return await run_in_threadpool(optimize_simulation, containers)
+
+def parse_legs(distances) -> List[dict]:
+    # Los motores devuelven los tramos como JSON [{"from", "to", "distance_km"}]
+    legs = json.loads(distances) if isinstance(distances, str) else distances
+    return [
+        {"from": str(leg["from"]), "to": str(leg["to"]), "distance_km": float(leg["distance_km"])}
+        for leg in legs
+    ]
+
+def simulation_rows(simulation_id: int, route_guids: List[str], legs: List[dict]) -> list:
+    stops = [
+        SimulationStop(simulation_id=simulation_id, position=i, container_guid=guid)
+        for i, guid in enumerate(route_guids)
+    ]
+    leg_rows = [
+        SimulationLeg(
+            simulation_id=simulation_id, position=i,
+            from_guid=leg["from"], to_guid=leg["to"], distance_km=leg["distance_km"],
+        ) for i, leg in enumerate(legs)
+    ]
+    return stops + leg_rows
+
+def simulation_query(include_legs: bool = True):
+    # Las paradas siempre hacen falta para `route`; los tramos solo si se piden
+    options = [selectinload(Simulation.stops)]
+    if include_legs:
+        options.append(selectinload(Simulation.legs))
+    return select(Simulation).options(*options).execution_options(populate_existing=True)
+
+async def load_simulation(db, simulation_id: int, include_legs: bool = True) -> Optional[Simulation]:
+    result = await db.execute(simulation_query(include_legs).where(Simulation.id == simulation_id))
+    return result.scalar_one_or_none()
+
+async def load_plan(db, plan_id: int) -> Optional[SimulationPlan]:
+    result = await db.execute(
+        select(SimulationPlan)
+        .options(
+            selectinload(SimulationPlan.routes).selectinload(Simulation.stops),
+            selectinload(SimulationPlan.routes).selectinload(Simulation.legs),
+        )
+        .where(SimulationPlan.id == plan_id)
+    )
+    return result.scalar_one_or_none()
+
+def encode_cursor(created_at: datetime, simulation_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{simulation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    # ValueError si el cursor no es válido
+    try:
+        created_at, simulation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(simulation_id)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at se guarda como DATETIME sin zona (UTC)
+    return value.astimezone(UTC).replace(tzinfo=None) if value.tzinfo else value
+
+def aware_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Al leerlo de la BD created_at llega sin zona; recién creado lleva UTC. Las respuestas siempre con zona
+    if value is None:
+        return None
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value.astimezone(UTC)
+
+def history_query(stmt, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                  cursor: Optional[Tuple[datetime, int]] = None):
+    # Simulaciones completadas, de la más reciente a la más antigua; keyset sobre (created_at, id)
+    stmt = stmt.where(Simulation.status == "completed")
+    if created_from is not None:
+        stmt = stmt.where(Simulation.created_at >= _naive_utc(created_from))
+    if created_to is not None:
+        stmt = stmt.where(Simulation.created_at < _naive_utc(created_to))
+    if cursor is not None:
+        created_at, simulation_id = cursor
+        created_at = _naive_utc(created_at)
+        stmt = stmt.where(or_(
+            Simulation.created_at < created_at,
+            and_(Simulation.created_at == created_at, Simulation.id < simulation_id),
+        ))
+    return stmt.order_by(Simulation.created_at.desc(), Simulation.id.desc())
@@ -0,0 +1,70 @@
+import hashlib
+import math
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import SIMULATION_ENGINE, SIMULATION_CACHE_TTL_SECONDS, SIMULATION_CACHE_MAX_ENTRIES
+from models.simulation import Simulation, SimulationCacheEntry
+from utils.cache import Cache, MemoryBackend
+from utils.simulation import load_simulation
+
+memory_cache = Cache(MemoryBackend(SIMULATION_CACHE_MAX_ENTRIES), ttl=SIMULATION_CACHE_TTL_SECONDS)
+
+def fingerprint(containers, engine: Optional[str] = None) -> str:
+    # Huella estable: mismo conjunto y mismo estado (coordenadas, capacidad, límite) -> misma clave
+    parts = [f"engine={engine or SIMULATION_ENGINE}"]
+    for c in sorted(containers, key=lambda c: c.guid):
+        parts.append(f"{c.guid}|{c.latitude}|{c.longitude}|{int(c.capacity)}|{int(c.limit)}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+async def lookup(db: AsyncSession, key: str) -> Optional[Simulation]:
+    simulation_id = memory_cache.get(key)
+    if simulation_id is None:
+        now = _now()
+        result = await db.execute(
+            select(SimulationCacheEntry.simulation_id, SimulationCacheEntry.expires_at)
+            .where(SimulationCacheEntry.fingerprint == key, SimulationCacheEntry.expires_at > now)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        simulation_id, expires_at = row
+        # La copia en memoria no puede sobrevivir a la entrada de la BD
+        memory_cache.set(key, simulation_id, ttl=math.ceil((expires_at - now).total_seconds()))
+
+    simulation = await load_simulation(db, simulation_id)
+    if simulation is None:
+        memory_cache.invalidate(key)
+    return simulation
+
+async def store(db: AsyncSession, key: str, simulation: Simulation) -> int:
+    # -> id de la simulación que queda asociada a la huella (la de otra petición si ganó la carrera)
+    # La tabla no tiene tope de filas: solo se purga lo caducado; SIMULATION_CACHE_MAX_ENTRIES limita la copia en memoria
+    now = _now()
+    simulation_id = simulation.id
+    # Purga de caducados en la misma transacción; expires_at está indexado
+    await db.execute(delete(SimulationCacheEntry).where(SimulationCacheEntry.expires_at <= now))
+    try:
+        # SAVEPOINT: si falla, solo se deshace la entrada y la simulación ya guardada sigue cargada en la sesión
+        async with db.begin_nested():
+            entry = await db.get(SimulationCacheEntry, key)
+            if entry is None:
+                entry = SimulationCacheEntry(fingerprint=key)
+                db.add(entry)
+            entry.simulation_id = simulation_id
+            entry.created_at = now
+            entry.expires_at = now + timedelta(seconds=SIMULATION_CACHE_TTL_SECONDS)
+    except IntegrityError:
+        # Otra petición con la misma huella insertó la entrada entre el get y el flush: se conserva la suya
+        result = await db.execute(
+            select(SimulationCacheEntry.simulation_id).where(SimulationCacheEntry.fingerprint == key)
+        )
+        simulation_id = result.scalar_one()
+    await db.commit()
+    memory_cache.set(key, simulation_id)
+    return simulation_id
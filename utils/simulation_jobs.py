@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, UTC
+from typing import Dict, List, Optional
+from sqlalchemy import and_, or_, select, update
+from config.db import AsyncSessionLocal
+from config.settings import (
+    SIMULATION_JOB_WORKERS, SIMULATION_JOB_QUEUE_SIZE, SIMULATION_JOB_HEARTBEAT_SECONDS, SIMULATION_JOB_STALE_SECONDS,
+)
+from models.container import Container
+from models.simulation import Simulation
+from utils.simulation import run_simulation_engine, parse_legs, simulation_rows
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "running")
+WORKER_LOST_ERROR = "Worker restarted before the job finished"
+
+logger = logging.getLogger(__name__)
+
+def utc_now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+class JobQueueFull(Exception):
+    pass
+
+class SimulationJobQueue:
+    # Cola en proceso: como mucho `workers` optimizaciones a la vez y `max_pending` jobs vivos
+    def __init__(self, workers: int = SIMULATION_JOB_WORKERS, max_pending: int = SIMULATION_JOB_QUEUE_SIZE,
+                 heartbeat_seconds: float = SIMULATION_JOB_HEARTBEAT_SECONDS,
+                 stale_seconds: float = SIMULATION_JOB_STALE_SECONDS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._changed: Dict[int, asyncio.Event] = {}
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def submit(self, container_guids: List[str], engine: Optional[str] = None) -> Simulation:
+        if len(self._tasks) >= self.max_pending:
+            raise JobQueueFull()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        async with AsyncSessionLocal() as db:
+            job = Simulation(total_distance_km=0, duration_min=0, status="queued", heartbeat_at=utc_now())
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+
+        self._changed[job.id] = asyncio.Event()
+        task = asyncio.create_task(self._run(job.id, container_guids, engine))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._finish(job.id))
+        return job
+
+    def _finish(self, job_id: int):
+        self._tasks.pop(job_id, None)
+        self._notify(job_id)
+        self._changed.pop(job_id, None)
+
+    def _notify(self, job_id: int):
+        event = self._changed.get(job_id)
+        if event is not None:
+            event.set()
+            self._changed[job_id] = asyncio.Event()
+
+    async def _set(self, job_id: int, rows: Optional[list] = None, **values):
+        async with AsyncSessionLocal() as db:
+            job = await db.get(Simulation, job_id)
+            for key, value in values.items():
+                setattr(job, key, value)
+            db.add_all(rows or [])
+            await db.commit()
+        self._notify(job_id)
+
+    async def _run(self, job_id: int, container_guids: List[str], engine: Optional[str]):
+        try:
+            async with self._semaphore:
+                await self._set(job_id, status="running")
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(select(Container).where(Container.guid.in_(container_guids)))
+                    containers = result.scalars().all()
+
+                route_guids, distances_json, total_distance_km, duration_min = await run_simulation_engine(
+                    containers, engine
+                )
+                await self._set(
+                    job_id,
+                    rows=simulation_rows(job_id, route_guids, parse_legs(distances_json)),
+                    status="completed",
+                    total_distance_km=total_distance_km,
+                    duration_min=duration_min,
+                )
+        except asyncio.CancelledError:
+            if self._stopping:
+                await asyncio.shield(self._set(job_id, status="failed", error=WORKER_LOST_ERROR))
+            else:
+                await asyncio.shield(self._set(job_id, status="cancelled"))
+            raise
+        except Exception as e:
+            await self._set(job_id, status="failed", error=str(e)[:1000])
+
+    def cancel(self, job_id: int) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        return task.cancel()
+
+    async def start(self):
+        # Al arrancar, los jobs que dejó a medias un worker caído o reiniciado se marcan como fallidos
+        self._stopping = False
+        try:
+            await self.recover_stale()
+        except Exception:
+            logger.exception("Recovering stale simulation jobs failed")
+        self._monitor = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        # Los jobs en curso se cierran como fallidos en lugar de esperar a que otro worker note el latido perdido
+        self._stopping = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self.heartbeat()
+                await self.recover_stale()
+            except Exception:
+                logger.exception("Simulation job heartbeat failed")
+
+    async def heartbeat(self):
+        if not self._tasks:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Simulation)
+                .where(Simulation.id.in_(list(self._tasks)), Simulation.status.in_(ACTIVE_STATUSES))
+                .values(heartbeat_at=utc_now())
+            )
+            await db.commit()
+
+    async def recover_stale(self) -> List[int]:
+        # Sin latido reciente el dueño ya no existe; los jobs de este proceso siguen vivos aunque el latido se retrase.
+        # Las filas sin latido (creadas antes de la migración 0008) se juzgan por created_at
+        cutoff = utc_now() - timedelta(seconds=self.stale_seconds)
+        stale = or_(
+            Simulation.heartbeat_at < cutoff,
+            and_(Simulation.heartbeat_at.is_(None), Simulation.created_at < cutoff),
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Simulation.id).where(Simulation.status.in_(ACTIVE_STATUSES), stale))
+            job_ids = [job_id for job_id in result.scalars() if job_id not in self._tasks]
+            if job_ids:
+                await db.execute(
+                    update(Simulation)
+                    .where(Simulation.id.in_(job_ids), Simulation.status.in_(ACTIVE_STATUSES))
+                    .values(status="failed", error=WORKER_LOST_ERROR)
+                )
+                await db.commit()
+        if job_ids:
+            logger.warning("Marked %d stale simulation jobs as failed: %s", len(job_ids), job_ids)
+        return job_ids
+
+    def is_local(self, job_id: int) -> bool:
+        return job_id in self._tasks
+
+    async def wait_for_change(self, job_id: int, timeout: float):
+        # Jobs de este proceso avisan al cambiar; los de otros workers se consultan por sondeo
+        event = self._changed.get(job_id)
+        try:
+            if event is not None:
+                await asyncio.wait_for(event.wait(), timeout)
+            else:
+                await asyncio.sleep(timeout)
+        except asyncio.TimeoutError:
+            pass
+
+simulation_jobs = SimulationJobQueue()
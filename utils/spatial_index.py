@@ -0,0 +1,142 @@
+import math
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
+from config.db import SessionLocal
+from config.settings import CONTAINER_INDEX_TTL_SECONDS
+from models.container import Container
+from utils.distance import haversine_one_to_many, bounding_box
+
+CELL_SIZE_DEG = 0.01  # ~1.1 km de lado en latitud
+MAX_SEARCH_KM = 20000
+
+class SpatialIndex:
+    # Índice de rejilla en memoria: celda (lat, lon) -> guids. Solo ve las escrituras de este proceso:
+    # pasado ttl_seconds desde la lectura de la tabla se recarga
+    def __init__(self, cell_size_deg: float = CELL_SIZE_DEG, ttl_seconds: float = CONTAINER_INDEX_TTL_SECONDS):
+        self.cell_size_deg = cell_size_deg
+        self.ttl_seconds = ttl_seconds
+        self.loaded = False
+        self.loaded_at = 0.0
+        self._load_started = 0.0
+        self._journal: Optional[list] = None
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size_deg), math.floor(lon / self.cell_size_deg)
+
+    def begin_load(self) -> bool:
+        # Las escrituras que llegan mientras se lee la tabla se reaplican al terminar la carga
+        with self._lock:
+            if self._journal is not None:
+                return False
+            self._journal = []
+            self._load_started = time.monotonic()
+            return True
+
+    def load(self, points):
+        with self._lock:
+            self._points.clear()
+            self._cells.clear()
+            for guid, lat, lon in points:
+                self._insert(guid, lat, lon)
+            journal, self._journal = self._journal or [], None
+            for op, args in journal:
+                op(*args)
+            self.loaded = True
+            self.loaded_at = self._load_started
+
+    def fresh(self) -> bool:
+        return self.loaded and (self.ttl_seconds <= 0 or time.monotonic() - self.loaded_at < self.ttl_seconds)
+
+    def abort_load(self):
+        with self._lock:
+            self._journal = None
+
+    def _insert(self, guid: str, lat, lon):
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            return
+        self._points[guid] = (lat, lon)
+        self._cells.setdefault(self._cell(lat, lon), set()).add(guid)
+
+    def upsert(self, guid: str, lat, lon):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self.upsert, (guid, lat, lon)))
+            self._remove(guid)
+            self._insert(guid, lat, lon)
+
+    def _remove(self, guid: str):
+        point = self._points.pop(guid, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(guid)
+            if not members:
+                del self._cells[cell]
+
+    def remove(self, guid: str):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self.remove, (guid,)))
+            self._remove(guid)
+
+    def within(self, lat, lon, radius_km: float, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        # (guid, distancia_km) dentro del radio, ordenados por distancia
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        lat_from, lon_from = self._cell(min_lat, min_lon)
+        lat_to, lon_to = self._cell(max_lat, max_lon)
+
+        with self._lock:
+            if (lat_to - lat_from + 1) * (lon_to - lon_from + 1) > len(self._cells):
+                cells = [members for (i, j), members in self._cells.items()
+                         if lat_from <= i <= lat_to and lon_from <= j <= lon_to]
+            else:
+                cells = [self._cells[(i, j)]
+                         for i in range(lat_from, lat_to + 1)
+                         for j in range(lon_from, lon_to + 1) if (i, j) in self._cells]
+            guids = [guid for members in cells for guid in members if guid != exclude]
+            points = np.array([self._points[guid] for guid in guids], dtype=np.float64).reshape(-1, 2)
+
+        if not guids:
+            return []
+        distances = haversine_one_to_many(lat, lon, points[:, 0], points[:, 1])
+        hits = np.flatnonzero(distances <= radius_km)
+        hits = hits[np.argsort(distances[hits], kind="stable")]
+        return [(guids[i], float(distances[i])) for i in hits]
+
+    def nearest(self, lat, lon, k: int, max_km: Optional[float] = None,
+                exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        # Radio creciente: si dentro de r hay >= k puntos, los k más cercanos están entre ellos
+        limit = max_km if max_km is not None else MAX_SEARCH_KM
+        radius = min(self.cell_size_deg * 111.32, limit)
+        while True:
+            found = self.within(lat, lon, radius, exclude)
+            if len(found) >= k or radius >= limit:
+                return found[:k]
+            radius = min(radius * 2, limit)
+
+container_index = SpatialIndex()
+
+def warm_container_index():
+    if not container_index.begin_load():
+        return
+    db = SessionLocal()
+    try:
+        rows = db.query(Container.guid, Container.latitude_deg, Container.longitude_deg).all()
+        container_index.load(rows)
+    except Exception:
+        container_index.abort_load()
+        raise
+    finally:
+        db.close()
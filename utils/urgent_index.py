@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import SessionLocal
+from config.settings import URGENT_INDEX_TTL_SECONDS
+from models.container import Container
+
+logger = logging.getLogger(__name__)
+
+class UrgentIndex:
+    # Conjunto de urgentes (capacity >= limit) mantenido en cada escritura de capacity/limit de este proceso.
+    # Las de otros workers no llegan: pasado ttl_seconds desde la lectura de la tabla deja de ser fiable
+    def __init__(self, ttl_seconds: float = URGENT_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.loaded = False
+        self.loaded_at = 0.0
+        self._load_started = 0.0
+        self._journal: Optional[list] = None
+        self._urgent: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._urgent)
+
+    def begin_load(self) -> bool:
+        # Igual que SpatialIndex: las escrituras durante la carga se reaplican al final
+        with self._lock:
+            if self._journal is not None:
+                return False
+            self._journal = []
+            self._load_started = time.monotonic()
+            return True
+
+    def load(self, rows):
+        with self._lock:
+            self._urgent.clear()
+            for guid, capacity, limit in rows:
+                self._update(guid, capacity, limit)
+            journal, self._journal = self._journal or [], None
+            for op, args in journal:
+                op(*args)
+            self.loaded = True
+            self.loaded_at = self._load_started
+
+    def fresh(self) -> bool:
+        return self.loaded and (self.ttl_seconds <= 0 or time.monotonic() - self.loaded_at < self.ttl_seconds)
+
+    def abort_load(self):
+        with self._lock:
+            self._journal = None
+
+    def _update(self, guid: str, capacity, limit):
+        if int(capacity) >= int(limit):
+            self._urgent[guid] = (int(capacity), int(limit))
+        else:
+            self._urgent.pop(guid, None)
+
+    def update(self, guid: str, capacity, limit):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self.update, (guid, capacity, limit)))
+            self._update(guid, capacity, limit)
+
+    def remove(self, guid: str):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self.remove, (guid,)))
+            self._urgent.pop(guid, None)
+
+    def urgent(self) -> List[Tuple[str, int, int]]:
+        # (guid, capacity, limit), el más lleno primero; O(urgentes)
+        with self._lock:
+            items = [(guid, capacity, limit) for guid, (capacity, limit) in self._urgent.items()]
+        return sorted(items, key=lambda item: (-item[1], item[0]))
+
+    def guids(self) -> List[str]:
+        return [guid for guid, _, _ in self.urgent()]
+
+urgent_index = UrgentIndex()
+
+def warm_urgent_index():
+    if not urgent_index.begin_load():
+        return
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Container.guid, Container.capacity, Container.limit)
+            .filter(Container.capacity >= Container.limit)
+            .all()
+        )
+        urgent_index.load(rows)
+    except Exception:
+        urgent_index.abort_load()
+        raise
+    finally:
+        db.close()
+
+def _log_reload_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Reloading the urgent index failed: %r", future.exception())
+
+def reload_urgent_index():
+    # Para quien no tiene BackgroundTasks a mano; begin_load descarta recargas simultáneas
+    future = asyncio.get_running_loop().run_in_executor(None, warm_urgent_index)
+    future.add_done_callback(_log_reload_error)
+
+async def current_urgent_guids(db: AsyncSession) -> List[str]:
+    if urgent_index.fresh():
+        return urgent_index.guids()
+    reload_urgent_index()
+    result = await db.execute(
+        select(Container.guid)
+        .where(Container.capacity >= Container.limit)
+        .order_by(Container.capacity.desc(), Container.guid)
+    )
+    return list(result.scalars())
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import time
+from fastapi.concurrency import run_in_threadpool
+from config.db import engine, get_async_engine
+from config.settings import DB_PREWARM_CONNECTIONS, SIMULATION_ENGINE
+from utils.geolocation import get_geolocator
+from utils.routes_openai import get_openai
+from utils.spatial_index import warm_container_index
+from utils.urgent_index import warm_urgent_index
+
+logger = logging.getLogger(__name__)
+
+def _pool_connections(pool) -> int:
+    # Pools sin tamaño (SQLite en memoria, NullPool): con una conexión basta para comprobar la BD
+    size = getattr(pool, "size", None)
+    return max(1, min(DB_PREWARM_CONNECTIONS, size())) if callable(size) else 1
+
+def warm_sync_pool():
+    connections = [engine.connect() for _ in range(_pool_connections(engine.pool))]
+    for connection in connections:
+        connection.close()
+
+async def warm_async_pool():
+    async_engine = get_async_engine()
+    connections = [await async_engine.connect() for _ in range(_pool_connections(async_engine.pool))]
+    for connection in connections:
+        await connection.close()
+
+async def prewarm():
+    # Lo que, si no, pagaría la primera petición de cada worker: conexiones de ambos pools, índices en memoria
+    # (contenedores cercanos y urgentes) y los clientes de geocoding/OpenAI. Cada paso falla por separado
+    steps = [
+        ("db_pool", lambda: run_in_threadpool(warm_sync_pool)),
+        ("async_db_pool", warm_async_pool),
+        ("container_index", lambda: run_in_threadpool(warm_container_index)),
+        ("urgent_index", lambda: run_in_threadpool(warm_urgent_index)),
+        ("geocoder", lambda: run_in_threadpool(get_geolocator)),
+    ]
+    if SIMULATION_ENGINE == "openai":
+        steps.append(("openai", lambda: run_in_threadpool(get_openai)))
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            await step()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Pre-warm step %s failed: %r", name, e)
+            continue
+        timings[name] = round((time.perf_counter() - start) * 1000)
+    logger.info("Pre-warm done (ms): %s", timings)
+    return timings